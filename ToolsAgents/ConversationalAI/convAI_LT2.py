@@ -4,16 +4,20 @@
 # =====================================================
 
 import os
-import uuid
-import datetime
 import streamlit as st
 from dotenv import load_dotenv
 
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import RunnableLambda
 from langchain_core.runnables.history import RunnableWithMessageHistory
 from langchain_community.chat_message_histories import ChatMessageHistory
-from langchain_community.vectorstores import Chroma
+
+from memory_retrieval import CachedEmbeddings, MemoryRetriever
+from user_memory import UserMemoryStore
+from memory_policy import MemoryWritePolicy, MemoryWriter
+from memory_consolidation import ConsolidationJob, MemoryConsolidator
+from session_store import PersistentHistory, SessionStore, owner_token
 
 # -------------------------------
 # Load environment variables
@@ -44,92 +48,103 @@ PERSONA_PROMPTS = {
 # -------------------------------
 # LLM
 # -------------------------------
-llm = ChatOpenAI(
-    model="gpt-4o-mini",
-    temperature=0.3,
-    api_key=OPENAI_API_KEY
-)
+# Clients and stores below are built once per server (cache_resource):
+# the cached pipelines and the memory writer hold on to these instances,
+# so rebuilding them on every rerun would only add overhead.
+@st.cache_resource
+def get_llm():
+    return ChatOpenAI(
+        model="gpt-4o-mini",
+        temperature=0.3,
+        api_key=OPENAI_API_KEY
+    )
+
+llm = get_llm()
 
 # -------------------------------
 # Embeddings
 # -------------------------------
-embeddings = OpenAIEmbeddings(api_key=OPENAI_API_KEY)
+# Cached so the user message is embedded once per turn, for the memory
+# lookup and the memory-write classifier alike
+@st.cache_resource
+def get_embeddings():
+    return CachedEmbeddings(OpenAIEmbeddings(api_key=OPENAI_API_KEY))
+
+embeddings = get_embeddings()
 
 # -------------------------------
 # Long-Term Memory Stores
 # -------------------------------
-semantic_memory = Chroma(
-    collection_name="semantic_memory",
-    embedding_function=embeddings,
-    persist_directory="./semantic_store"
-)
-
-episodic_memory = Chroma(
-    collection_name="episodic_memory",
-    embedding_function=embeddings,
-    persist_directory="./episodic_store"
-)
+# One collection per user: searches never see another user's memories.
+# Facts about the user hold for every persona; experiences are per persona.
+MAX_MEMORIES_PER_USER = 200
+
+@st.cache_resource
+def get_memory_stores():
+    semantic = UserMemoryStore(
+        "semantic_memory",
+        embeddings,
+        persist_directory="./semantic_store",
+        max_per_user=MAX_MEMORIES_PER_USER
+    )
+    episodic = UserMemoryStore(
+        "episodic_memory",
+        embeddings,
+        persist_directory="./episodic_store",
+        max_per_user=MAX_MEMORIES_PER_USER,
+        persona_scoped=True
+    )
+    return semantic, episodic
+
+semantic_memory, episodic_memory = get_memory_stores()
+
+# Background job: merge repeated facts, drop episodes not seen for 30 days.
+# cache_resource starts it once per server, not once per rerun.
+@st.cache_resource
+def start_memory_consolidation():
+    return ConsolidationJob([
+        MemoryConsolidator(semantic_memory),
+        MemoryConsolidator(episodic_memory, expire_after_days=30)
+    ], interval=600).start()
+
+start_memory_consolidation()
 
 # -------------------------------
 # Memory Helpers
 # -------------------------------
-def retrieve_semantic_memory(query: str, k: int = 3) -> str:
-    docs = semantic_memory.similarity_search(query, k=k)
-    return "\n".join(d.page_content for d in docs) if docs else "None"
-
-def retrieve_episodic_memory(query: str, k: int = 3) -> str:
-    docs = episodic_memory.similarity_search(query, k=k)
-    return "\n".join(d.page_content for d in docs) if docs else "None"
-
-def store_semantic_memory(text: str, persona: str):
-    semantic_memory.add_texts(
-        texts=[text],
-        metadatas=[{
-            "type": "semantic",
-            "persona": persona,
-            "timestamp": datetime.datetime.utcnow().isoformat()
-        }]
-    )
-
-def store_episodic_memory(text: str, persona: str):
-    episodic_memory.add_texts(
-        texts=[text],
-        metadatas=[{
-            "type": "episodic",
-            "persona": persona,
-            "timestamp": datetime.datetime.utcnow().isoformat()
-        }]
+def retrieve_memory(query: str, user_id: str, persona: str) -> dict:
+    # One embedding per query, both of the user's stores searched concurrently
+    retriever = MemoryRetriever(
+        embeddings,
+        {
+            "semantic": semantic_memory.scope(user_id, persona),
+            "episodic": episodic_memory.scope(user_id, persona)
+        },
+        k=3
     )
+    return retriever.retrieve(query)
 
 # -------------------------------
-# Simple Heuristics (Teaching-Friendly)
+# Memory-Write Policy
 # -------------------------------
-SEMANTIC_TRIGGERS = [
-    "i am a",
-    "i work as",
-    "my role is",
-    "i want to learn",
-    "my goal is"
-]
-
-EPISODIC_TRIGGERS = [
-    "i am confused",
-    "i don't understand",
-    "this is unclear",
-    "earlier you said",
-    "last time"
-]
+# A local classifier decides fact / episode / ignore; the writer thread
+# batches the vector-store writes so they never add to turn latency.
+@st.cache_resource
+def get_memory_writer():
+    return MemoryWriter(
+        MemoryWritePolicy(embeddings),
+        routes={"fact": semantic_memory, "episode": episodic_memory},
+        templates={"episode": "User experienced confusion or correction: {text}"}
+    )
+
+memory_writer = get_memory_writer()
 
 # -------------------------------
-# Prompt Builder
+# Conversation Pipeline
 # -------------------------------
-def build_prompt(persona, semantic_context, episodic_context):
-    persona_prompt = PERSONA_PROMPTS.get(
-        persona,
-        "You are a helpful conversational AI assistant."
-    )
-
-    system_message = f"""
+# Memory context reaches the prompt as input variables, so one runnable per
+# persona serves every turn: memory lookup -> prompt -> LLM, with history.
+SYSTEM_TEMPLATE = """
 {persona_prompt}
 
 Stable user facts (semantic memory):
@@ -139,52 +154,102 @@ Relevant past experiences (episodic memory):
 {episodic_context}
 """
 
-    return ChatPromptTemplate.from_messages([
-        ("system", system_message),
-        MessagesPlaceholder(variable_name="history"),
-        ("human", "{input}")
-    ])
+PROMPT = ChatPromptTemplate.from_messages([
+    ("system", SYSTEM_TEMPLATE),
+    MessagesPlaceholder(variable_name="history"),
+    ("human", "{input}")
+])
+
+@st.cache_resource
+def get_conversation(persona: str):
+    persona_prompt = PERSONA_PROMPTS.get(
+        persona,
+        "You are a helpful conversational AI assistant."
+    )
+
+    def add_memory_context(inputs: dict) -> dict:
+        memory_ctx = retrieve_memory(inputs["input"], inputs["user_id"], persona)
+        return {
+            **inputs,
+            "persona_prompt": persona_prompt,
+            "semantic_context": memory_ctx["semantic"],
+            "episodic_context": memory_ctx["episodic"]
+        }
+
+    chain = RunnableLambda(add_memory_context) | PROMPT | llm
+
+    return RunnableWithMessageHistory(
+        chain,
+        get_session_history,
+        input_messages_key="input",
+        history_messages_key="history"
+    )
+
+# -------------------------------
+# Session Persistence
+# -------------------------------
+# Messages live in an append-only SQLite log (see session_store.py): the
+# page shows the last PAGE_SIZE of them and loads older pages on demand,
+# and the LLM history of a reopened session is rebuilt from its tail.
+PAGE_SIZE = 20
+RESUME_MESSAGES = 20
+
+@st.cache_resource
+def get_session_store():
+    return SessionStore("./sessions.db", app="convAI_LT2")
+
+store = get_session_store()
+
+# The store is shared by every visitor; each browser only sees its own sessions
+owner = owner_token(st.query_params)
 
 # -------------------------------
-# Initialize Sessions
+# Initialize Session State
 # -------------------------------
-if "sessions" not in st.session_state:
-    st.session_state.sessions = {}
+if "histories" not in st.session_state:
+    st.session_state.histories = {}     # session_id -> LLM history
+
+if "visible" not in st.session_state:
+    st.session_state.visible = {}       # session_id -> messages shown
+
+if "user_id" not in st.session_state:
+    # Long-term memory follows the browser, like its sessions
+    st.session_state.user_id = owner
 
 if "active_session" not in st.session_state:
-    sid = str(uuid.uuid4())
-    st.session_state.sessions[sid] = {
-        "name": "Session 1",
-        "ui": [],
-        "memory": ChatMessageHistory(),
-        "persona": None,
-        "persona_locked": False
-    }
-    st.session_state.active_session = sid
+    # Refresh / restart: continue this browser's last conversation
+    st.session_state.active_session = store.latest(owner)["id"]
 
 def get_session_history(session_id: str):
-    return st.session_state.sessions[session_id]["memory"]
+    if session_id not in st.session_state.histories:
+        st.session_state.histories[session_id] = PersistentHistory(
+            store,
+            session_id,
+            ChatMessageHistory(),
+            resume_messages=RESUME_MESSAGES
+        )
+    return st.session_state.histories[session_id]
 
 # -------------------------------
 # Sidebar
 # -------------------------------
 with st.sidebar:
+    st.subheader("👤 User")
+    # Demo only: any ID typed here reads that user's memories, so this
+    # shows the per-user partitioning and is not a login
+    with st.expander("Demo: act as another user"):
+        st.session_state.user_id = st.text_input(
+            "User ID (blank = this browser)",
+            value="" if st.session_state.user_id == owner else st.session_state.user_id
+        ).strip() or owner
+
     st.subheader("🗂️ Sessions")
 
     if st.button("➕ New Session"):
-        new_id = str(uuid.uuid4())
-        st.session_state.sessions[new_id] = {
-            "name": f"Session {len(st.session_state.sessions) + 1}",
-            "ui": [],
-            "memory": ChatMessageHistory(),
-            "persona": None,
-            "persona_locked": False
-        }
-        st.session_state.active_session = new_id
+        st.session_state.active_session = store.create(owner)["id"]
         st.rerun()
 
-    session_ids = list(st.session_state.sessions.keys())
-    session_names = {sid: st.session_state.sessions[sid]["name"] for sid in session_ids}
+    session_names = {s["id"]: s["name"] for s in store.sessions(owner)}
 
     selected = st.selectbox(
         "Select session",
@@ -198,24 +263,41 @@ with st.sidebar:
             break
 
     st.subheader("🎭 Persona")
-    current_session = st.session_state.sessions[st.session_state.active_session]
+    current_session = store.get(st.session_state.active_session)
 
-    if not current_session["persona_locked"]:
-        current_session["persona"] = st.selectbox(
+    if current_session["persona"] is None:
+        selected_persona = st.selectbox(
             "Choose persona",
             options=list(PERSONA_PROMPTS.keys())
         )
     else:
+        selected_persona = current_session["persona"]
         st.info(f"Persona locked: {current_session['persona']}")
 
+    # Export the whole log of the session (read only when asked for)
+    if st.button("📤 Export session"):
+        st.download_button(
+            "⬇️ Download JSON",
+            data=store.export(st.session_state.active_session),
+            file_name=f"{current_session['name']}.json",
+            mime="application/json"
+        )
+
 # -------------------------------
 # Render UI
 # -------------------------------
-current_session = st.session_state.sessions[st.session_state.active_session]
+active_session = st.session_state.active_session
+visible = st.session_state.visible.setdefault(active_session, PAGE_SIZE)
+rows = store.tail(active_session, visible)
 
-for role, msg in current_session["ui"]:
-    with st.chat_message(role):
-        st.markdown(msg)
+if rows and rows[0]["seq"] > 0:
+    if st.button("⬆️ Load older messages"):
+        st.session_state.visible[active_session] += PAGE_SIZE
+        st.rerun()
+
+for row in rows:
+    with st.chat_message(row["role"]):
+        st.markdown(row["content"])
 
 # -------------------------------
 # User Input
@@ -223,46 +305,24 @@ for role, msg in current_session["ui"]:
 user_input = st.chat_input("Type your message...")
 
 if user_input:
-    if not current_session["persona_locked"]:
-        current_session["persona_locked"] = True
-
-    # Store semantic memory
-    if any(t in user_input.lower() for t in SEMANTIC_TRIGGERS):
-        store_semantic_memory(user_input, current_session["persona"])
-
-    # Store episodic memory
-    if any(t in user_input.lower() for t in EPISODIC_TRIGGERS):
-        store_episodic_memory(
-            f"User experienced confusion or correction: {user_input}",
-            current_session["persona"]
-        )
+    if current_session["persona"] is None:
+        store.set_persona(active_session, selected_persona)
 
-    # Retrieve memory
-    semantic_ctx = retrieve_semantic_memory(user_input)
-    episodic_ctx = retrieve_episodic_memory(user_input)
+    # Classified and stored in the background (fact -> semantic, episode -> episodic)
+    memory_writer.submit(user_input, st.session_state.user_id, selected_persona)
 
-    # Build chain
-    prompt = build_prompt(current_session["persona"], semantic_ctx, episodic_ctx)
-    chain = prompt | llm
-
-    conversation = RunnableWithMessageHistory(
-        chain,
-        get_session_history,
-        input_messages_key="input",
-        history_messages_key="history"
-    )
+    # Long-lived persona pipeline (memory retrieval runs inside it)
+    conversation = get_conversation(selected_persona)
 
     # UI
-    current_session["ui"].append(("user", user_input))
     with st.chat_message("user"):
         st.markdown(user_input)
 
     response = conversation.invoke(
-        {"input": user_input},
+        {"input": user_input, "user_id": st.session_state.user_id},
         config={"configurable": {"session_id": st.session_state.active_session}}
     )
 
     ai_response = response.content
-    current_session["ui"].append(("assistant", ai_response))
     with st.chat_message("assistant"):
         st.markdown(ai_response)
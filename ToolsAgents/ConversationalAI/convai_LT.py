@@ -4,8 +4,6 @@
 # =====================================================
 
 import os
-import uuid
-import datetime
 import streamlit as st
 from dotenv import load_dotenv
 
@@ -13,7 +11,12 @@ from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.runnables.history import RunnableWithMessageHistory
 from langchain_community.chat_message_histories import ChatMessageHistory
-from langchain_community.vectorstores import Chroma
+
+from memory_retrieval import CachedEmbeddings
+from user_memory import UserMemoryStore
+from memory_policy import MemoryWritePolicy, MemoryWriter
+from memory_consolidation import ConsolidationJob, MemoryConsolidator
+from session_store import PersistentHistory, SessionStore, owner_token
 
 # -------------------------------
 # Load environment variables
@@ -60,47 +63,65 @@ PERSONA_PROMPTS = {
 # -------------------------------
 # LLM
 # -------------------------------
-llm = ChatOpenAI(
-    model="gpt-4o-mini",
-    temperature=0.3,
-    api_key=OPENAI_API_KEY
-)
+# Clients and stores below are built once per server (cache_resource):
+# the memory writer and the consolidation job hold on to these instances,
+# so rebuilding them on every rerun would only add overhead.
+@st.cache_resource
+def get_llm():
+    return ChatOpenAI(
+        model="gpt-4o-mini",
+        temperature=0.3,
+        api_key=OPENAI_API_KEY
+    )
+
+llm = get_llm()
 
 # -------------------------------
 # Long-Term Memory (ChromaDB)
 # -------------------------------
-embeddings = OpenAIEmbeddings(api_key=OPENAI_API_KEY)
+# Cached so the message is embedded once for the lookup and the write classifier
+@st.cache_resource
+def get_embeddings():
+    return CachedEmbeddings(OpenAIEmbeddings(api_key=OPENAI_API_KEY))
+
+embeddings = get_embeddings()
+
+# One collection per user: searches only ever see that user's memories
+@st.cache_resource
+def get_memory_store():
+    return UserMemoryStore(
+        "long_term_memory",
+        embeddings,
+        persist_directory="./ltm_store",
+        max_per_user=200
+    )
+
+long_term_memory = get_memory_store()
+
+# Background job: merge repeated facts into one memory.
+# cache_resource starts it once per server, not once per rerun.
+@st.cache_resource
+def start_memory_consolidation():
+    return ConsolidationJob([MemoryConsolidator(long_term_memory)], interval=600).start()
 
-long_term_memory = Chroma(
-    collection_name="long_term_memory",
-    embedding_function=embeddings,
-    persist_directory="./ltm_store"
-)
+start_memory_consolidation()
 
-def retrieve_long_term_memory(query: str, k: int = 3) -> str:
-    results = long_term_memory.similarity_search(query, k=k)
+def retrieve_long_term_memory(query: str, user_id: str, k: int = 3) -> str:
+    results = long_term_memory.similarity_search(user_id, query, k=k)
     if not results:
         return "None"
     return "\n".join([doc.page_content for doc in results])
 
-def store_long_term_memory(text: str, persona: str):
-    long_term_memory.add_texts(
-        texts=[text],
-        metadatas=[{
-            "persona": persona,
-            "timestamp": datetime.datetime.utcnow().isoformat()
-        }]
+# A local classifier decides what is a fact worth keeping; the writer thread
+# batches the vector-store writes so they never add to turn latency.
+@st.cache_resource
+def get_memory_writer():
+    return MemoryWriter(
+        MemoryWritePolicy(embeddings),
+        routes={"fact": long_term_memory}
     )
 
-# Design choice
-IMPORTANT_TRIGGERS = [
-    "my name is",
-    "i am a",
-    "i work as",
-    "i manage",
-    "i want to learn",
-    "my goal is"
-]
+memory_writer = get_memory_writer()
 
 # -------------------------------
 # Prompt Builder (Persona + LTM)
@@ -125,48 +146,73 @@ Relevant long-term knowledge:
     ])
 
 # -------------------------------
-# Initialize Session Store
+# Session Persistence
+# -------------------------------
+# Messages live in an append-only SQLite log (see session_store.py): the
+# page shows the last PAGE_SIZE of them and loads older pages on demand,
+# and the LLM history of a reopened session is rebuilt from its tail.
+PAGE_SIZE = 20
+RESUME_MESSAGES = 20
+
+@st.cache_resource
+def get_session_store():
+    return SessionStore("./sessions.db", app="convai_LT")
+
+store = get_session_store()
+
+# The store is shared by every visitor; each browser only sees its own sessions
+owner = owner_token(st.query_params)
+
+# -------------------------------
+# Initialize Session State
 # -------------------------------
-if "sessions" not in st.session_state:
-    st.session_state.sessions = {}
+if "histories" not in st.session_state:
+    st.session_state.histories = {}     # session_id -> LLM history
+
+if "visible" not in st.session_state:
+    st.session_state.visible = {}       # session_id -> messages shown
+
+if "user_id" not in st.session_state:
+    # Long-term memory follows the browser, like its sessions
+    st.session_state.user_id = owner
 
 if "active_session" not in st.session_state:
-    sid = str(uuid.uuid4())
-    st.session_state.sessions[sid] = {
-        "name": "Session 1",
-        "ui": [],
-        "memory": ChatMessageHistory(),
-        "persona": None,
-        "persona_locked": False
-    }
-    st.session_state.active_session = sid
+    # Refresh / restart: continue this browser's last conversation
+    st.session_state.active_session = store.latest(owner)["id"]
 
 # -------------------------------
 # Helper: Get Short-Term Memory
 # -------------------------------
 def get_session_history(session_id: str):
-    return st.session_state.sessions[session_id]["memory"]
+    if session_id not in st.session_state.histories:
+        st.session_state.histories[session_id] = PersistentHistory(
+            store,
+            session_id,
+            ChatMessageHistory(),
+            resume_messages=RESUME_MESSAGES
+        )
+    return st.session_state.histories[session_id]
 
 # -------------------------------
 # Sidebar – Sessions & Persona
 # -------------------------------
 with st.sidebar:
+    st.subheader("👤 User")
+    # Demo only: any ID typed here reads that user's memories, so this
+    # shows the per-user partitioning and is not a login
+    with st.expander("Demo: act as another user"):
+        st.session_state.user_id = st.text_input(
+            "User ID (blank = this browser)",
+            value="" if st.session_state.user_id == owner else st.session_state.user_id
+        ).strip() or owner
+
     st.subheader("🗂️ Sessions")
 
     if st.button("➕ New Session"):
-        new_id = str(uuid.uuid4())
-        st.session_state.sessions[new_id] = {
-            "name": f"Session {len(st.session_state.sessions) + 1}",
-            "ui": [],
-            "memory": ChatMessageHistory(),
-            "persona": None,
-            "persona_locked": False
-        }
-        st.session_state.active_session = new_id
+        st.session_state.active_session = store.create(owner)["id"]
         st.rerun()
 
-    session_ids = list(st.session_state.sessions.keys())
-    session_names = {sid: st.session_state.sessions[sid]["name"] for sid in session_ids}
+    session_names = {s["id"]: s["name"] for s in store.sessions(owner)}
 
     selected_name = st.selectbox(
         "Select session",
@@ -180,25 +226,41 @@ with st.sidebar:
             break
 
     st.subheader("🎭 Persona")
-    current_session = st.session_state.sessions[st.session_state.active_session]
+    current_session = store.get(st.session_state.active_session)
 
-    if not current_session["persona_locked"]:
-        current_session["persona"] = st.selectbox(
+    if current_session["persona"] is None:
+        selected_persona = st.selectbox(
             "Choose persona (locked after first message)",
             options=list(PERSONA_PROMPTS.keys())
         )
     else:
+        selected_persona = current_session["persona"]
         st.info(f"Persona locked: **{current_session['persona']}**")
 
+    # Export the whole log of the session (read only when asked for)
+    if st.button("📤 Export session"):
+        st.download_button(
+            "⬇️ Download JSON",
+            data=store.export(st.session_state.active_session),
+            file_name=f"{current_session['name']}.json",
+            mime="application/json"
+        )
+
 # -------------------------------
-# Build Chain (Persona + LTM)
+# Render UI history
 # -------------------------------
-current_session = st.session_state.sessions[st.session_state.active_session]
+active_session = st.session_state.active_session
+visible = st.session_state.visible.setdefault(active_session, PAGE_SIZE)
+rows = store.tail(active_session, visible)
 
-# Render UI history
-for role, message in current_session["ui"]:
-    with st.chat_message(role):
-        st.markdown(message)
+if rows and rows[0]["seq"] > 0:
+    if st.button("⬆️ Load older messages"):
+        st.session_state.visible[active_session] += PAGE_SIZE
+        st.rerun()
+
+for row in rows:
+    with st.chat_message(row["role"]):
+        st.markdown(row["content"])
 
 # -------------------------------
 # User Input
@@ -207,18 +269,17 @@ user_input = st.chat_input("Type your message...")
 
 if user_input:
     # Lock persona on first message
-    if not current_session["persona_locked"]:
-        current_session["persona_locked"] = True
+    if current_session["persona"] is None:
+        store.set_persona(active_session, selected_persona)
 
-    # Store important facts in long-term memory
-    if any(t in user_input.lower() for t in IMPORTANT_TRIGGERS):
-        store_long_term_memory(user_input, current_session["persona"])
+    # Store facts in long-term memory (classified and written in the background)
+    memory_writer.submit(user_input, st.session_state.user_id, selected_persona)
 
     # Retrieve long-term memory
-    ltm_context = retrieve_long_term_memory(user_input)
+    ltm_context = retrieve_long_term_memory(user_input, st.session_state.user_id)
 
     # Build persona + memory aware prompt
-    prompt = build_prompt(current_session["persona"], ltm_context)
+    prompt = build_prompt(selected_persona, ltm_context)
     chain = prompt | llm
 
     conversation = RunnableWithMessageHistory(
@@ -229,7 +290,6 @@ if user_input:
     )
 
     # UI: user message
-    current_session["ui"].append(("user", user_input))
     with st.chat_message("user"):
         st.markdown(user_input)
 
@@ -242,6 +302,5 @@ if user_input:
     ai_response = response.content
 
     # UI: assistant message
-    current_session["ui"].append(("assistant", ai_response))
     with st.chat_message("assistant"):
         st.markdown(ai_response)
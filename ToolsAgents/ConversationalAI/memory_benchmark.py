@@ -0,0 +1,378 @@
+"""
+Offline benchmark for long-term memory: recall quality and cost.
+
+Replays the scripted multi-session dialogues in evals/memory_dialogues.json
+through the same pieces convAI_LT2.py uses (UserMemoryStore, MemoryWriter,
+MemoryRetriever, consolidation) with a stub LLM, and compares memory
+strategies on:
+
+    recall          share of probes whose evidence reached the prompt
+    stored          memories in the stores after each session
+    retrieval ms    embed + search per turn (p50 / p95)
+    prompt tokens   per turn (mean / p95), and the memory part of it
+    embed calls     embedding requests, i.e. what the strategy costs
+
+Each session starts with an empty chat history, as a new app session
+would, so later-session probes can only be answered from memory.
+
+Runs without network access using --embeddings stub (hashing embeddings),
+or with OpenAI embeddings cached on disk using --embeddings cached.
+
+    python memory_benchmark.py
+    python memory_benchmark.py --strategies policy policy+consolidate --k 1 3 5
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+import zlib
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import AIMessage, HumanMessage, get_buffer_string
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_community.chat_message_histories import ChatMessageHistory
+
+from memory_retrieval import CachedEmbeddings, MemoryRetriever
+from user_memory import UserMemoryStore
+from memory_policy import MemoryWritePolicy, MemoryWriter, WriteDecision
+from memory_consolidation import MemoryConsolidator
+
+# -----------------------------------------
+# CONSTANTS
+# -----------------------------------------
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATASET_PATH = os.path.join(HERE, "evals", "memory_dialogues.json")
+EMBEDDING_CACHE_PATH = os.path.join(HERE, "evals", "embedding_cache.json")
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+STRATEGIES = ["none", "all", "policy", "policy+consolidate"]
+
+# Same prompt shape as convAI_LT2.py
+PERSONA_PROMPTS = {
+    "Tech": "You are a highly technical expert. Use deep technical explanations.",
+    "Manager": "You are a delivery-focused manager. Emphasize execution and upskilling.",
+    "Business Leader": "You are a strategic leader. Focus on ROI and business impact.",
+    "HR": "You are an HR leader. Focus on people, skills, and learning paths."
+}
+
+SYSTEM_TEMPLATE = """
+{persona_prompt}
+
+Stable user facts (semantic memory):
+{semantic_context}
+
+Relevant past experiences (episodic memory):
+{episodic_context}
+"""
+
+PROMPT = ChatPromptTemplate.from_messages([
+    ("system", SYSTEM_TEMPLATE),
+    MessagesPlaceholder(variable_name="history"),
+    ("human", "{input}")
+])
+
+# A typical short gpt-4o-mini answer, so chat history grows realistically
+STUB_REPLY = (
+    "Here is a concise answer. The key idea is to start from your goal, pick the "
+    "simplest approach that meets it, and iterate. Let me know if you want an "
+    "example or more detail on any step."
+)
+
+
+# -----------------------------------------
+# EMBEDDINGS
+# -----------------------------------------
+
+class HashingEmbeddings(Embeddings):
+    """
+    Deterministic bag-of-words embeddings (unigrams + bigrams, hashing trick).
+    No network, no model download; good enough to compare strategies.
+
+    Feature weights come from the hash too: with plain +-1 counts short
+    memories often tie on distance, and Chroma then breaks the tie by
+    insertion order, which makes runs irreproducible.
+    """
+
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+
+    def _embed(self, text):
+        tokens = re.findall(r"\w+", text.lower())
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+        vector = np.zeros(self.dim, dtype="float32")
+        for feature in features:
+            h = zlib.crc32(feature.encode("utf-8"))
+            weight = 0.5 + ((h >> 17) & 0xFF) / 256
+            vector[h % self.dim] += weight if (h >> 16) & 1 else -weight
+
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+class DiskCachedEmbeddings(Embeddings):
+    """
+    Wraps real embeddings with a JSON disk cache keyed by model and text,
+    so repeated benchmark runs only pay for new texts.
+    """
+
+    def __init__(self, base, cache_path: str, model: str = EMBEDDING_MODEL):
+        self.base = base
+        self.cache_path = cache_path
+        self.model = model
+        self.cache = {}
+
+        if os.path.exists(cache_path):
+            with open(cache_path) as f:
+                self.cache = json.load(f)
+
+    def _key(self, text):
+        return hashlib.sha1(f"{self.model}|{text}".encode("utf-8")).hexdigest()
+
+    def embed_documents(self, texts):
+        missing = [t for t in dict.fromkeys(texts) if self._key(t) not in self.cache]
+
+        if missing:
+            for text, vector in zip(missing, self.base.embed_documents(missing)):
+                self.cache[self._key(text)] = vector
+            self.save()
+
+        return [self.cache[self._key(t)] for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    def save(self):
+        with open(self.cache_path, "w") as f:
+            json.dump(self.cache, f)
+
+
+def load_embeddings(kind: str):
+    if kind == "stub":
+        return HashingEmbeddings()
+
+    from dotenv import load_dotenv
+    from langchain_openai import OpenAIEmbeddings
+
+    load_dotenv()
+    return DiskCachedEmbeddings(OpenAIEmbeddings(model=EMBEDDING_MODEL), EMBEDDING_CACHE_PATH)
+
+
+# -----------------------------------------
+# TOKENS / STUB LLM
+# -----------------------------------------
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENCODING = None
+
+
+def count_tokens(text: str) -> int:
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return max(1, len(text) // 4)
+
+
+class StubLLM:
+    """Records every prompt it is sent and answers with STUB_REPLY."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, messages):
+        self.prompts.append(messages)
+        return AIMessage(content=STUB_REPLY)
+
+
+class WriteEverything:
+    """Memory-write 'policy' that keeps every user message as a fact (no filtering)."""
+
+    def classify_many(self, texts):
+        return [WriteDecision(label="fact", confidence=1.0) for _ in texts]
+
+
+# -----------------------------------------
+# DATA
+# -----------------------------------------
+
+def load_dialogues(path: str = DATASET_PATH):
+    with open(path) as f:
+        return json.load(f)["dialogues"]
+
+
+def is_recalled(messages, probe) -> bool:
+    """Evidence anywhere in the prompt except the question itself."""
+    context = get_buffer_string(messages[:-1]).lower()
+    return any(phrase.lower() in context for phrase in probe["evidence"])
+
+
+# -----------------------------------------
+# BENCHMARK
+# -----------------------------------------
+
+def build_memory(strategy, embeddings, persist_directory, max_per_user):
+    semantic = UserMemoryStore(
+        "semantic_memory", embeddings, os.path.join(persist_directory, "semantic"),
+        max_per_user=max_per_user
+    )
+    episodic = UserMemoryStore(
+        "episodic_memory", embeddings, os.path.join(persist_directory, "episodic"),
+        max_per_user=max_per_user, persona_scoped=True
+    )
+
+    if strategy == "none":
+        writer = None
+    elif strategy == "all":
+        writer = MemoryWriter(WriteEverything(), routes={"fact": semantic}, debounce=0.05)
+    else:
+        writer = MemoryWriter(
+            MemoryWritePolicy(embeddings),
+            routes={"fact": semantic, "episode": episodic},
+            templates={"episode": "User experienced confusion or correction: {text}"},
+            debounce=0.05
+        )
+    return semantic, episodic, writer
+
+
+def run_strategy(strategy, dialogues, base_embeddings, k, similarity, max_per_user=200):
+    embeddings = CachedEmbeddings(base_embeddings)
+    llm = StubLLM()
+
+    probes = recalled = 0
+    prompt_tokens, memory_tokens, latencies = [], [], []
+    stored_after_session = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        semantic, episodic, writer = build_memory(strategy, embeddings, tmp, max_per_user)
+        embeddings.calls = 0               # exclude the one-off classifier set-up
+
+        sessions = max(len(d["sessions"]) for d in dialogues)
+        for s in range(sessions):
+            for dialogue in dialogues:
+                if s >= len(dialogue["sessions"]):
+                    continue
+                user_id, persona = dialogue["user_id"], dialogue["persona"]
+                session = dialogue["sessions"][s]
+                history = ChatMessageHistory()
+
+                turns = [(t, None) for t in session.get("turns", [])]
+                turns += [(p["question"], p) for p in session.get("probes", [])]
+
+                for text, probe in turns:
+                    if writer is not None:
+                        writer.submit(text, user_id, persona)
+
+                    context = {"semantic": "None", "episodic": "None"}
+                    if strategy != "none":
+                        retriever = MemoryRetriever(
+                            embeddings,
+                            {
+                                "semantic": semantic.scope(user_id, persona),
+                                "episodic": episodic.scope(user_id, persona)
+                            },
+                            k=k
+                        )
+                        start = time.perf_counter()
+                        context = retriever.retrieve(text)
+                        latencies.append((time.perf_counter() - start) * 1000)
+
+                    messages = PROMPT.format_messages(
+                        persona_prompt=PERSONA_PROMPTS[persona],
+                        semantic_context=context["semantic"],
+                        episodic_context=context["episodic"],
+                        history=history.messages,
+                        input=text
+                    )
+                    reply = llm.invoke(messages)
+                    history.add_messages([HumanMessage(content=text), reply])
+
+                    prompt_tokens.append(count_tokens(get_buffer_string(messages)))
+                    memory_tokens.append(sum(
+                        count_tokens(c) for c in context.values() if c != "None"
+                    ))
+
+                    if probe is not None:
+                        probes += 1
+                        recalled += is_recalled(messages, probe)
+
+            # Between sessions: pending writes land, then the background job runs
+            if writer is not None:
+                writer.flush()
+            if strategy.endswith("+consolidate"):
+                MemoryConsolidator(semantic, similarity=similarity).run()
+                MemoryConsolidator(episodic, similarity=similarity).run()
+
+            stored_after_session.append(sum(
+                store.count(d["user_id"]) for store in (semantic, episodic) for d in dialogues
+            ))
+
+    return {
+        "strategy": strategy,
+        "k": k,
+        "probes": probes,
+        "recall": round(recalled / probes, 3) if probes else 0.0,
+        "stored": "/".join(str(n) for n in stored_after_session),
+        "written": writer.written if writer is not None else 0,
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2) if latencies else 0.0,
+        "p95_ms": round(float(np.percentile(latencies, 95)), 2) if latencies else 0.0,
+        "prompt_tok": round(float(np.mean(prompt_tokens)), 1),
+        "prompt_p95": round(float(np.percentile(prompt_tokens, 95)), 1),
+        "memory_tok": round(float(np.mean(memory_tokens)), 1),
+        "embed_calls": embeddings.calls,
+    }
+
+
+def print_table(rows):
+    columns = list(rows[0].keys())
+    widths = [max(len(c), *(len(str(r[c])) for r in rows)) for c in columns]
+
+    print("  ".join(c.rjust(w) for c, w in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(str(row[c]).rjust(w) for c, w in zip(columns, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline long-term memory benchmark")
+    parser.add_argument("--strategies", nargs="+", choices=STRATEGIES, default=STRATEGIES)
+    parser.add_argument("--k", type=int, nargs="+", default=[3])
+    parser.add_argument("--similarity", type=float, default=0.92,
+                        help="consolidation merge threshold (cosine)")
+    parser.add_argument("--embeddings", choices=["stub", "cached"], default="stub")
+    parser.add_argument("--dataset", default=DATASET_PATH)
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    embeddings = load_embeddings(args.embeddings)
+    dialogues = load_dialogues(args.dataset)
+
+    sessions = sum(len(d["sessions"]) for d in dialogues)
+    print(f"Loaded {len(dialogues)} users, {sessions} sessions\n")
+
+    rows = []
+    for strategy in args.strategies:
+        for k in args.k:
+            rows.append(run_strategy(strategy, dialogues, embeddings, k, args.similarity))
+
+    print_table(rows)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# =====================================================
+# MEMORY CONSOLIDATION
+# Merge near-duplicate memories, expire stale episodes
+# =====================================================
+#
+# Run in the background by the apps (ConsolidationJob), or by hand:
+#     python memory_consolidation.py
+
+import time
+import datetime
+import threading
+
+import numpy as np
+
+from user_memory import UserMemoryStore, collection_name, memory_weight
+
+
+class MemoryConsolidator:
+    """
+    Consolidates one UserMemoryStore, user by user.
+
+    Memories whose embeddings have cosine similarity >= `similarity` are
+    clustered and replaced by one canonical memory: the most recent wording,
+    with `mentions` summed, `first_seen` kept and `timestamp` = last seen.
+    The stored embedding is reused, so consolidation makes no embedding calls.
+
+    expire_after_days drops memories not seen for that long (episodic).
+    """
+
+    def __init__(self, store: UserMemoryStore, similarity: float = 0.92,
+                 expire_after_days: float = None):
+        self.store = store
+        self.similarity = similarity
+        self.expire_after_days = expire_after_days
+
+    def consolidate_user(self, user_id: str) -> dict:
+        self.store.collection(user_id)
+        collection = self.store.client.get_collection(collection_name(self.store.base_name, user_id))
+        records = collection.get(include=["embeddings", "documents", "metadatas"])
+
+        ids = records["ids"]
+        stats = {"before": len(ids), "merged": 0, "expired": 0}
+        if not ids:
+            stats["after"] = 0
+            return stats
+
+        now = datetime.datetime.utcnow()
+        metadatas = [m or {} for m in records["metadatas"]]
+
+        # -------------------------------
+        # Expire stale memories
+        # -------------------------------
+        keep = list(range(len(ids)))
+        if self.expire_after_days is not None:
+            cutoff = (now - datetime.timedelta(days=self.expire_after_days)).isoformat()
+            expired = {i for i in keep if metadatas[i].get("timestamp", "") < cutoff}
+            if expired:
+                collection.delete(ids=[ids[i] for i in expired])
+                stats["expired"] = len(expired)
+            keep = [i for i in keep if i not in expired]
+
+        # -------------------------------
+        # Cluster near-duplicates (newest first)
+        # -------------------------------
+        vectors = np.asarray(records["embeddings"], dtype="float32")
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+
+        keep.sort(key=lambda i: metadatas[i].get("timestamp", ""), reverse=True)
+        clusters = []                      # [(representative index, [member indices])]
+        for i in keep:
+            for rep, members in clusters:
+                same_scope = (
+                    not self.store.persona_scoped
+                    or metadatas[rep].get("persona") == metadatas[i].get("persona")
+                )
+                if same_scope and float(vectors[rep] @ vectors[i]) >= self.similarity:
+                    members.append(i)
+                    break
+            else:
+                clusters.append((i, [i]))
+
+        # -------------------------------
+        # Replace each duplicate cluster with one canonical memory
+        # -------------------------------
+        for rep, members in clusters:
+            if len(members) == 1:
+                continue
+
+            merged = dict(metadatas[rep])
+            merged["mentions"] = sum(int(metadatas[i].get("mentions", 1)) for i in members)
+            merged["first_seen"] = min(
+                metadatas[i].get("first_seen", metadatas[i].get("timestamp", "")) for i in members
+            )
+            merged["weight"] = round(memory_weight(merged, now), 4)
+
+            collection.delete(ids=[ids[i] for i in members])
+            collection.add(
+                ids=[ids[rep]],
+                embeddings=[records["embeddings"][rep]],
+                documents=[records["documents"][rep]],
+                metadatas=[merged],
+            )
+            stats["merged"] += len(members) - 1
+
+        stats["after"] = stats["before"] - stats["merged"] - stats["expired"]
+        return stats
+
+    def run(self) -> dict:
+        """Consolidates every user; returns {user_id: stats}."""
+        return {user_id: self.consolidate_user(user_id) for user_id in self.store.users()}
+
+
+class ConsolidationJob:
+    """Runs a set of consolidators every `interval` seconds on a daemon thread."""
+
+    def __init__(self, consolidators: list, interval: float = 600):
+        self.consolidators = consolidators
+        self.interval = interval
+        self.runs = 0
+        self.last_stats = {}
+        self.last_error = ""
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="memory-consolidation", daemon=True)
+
+    def start(self) -> "ConsolidationJob":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def run_once(self) -> dict:
+        stats = {}
+        for consolidator in self.consolidators:
+            stats[consolidator.store.base_name] = consolidator.run()
+        self.runs += 1
+        self.last_stats = stats
+        return stats
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                self.last_error = repr(e)
+            self._stop.wait(self.interval)
+
+
+if __name__ == "__main__":
+    import os
+    from dotenv import load_dotenv
+    from langchain_openai import OpenAIEmbeddings
+
+    load_dotenv(override=True)
+    embeddings = OpenAIEmbeddings(api_key=os.getenv("OPENAI_API_KEY"))
+
+    job = ConsolidationJob([
+        MemoryConsolidator(UserMemoryStore("semantic_memory", embeddings, "./semantic_store")),
+        MemoryConsolidator(UserMemoryStore("episodic_memory", embeddings, "./episodic_store", persona_scoped=True),
+                           expire_after_days=30),
+        MemoryConsolidator(UserMemoryStore("long_term_memory", embeddings, "./ltm_store")),
+    ])
+
+    start = time.perf_counter()
+    for store, users in job.run_once().items():
+        for user_id, s in users.items():
+            print(f"{store:<18} {user_id:<16} {s['before']:>4} -> {s['after']:>4} "
+                  f"(merged {s['merged']}, expired {s['expired']})")
+    print(f"Done in {time.perf_counter() - start:.2f}s")
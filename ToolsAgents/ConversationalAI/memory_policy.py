@@ -0,0 +1,259 @@
+# =====================================================
+# MEMORY-WRITE POLICY
+# Decide what goes into long-term memory, write it off the turn
+# =====================================================
+#
+# fact     stable information about the user  -> semantic / long-term memory
+# episode  confusion, corrections, references -> episodic memory
+# ignore   everything else (questions, small talk)
+
+import re
+import time
+import queue
+import threading
+from dataclasses import dataclass, field
+
+import numpy as np
+
+LABELS = ["fact", "episode", "ignore"]
+
+# -------------------------------
+# Labelled exemplars
+# -------------------------------
+EXEMPLARS = {
+    "fact": [
+        "I am a data engineer",
+        "I work as a product manager at a bank",
+        "My name is Priya",
+        "My role is head of HR for the APAC region",
+        "I manage a team of twelve developers",
+        "I want to learn Kubernetes this year",
+        "My goal is to move into machine learning",
+        "I've been a Java developer for eight years",
+        "I lead the analytics team",
+        "I prefer short answers with code examples",
+        "We use AWS and Terraform at my company",
+        "I'm responsible for the hiring budget",
+        "I'm based in Bangalore",
+        "English is my second language, please keep it simple",
+    ],
+    "episode": [
+        "I am confused by that explanation",
+        "I don't understand what you mean by sharding",
+        "This is unclear, can you explain it differently",
+        "Earlier you said Kafka was a database",
+        "Last time you recommended a different course",
+        "That's not what I asked",
+        "That answer was wrong, the API changed",
+        "You already told me that",
+        "This doesn't make sense to me",
+        "I tried what you suggested and it failed",
+        "That example really helped, thanks",
+        "Can you go back to what we discussed before",
+    ],
+    "ignore": [
+        "What is a vector database?",
+        "How does gradient descent work?",
+        "Explain the difference between REST and GraphQL",
+        "Hi there",
+        "Thanks!",
+        "ok",
+        "Can you give me an example?",
+        "Write a SQL query to find duplicates",
+        "What are the benefits of microservices?",
+        "Summarize that in three bullet points",
+        "Tell me more",
+        "What should a manager know about agile?",
+    ],
+}
+
+# -------------------------------
+# Regex features
+# -------------------------------
+PATTERNS = {
+    "fact": [
+        r"\b(i am|i'm|im) (a|an|the|currently|now)\b",
+        r"\bmy (name|role|job|title|goal|team|company|background|manager)\b",
+        r"\bi (work|worked|live|manage|lead|run|own|prefer|use|teach|study)\b",
+        r"\bi (want|plan|hope|need) to (learn|become|move|get into|switch)\b",
+        r"\bi('ve| have) been\b",
+        r"\bwe (use|run|build)\b",
+    ],
+    "episode": [
+        r"\b(confus|unclear|lost me)\w*",
+        r"\b(don't|do not|didn't) (understand|get it|follow)\b",
+        r"\b(doesn't|does not|didn't) (make sense|work)\b",
+        r"\b(earlier|before|last time|previously) (you|we)\b",
+        r"\byou (said|told|mentioned|recommended)\b",
+        r"\b(that's|that is|this is) (wrong|incorrect|not what)\b",
+    ],
+    "ignore": [
+        r"^\s*(hi|hello|hey|thanks|thank you|ok|okay|cool|great|sure)\b[\s!.]*$",
+        r"^\s*(what|how|why|when|which|explain|describe|write|give|show|summari[sz]e)\b",
+        r"\?\s*$",
+    ],
+}
+
+COMPILED = {label: [re.compile(p, re.IGNORECASE) for p in patterns] for label, patterns in PATTERNS.items()}
+
+
+def regex_features(text: str) -> np.ndarray:
+    """Number of matching patterns per label, in LABELS order."""
+    return np.array([sum(bool(p.search(text)) for p in COMPILED[label]) for label in LABELS], dtype="float32")
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+@dataclass
+class WriteDecision:
+    label: str
+    confidence: float
+    scores: dict = field(default_factory=dict)
+
+
+# -------------------------------
+# Classifier
+# -------------------------------
+class MemoryWritePolicy:
+    """
+    Scores an utterance as fact / episode / ignore.
+
+    logits = temperature * cosine(utterance, label centroid) + regex_weight * pattern hits
+
+    Centroids are the mean embedding of each label's exemplars, computed once
+    (one embedding call). With the app's CachedEmbeddings the utterance vector
+    is the one already computed for memory retrieval, so scoring is a handful
+    of dot products. Below `threshold` the utterance is ignored.
+    """
+
+    def __init__(self, embeddings, exemplars: dict = None, threshold: float = 0.5,
+                 temperature: float = 10.0, regex_weight: float = 1.5):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.temperature = temperature
+        self.regex_weight = regex_weight
+
+        exemplars = exemplars or EXEMPLARS
+        texts = [t for label in LABELS for t in exemplars[label]]
+        vectors = _normalize(np.asarray(embeddings.embed_documents(texts), dtype="float32"))
+
+        centroids, start = [], 0
+        for label in LABELS:
+            n = len(exemplars[label])
+            centroids.append(vectors[start:start + n].mean(axis=0))
+            start += n
+        self.centroids = _normalize(np.vstack(centroids))
+
+    def classify_many(self, texts: list) -> list:
+        vectors = _normalize(np.asarray(self.embeddings.embed_documents(texts), dtype="float32"))
+        features = np.vstack([regex_features(t) for t in texts])
+
+        logits = self.temperature * (vectors @ self.centroids.T) + self.regex_weight * features
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+
+        decisions = []
+        for row in probs:
+            best = int(row.argmax())
+            label = LABELS[best] if row[best] >= self.threshold else "ignore"
+            decisions.append(WriteDecision(
+                label=label,
+                confidence=float(row[best]),
+                scores={l: round(float(p), 3) for l, p in zip(LABELS, row)}
+            ))
+        return decisions
+
+    def classify(self, text: str) -> WriteDecision:
+        return self.classify_many([text])[0]
+
+
+# -------------------------------
+# Async writer
+# -------------------------------
+class MemoryWriter:
+    """
+    Classifies and writes memories on a background thread.
+
+    submit() only enqueues, so a turn never waits on classification or on
+    the vector store. The writer waits until no new utterance has arrived
+    for `debounce` seconds (or `max_batch` are queued), classifies the batch
+    in one call, drops repeats within the batch, and writes each
+    (store, user, persona) group with one add_many call.
+
+    routes maps a label to its store; templates optionally reformat the text
+    per label (e.g. "User experienced confusion: {text}").
+    """
+
+    def __init__(self, policy: MemoryWritePolicy, routes: dict, templates: dict = None,
+                 debounce: float = 1.0, max_batch: int = 32):
+        self.policy = policy
+        self.routes = routes
+        self.templates = templates or {}
+        self.debounce = debounce
+        self.max_batch = max_batch
+
+        self.counts = {label: 0 for label in LABELS}
+        self.written = 0
+        self.batches = 0
+        self.last_error = ""
+
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name="memory-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str, user_id: str, persona: str):
+        self._queue.put((text, user_id, persona))
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get(timeout=self.debounce))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            try:
+                self._write(batch)
+            except Exception as e:
+                self.last_error = repr(e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch: list):
+        decisions = self.policy.classify_many([text for text, _, _ in batch])
+
+        groups = {}
+        for (text, user_id, persona), decision in zip(batch, decisions):
+            self.counts[decision.label] += 1
+            store = self.routes.get(decision.label)
+            if store is None:
+                continue
+            template = self.templates.get(decision.label, "{text}")
+            texts = groups.setdefault((decision.label, user_id, persona), [])
+            memory = template.format(text=text)
+            if memory not in texts:
+                texts.append(memory)
+
+        for (label, user_id, persona), texts in groups.items():
+            self.routes[label].add_many(user_id, texts, persona, type=label)
+            self.written += len(texts)
+        self.batches += 1
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+        return not self._queue.unfinished_tasks
+
+    def stats(self) -> dict:
+        return {**self.counts, "written": self.written, "batches": self.batches,
+                "pending": self._queue.unfinished_tasks}
@@ -0,0 +1,113 @@
+# =====================================================
+# MEMORY RETRIEVAL ENGINE
+# One query embedding, concurrent semantic + episodic search
+# =====================================================
+
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.embeddings import Embeddings
+
+
+# -------------------------------
+# Embedding cache
+# -------------------------------
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an Embeddings model with a small LRU cache keyed on the text.
+
+    Give this to every Chroma store: a user message is then embedded once per
+    turn, whether it is searched for or stored as a memory.
+    """
+
+    def __init__(self, embeddings: Embeddings, max_entries: int = 256):
+        self.embeddings = embeddings
+        self.max_entries = max_entries
+        self.cache = OrderedDict()
+        self.calls = 0
+        self.hits = 0
+        self._lock = threading.Lock()
+
+    def _get(self, text: str):
+        with self._lock:
+            vector = self.cache.get(text)
+            if vector is not None:
+                self.cache.move_to_end(text)
+                self.hits += 1
+            return vector
+
+    def _put(self, text: str, vector):
+        with self._lock:
+            self.cache[text] = vector
+            self.cache.move_to_end(text)
+            while len(self.cache) > self.max_entries:
+                self.cache.popitem(last=False)
+
+    def embed_query(self, text: str):
+        vector = self._get(text)
+        if vector is None:
+            self.calls += 1
+            vector = self.embeddings.embed_query(text)
+            self._put(text, vector)
+        return vector
+
+    def embed_documents(self, texts):
+        vectors = [self._get(t) for t in texts]
+        missing = [t for t, v in zip(texts, vectors) if v is None]
+        if missing:
+            self.calls += 1
+            fresh = dict(zip(missing, self.embeddings.embed_documents(missing)))
+            for text, vector in fresh.items():
+                self._put(text, vector)
+            vectors = [v if v is not None else fresh[t] for t, v in zip(texts, vectors)]
+        return vectors
+
+
+# -------------------------------
+# Retriever
+# -------------------------------
+class MemoryRetriever:
+    """
+    Searches several vector stores for one query.
+
+    The query is embedded once and every store is searched concurrently
+    with similarity_search_by_vector, so a turn costs one embedding call
+    and the slowest search instead of one embedding + one search per store.
+    """
+
+    def __init__(self, embeddings: Embeddings, stores: dict, k: int = 3):
+        self.embeddings = embeddings
+        self.stores = stores
+        self.k = k
+        self.last_timing = {}
+
+    def search(self, query: str, k: int = None) -> dict:
+        """Returns {store name: [Document, ...]}."""
+        k = k or self.k
+
+        start = time.perf_counter()
+        vector = self.embeddings.embed_query(query)
+        embedded = time.perf_counter()
+
+        # Short-lived pool: Streamlit re-creates this object on every rerun
+        with ThreadPoolExecutor(max_workers=len(self.stores)) as pool:
+            futures = {
+                name: pool.submit(store.similarity_search_by_vector, vector, k=k)
+                for name, store in self.stores.items()
+            }
+            results = {name: future.result() for name, future in futures.items()}
+
+        self.last_timing = {
+            "embed_ms": (embedded - start) * 1000,
+            "search_ms": (time.perf_counter() - embedded) * 1000,
+        }
+        return results
+
+    def retrieve(self, query: str, k: int = None) -> dict:
+        """Returns {store name: context string}, "None" for an empty store."""
+        return {
+            name: "\n".join(d.page_content for d in docs) if docs else "None"
+            for name, docs in self.search(query, k).items()
+        }
@@ -0,0 +1,170 @@
+# =====================================================
+# ROLLING SUMMARY MEMORY
+# Recent turns verbatim + a running summary, within a token budget
+# =====================================================
+#
+# Drop-in replacement for ChatMessageHistory in RunnableWithMessageHistory:
+#
+#     "memory": RollingSummaryHistory(llm, max_tokens=HISTORY_TOKEN_BUDGET)
+#
+# Short-term memory budget: recent turns verbatim + a rolling summary of
+# older ones. Turns that no longer fit are folded into the summary by a
+# background thread, after the answer has been produced. Until that
+# finishes they are still sent verbatim, so nothing is lost meanwhile.
+# If summarizing keeps failing, the oldest of those turns are dropped
+# rather than letting the prompt grow (see `dropped` / `last_error`).
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import SystemMessage, get_buffer_string
+
+SUMMARY_PROMPT = """Progressively summarize the conversation below, adding onto the current summary.
+Keep facts about the user, decisions, open questions and anything the assistant promised.
+Stay under {max_words} words.
+
+Current summary:
+{summary}
+
+New lines of conversation:
+{new_lines}
+
+New summary:"""
+
+HISTORY_TOKEN_BUDGET = 1500
+
+# Shared by every session: summaries are short, infrequent LLM calls
+_SUMMARIZER = ThreadPoolExecutor(max_workers=2, thread_name_prefix="summarizer")
+
+
+class RollingSummaryHistory(BaseChatMessageHistory):
+    """
+    Short-term memory bounded by `max_tokens`.
+
+    `summary_tokens` of the budget are reserved for the summary; the rest
+    holds the most recent messages verbatim (at least `min_recent`).
+    Evicted messages waiting for the summary are capped at
+    `max_pending_tokens` (default: the verbatim budget), so prompt size
+    stays bounded however long the conversation runs, even when the
+    summarizer fails.
+    """
+
+    def __init__(self, llm, max_tokens: int = HISTORY_TOKEN_BUDGET, summary_tokens: int = 300,
+                 min_recent: int = 4, max_pending_tokens: int = None):
+        self.llm = llm
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.min_recent = min_recent
+        self.max_pending_tokens = max_pending_tokens or self.recent_budget
+
+        self.summary = ""
+        self.recent = []                  # [(message, tokens)]
+        self.pending = []                 # evicted, not yet in the summary
+        self.summarizations = 0
+        self.dropped = 0                  # evicted messages lost without being summarized
+        self.last_error = ""              # last summarizer failure, "" once it recovers
+
+        self._lock = threading.Lock()
+        self._future = None
+        self._generation = 0              # bumped by clear(); stale summaries are dropped
+
+    # -------------------------------
+    # Token accounting
+    # -------------------------------
+    def count_tokens(self, text: str) -> int:
+        try:
+            return self.llm.get_num_tokens(text)
+        except Exception:
+            return max(1, len(text) // 4)
+
+    @property
+    def recent_budget(self) -> int:
+        return self.max_tokens - self.summary_tokens
+
+    @property
+    def tokens(self) -> int:
+        with self._lock:
+            return (
+                self.count_tokens(self.summary) if self.summary else 0
+            ) + sum(t for _, t in self.pending) + sum(t for _, t in self.recent)
+
+    # -------------------------------
+    # BaseChatMessageHistory
+    # -------------------------------
+    @property
+    def messages(self):
+        with self._lock:
+            head = [SystemMessage(content=f"Summary of the earlier conversation:\n{self.summary}")] if self.summary else []
+            return head + [m for m, _ in self.pending] + [m for m, _ in self.recent]
+
+    def add_messages(self, messages):
+        with self._lock:
+            self.recent.extend((m, self.count_tokens(m.content)) for m in messages)
+            self._evict()
+        self._schedule()
+
+    def clear(self):
+        with self._lock:
+            self.summary = ""
+            self.recent = []
+            self.pending = []
+            self._generation += 1
+
+    # -------------------------------
+    # Window + summary
+    # -------------------------------
+    def _evict(self):
+        """Moves the oldest messages out of the window once it is over budget."""
+        while len(self.recent) > self.min_recent and sum(t for _, t in self.recent) > self.recent_budget:
+            self.pending.append(self.recent.pop(0))
+
+        # Summaries not keeping up (or failing): drop the oldest unsummarized turns
+        while self.pending and sum(t for _, t in self.pending) > self.max_pending_tokens:
+            self.pending.pop(0)
+            self.dropped += 1
+
+    def _schedule(self):
+        with self._lock:
+            if self.pending and (self._future is None or self._future.done()):
+                self._future = _SUMMARIZER.submit(self._refresh)
+
+    def _refresh(self):
+        with self._lock:
+            batch = list(self.pending)
+            summary = self.summary
+            generation = self._generation
+
+        prompt = SUMMARY_PROMPT.format(
+            max_words=int(self.summary_tokens * 0.75),
+            summary=summary or "(none yet)",
+            new_lines=get_buffer_string([m for m, _ in batch])
+        )
+        try:
+            new_summary = self.llm.invoke(prompt).content.strip()
+        except Exception as e:
+            self.last_error = repr(e)     # keep the turns in `pending`; retried on the next turn
+            return
+
+        with self._lock:
+            self._future = None
+            if generation != self._generation:
+                return
+            self.summary = new_summary
+            # By identity: the oldest pending turns may have been dropped meanwhile
+            summarized = {id(m) for m, _ in batch}
+            self.pending = [p for p in self.pending if id(p[0]) not in summarized]
+            self.summarizations += 1
+            self.last_error = ""
+
+        # Turns evicted while this summary was being written
+        self._schedule()
+
+    def wait(self, timeout: float = None):
+        """Blocks until the background summary (if any) is done. For scripts and tests."""
+        future = self._future
+        while future is not None:
+            future.result(timeout)
+            if future is self._future:
+                break
+            future = self._future
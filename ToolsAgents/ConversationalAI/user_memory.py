@@ -0,0 +1,171 @@
+# =====================================================
+# USER-SCOPED LONG-TERM MEMORY
+# One Chroma collection per user, persona metadata, size caps
+# =====================================================
+
+import re
+import hashlib
+import datetime
+
+import chromadb
+from langchain_community.vectorstores import Chroma
+
+
+def collection_name(base: str, user_id: str) -> str:
+    """
+    Chroma collection names allow 3-63 chars of [a-zA-Z0-9._-]; the hash
+    keeps two user ids that slugify the same apart.
+    """
+    slug = re.sub(r"[^a-zA-Z0-9]+", "-", user_id.lower()).strip("-")[:24] or "user"
+    digest = hashlib.sha1(user_id.encode("utf-8")).hexdigest()[:8]
+    return f"{base}_{slug}_{digest}"
+
+
+def memory_weight(metadata: dict, now: datetime.datetime = None, half_life_days: float = 30.0) -> float:
+    """Mentions, halved for every `half_life_days` since the memory was last seen."""
+    now = now or datetime.datetime.utcnow()
+    try:
+        last_seen = datetime.datetime.fromisoformat(metadata.get("timestamp", ""))
+        age_days = max((now - last_seen).total_seconds() / 86400, 0.0)
+    except ValueError:
+        age_days = 0.0
+    return int(metadata.get("mentions", 1)) * 0.5 ** (age_days / half_life_days)
+
+
+class UserMemoryStore:
+    """
+    Long-term memory partitioned by user.
+
+    Every user gets their own collection, so a search only ever touches
+    that user's vectors: no facts leak between users, and lookup cost
+    grows with one user's memory rather than everyone's.
+
+    persona_scoped=True additionally filters searches to the active
+    persona (metadata filter inside the user's collection).
+    max_per_user caps each collection; memories with the lowest weight
+    (mentions decayed by age, see memory_weight) are dropped first.
+
+    The single shared collection used before partitioning (named
+    `base_name`) is no longer read or written. Its records carry no user
+    id, so they cannot be moved to their owners; see drop_unpartitioned.
+    """
+
+    def __init__(self, base_name: str, embeddings, persist_directory: str,
+                 max_per_user: int = 200, persona_scoped: bool = False):
+        self.base_name = base_name
+        self.embeddings = embeddings
+        self.client = chromadb.PersistentClient(path=persist_directory)
+        self.max_per_user = max_per_user
+        self.persona_scoped = persona_scoped
+        self._collections = {}
+
+    # -------------------------------
+    # Partitions
+    # -------------------------------
+    def collection(self, user_id: str) -> Chroma:
+        if user_id not in self._collections:
+            self._collections[user_id] = Chroma(
+                client=self.client,
+                collection_name=collection_name(self.base_name, user_id),
+                embedding_function=self.embeddings,
+                collection_metadata={"user_id": user_id, "store": self.base_name},
+            )
+        return self._collections[user_id]
+
+    def users(self) -> list:
+        """User ids that have a collection in this store."""
+        users = []
+        for c in self.client.list_collections():
+            c = self.client.get_collection(c) if isinstance(c, str) else c
+            metadata = c.metadata or {}
+            if metadata.get("store") == self.base_name and "user_id" in metadata:
+                users.append(metadata["user_id"])
+        return users
+
+    def drop_unpartitioned(self) -> int:
+        """
+        Deletes the pre-partitioning shared collection, if it exists, and
+        returns how many memories it held. Never called automatically.
+        """
+        try:
+            legacy = self.client.get_collection(self.base_name)
+        except Exception:
+            return 0
+        count = legacy.count()
+        self.client.delete_collection(self.base_name)
+        return count
+
+    def count(self, user_id: str) -> int:
+        self.collection(user_id)
+        return self.client.get_collection(collection_name(self.base_name, user_id)).count()
+
+    # -------------------------------
+    # Write
+    # -------------------------------
+    def add(self, user_id: str, text: str, persona: str, **metadata):
+        self.add_many(user_id, [text], persona, **metadata)
+
+    def add_many(self, user_id: str, texts: list, persona: str, **metadata):
+        """One add_texts call (one embedding request) for a batch of memories."""
+        now = datetime.datetime.utcnow().isoformat()
+        self.collection(user_id).add_texts(
+            texts=texts,
+            metadatas=[{
+                "user_id": user_id,
+                "persona": persona or "none",
+                "timestamp": now,
+                "first_seen": now,
+                "mentions": 1,
+                **metadata
+            } for _ in texts]
+        )
+        self._enforce_cap(user_id)
+
+    def _enforce_cap(self, user_id: str):
+        store = self.collection(user_id)
+        overflow = self.count(user_id) - self.max_per_user
+        if overflow <= 0:
+            return
+
+        records = store.get(include=["metadatas"])
+        now = datetime.datetime.utcnow()
+        weakest = sorted(
+            zip(records["ids"], records["metadatas"]),
+            key=lambda r: (memory_weight(r[1] or {}, now), (r[1] or {}).get("timestamp", ""))
+        )[:overflow]
+        store.delete(ids=[record_id for record_id, _ in weakest])
+
+    # -------------------------------
+    # Search
+    # -------------------------------
+    def _filter(self, persona):
+        if self.persona_scoped and persona:
+            return {"persona": persona}
+        return None
+
+    def similarity_search(self, user_id: str, query: str, k: int = 3, persona: str = None):
+        return self.collection(user_id).similarity_search(query, k=k, filter=self._filter(persona))
+
+    def similarity_search_by_vector(self, user_id: str, vector, k: int = 3, persona: str = None):
+        return self.collection(user_id).similarity_search_by_vector(vector, k=k, filter=self._filter(persona))
+
+    def scope(self, user_id: str, persona: str = None) -> "ScopedMemory":
+        return ScopedMemory(self, user_id, persona)
+
+
+class ScopedMemory:
+    """A UserMemoryStore bound to one user + persona (vector-store-like view)."""
+
+    def __init__(self, store: UserMemoryStore, user_id: str, persona: str = None):
+        self.store = store
+        self.user_id = user_id
+        self.persona = persona
+
+    def similarity_search(self, query: str, k: int = 3):
+        return self.store.similarity_search(self.user_id, query, k=k, persona=self.persona)
+
+    def similarity_search_by_vector(self, vector, k: int = 3):
+        return self.store.similarity_search_by_vector(self.user_id, vector, k=k, persona=self.persona)
+
+    def add(self, text: str, **metadata):
+        self.store.add(self.user_id, text, self.persona, **metadata)
@@ -67,14 +67,19 @@
 # })
 
 
+import os
+
 import streamlit as st
 
 from policy import ResponsePolicy
 from rl_state import RLState
 from prompt import build_prompt
 from llm import llm, evaluator_llm
-from feedback_interpreter import interpret_feedback
+from feedback_interpreter import interpret_feedback, heuristic_interpretation
+from feedback_log import FeedbackLog
 from policy_adapter import apply_policy_update
+from bandit import ContextualBandit, action_index
+from offline_trainer import POLICY_PATH
 
 # ------------------------------------------------
 # Page setup
@@ -86,6 +91,27 @@ st.caption(
     "Explicit RL loop: Action → Reward → Learning → Next Action"
 )
 
+# ------------------------------------------------
+# Learner (shared by every session)
+# ------------------------------------------------
+# A contextual bandit over verbosity × tone: feedback from all users and
+# sessions accumulates in one model, so the policy converges instead of
+# flipping on each message. Starts from the offline-trained policy
+# (offline_trainer.py) when one has been saved.
+@st.cache_resource
+def get_learner():
+    if os.path.exists(POLICY_PATH):
+        return ContextualBandit.load(POLICY_PATH)
+    return ContextualBandit(method="thompson")
+
+# Every feedback event is logged for offline replay training
+@st.cache_resource
+def get_feedback_log():
+    return FeedbackLog()
+
+learner = get_learner()
+feedback_log = get_feedback_log()
+
 # ------------------------------------------------
 # Session state
 # ------------------------------------------------
@@ -111,6 +137,7 @@ st.json(st.session_state.policy.as_dict())
 # User question
 # ------------------------------------------------
 st.subheader("💬 Environment Input (User Question)")
+user_id = st.text_input("User ID", "guest").strip() or "guest"
 user_query = st.text_input(
     "Enter your question",
     "Explain Reinforcement Learning"
@@ -122,6 +149,14 @@ user_query = st.text_input(
 st.subheader("▶️ Action: Run Agent")
 
 if st.button("Run Agent"):
+    # Policy selects the action for this context (user + question)
+    action, context = learner.select(user_id, user_query)
+    st.session_state.policy.update(action)
+    st.session_state.rl_state.last_context = context
+    st.session_state.rl_state.last_propensity = float(
+        learner.action_probabilities(context)[0, action_index(action)]
+    )
+
     prompt = build_prompt(st.session_state.policy)
     chain = prompt | llm
 
@@ -160,7 +195,12 @@ feedback = st.text_area(
 # LEARNING STEP
 # ------------------------------------------------
 if st.button("Submit Feedback"):
-    interpretation = interpret_feedback(feedback, evaluator_llm)
+    # Clear-cut feedback is scored locally; only ambiguous text goes to the LLM
+    interpretation = heuristic_interpretation(feedback)
+    source = "heuristic"
+    if interpretation is None:
+        interpretation = interpret_feedback(feedback, evaluator_llm)
+        source = "llm"
 
     #reward = interpretation.get("reward", 0)
     reward = interpretation["reward"]
@@ -185,14 +225,38 @@ if st.button("Submit Feedback"):
         "dimensions": interpretation.get("dimensions", {})
     })
     # ---- LEARNING (policy update) ----
-    apply_policy_update(st.session_state.policy, interpretation)
+    # Credit the action that produced the response on screen: the policy
+    # may already hold the next action if feedback is submitted twice
+    action_taken = st.session_state.rl_state.last_action or st.session_state.policy.as_dict()
+    context = st.session_state.rl_state.last_context
+    if context is None:
+        context = learner.encoder.encode(user_id, user_query)
+
+    apply_policy_update(
+        st.session_state.policy,
+        interpretation,
+        learner=learner,
+        context=context,
+        action=action_taken
+    )
 
     # ---- STATE TRANSITION ----
     st.session_state.rl_state.update(
-        action=st.session_state.policy.as_dict(),
+        action=action_taken,
         reward=reward
     )
 
+    feedback_log.append({
+        "user_id": user_id,
+        "query": user_query,
+        "action": action_taken,
+        "propensity": st.session_state.rl_state.last_propensity,
+        "feedback": feedback,
+        "reward": reward,
+        "dimensions": interpretation.get("dimensions", {}),
+        "source": source
+    })
+
     st.session_state.policy_updated = True
 
     st.subheader("🧠 Feedback Interpretation")
@@ -223,6 +287,14 @@ if st.button(
             f"Response after applying learned policy."
         )
 
+    # The response on screen now comes from the updated policy: its
+    # context and propensity are what the next feedback event is logged with
+    context = learner.encoder.encode(user_id, user_query)
+    st.session_state.rl_state.last_action = st.session_state.policy.as_dict()
+    st.session_state.rl_state.last_context = context
+    st.session_state.rl_state.last_propensity = float(
+        learner.action_probabilities(context)[0, action_index(st.session_state.rl_state.last_action)]
+    )
     st.session_state.policy_updated = False
 
 # ------------------------------------------------
@@ -232,7 +304,8 @@ st.subheader("🧪 RL Internals (Explicit View)")
 
 st.json({
     "state": st.session_state.rl_state.as_dict(),
-    "policy": st.session_state.policy.as_dict()
+    "policy": st.session_state.policy.as_dict(),
+    "learner (all sessions)": learner.stats()
 })
 
 st.info(
@@ -0,0 +1,249 @@
+import re
+import zlib
+import threading
+
+import numpy as np
+
+# ------------------------------------------------
+# Action space: every (verbosity, tone) pair is one arm
+# ------------------------------------------------
+VERBOSITY = ["short", "medium", "detailed"]
+TONE = ["neutral", "friendly", "formal"]
+
+ACTIONS = [{"verbosity": v, "tone": t} for v in VERBOSITY for t in TONE]
+
+
+def action_index(action):
+    """Policy dict -> arm number."""
+    return VERBOSITY.index(action["verbosity"]) * len(TONE) + TONE.index(action["tone"])
+
+
+# ------------------------------------------------
+# Context s: who is asking, and about what
+# ------------------------------------------------
+class ContextEncoder:
+    """
+    RL STATE FEATURES x(s)
+    [bias | one-hot user bucket | hashed bag of query words]
+
+    Users and query words are hashed into fixed buckets, so the feature
+    size never grows with the number of users or topics.
+    """
+
+    def __init__(self, user_buckets=64, topic_buckets=32):
+        self.user_buckets = user_buckets
+        self.topic_buckets = topic_buckets
+
+    @property
+    def dim(self):
+        return 1 + self.user_buckets + self.topic_buckets
+
+    def encode(self, user_id, query):
+        x = np.zeros(self.dim)
+        x[0] = 1.0
+        x[1 + zlib.crc32(user_id.encode("utf-8")) % self.user_buckets] = 1.0
+
+        words = re.findall(r"[a-z]{3,}", query.lower())
+        topic = np.zeros(self.topic_buckets)
+        for word in words:
+            topic[zlib.crc32(word.encode("utf-8")) % self.topic_buckets] += 1.0
+        norm = np.linalg.norm(topic)
+        x[1 + self.user_buckets:] = topic / norm if norm else topic
+        return x
+
+    def encode_many(self, user_ids, queries):
+        return np.vstack([self.encode(u, q) for u, q in zip(user_ids, queries)])
+
+
+# ------------------------------------------------
+# Learner
+# ------------------------------------------------
+class ContextualBandit:
+    """
+    RL POLICY LEARNER
+    One Bayesian linear model of reward per arm: E[r | x, a] = x · θ_a
+
+    Posterior per arm:  A_a = prior·I + Σ x xᵀ,   b_a = Σ r x,   θ_a = A_a⁻¹ b_a
+    All arms are stored as stacked arrays (K × d × d), so scoring and
+    updates are single NumPy calls over every arm and every interaction.
+
+    method="thompson": sample θ_a ~ N(θ_a, noise² A_a⁻¹), play the best sample
+    method="linucb":   play argmax x·θ_a + alpha·sqrt(xᵀ A_a⁻¹ x)
+
+    Either way exploration fades as evidence accumulates, so the chosen
+    behaviour converges instead of flipping on every single reward.
+    """
+
+    def __init__(self, encoder=None, method="thompson", alpha=1.0, noise=0.5, prior=1.0, seed=None):
+        if method not in ("thompson", "linucb"):
+            raise ValueError(f"Unknown method: {method}")
+
+        self.encoder = encoder or ContextEncoder()
+        self.method = method
+        self.alpha = alpha
+        self.noise = noise
+
+        k, d = len(ACTIONS), self.encoder.dim
+        self.A = np.tile(np.eye(d) * prior, (k, 1, 1))
+        self.b = np.zeros((k, d))
+        self.counts = np.zeros(k, dtype=int)
+        self.reward_sums = np.zeros(k)
+
+        self.A_inv = np.tile(np.eye(d) / prior, (k, 1, 1))
+        self.theta = np.zeros((k, d))
+        self._chol = np.sqrt(self.A_inv)
+
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+
+    def _refresh(self, arms):
+        """Posterior mean (and Thompson sampling factor) of the updated arms."""
+        self.theta[arms] = np.einsum("kij,kj->ki", self.A_inv[arms], self.b[arms])
+        if self.method == "thompson":
+            self._chol[arms] = np.linalg.cholesky(self.A_inv[arms])
+
+    # -------------------------------
+    # Acting
+    # -------------------------------
+    def scores(self, X):
+        """Score of every arm for every context row: (n, d) -> (n, K)."""
+        X = np.atleast_2d(X)
+        with self._lock:
+            if self.method == "linucb":
+                mean = X @ self.theta.T
+                var = np.einsum("ni,kij,nj->nk", X, self.A_inv, X)
+                return mean + self.alpha * np.sqrt(np.maximum(var, 0))
+
+            z = self._rng.standard_normal((X.shape[0],) + self.theta.shape)
+            samples = self.theta + self.noise * np.einsum("kij,nkj->nki", self._chol, z)
+            return np.einsum("nki,ni->nk", samples, X)
+
+    def select_many(self, X):
+        return self.scores(X).argmax(axis=1)
+
+    def select(self, user_id, query):
+        """Returns (action dict, context vector) - keep x for the update."""
+        x = self.encoder.encode(user_id, query)
+        return dict(ACTIONS[int(self.select_many(x)[0])]), x
+
+    def action_probabilities(self, X, samples=200):
+        """
+        P(arm | x) under the current policy, (n, d) -> (n, K).
+        Logged with every action as its propensity, which counterfactual
+        (IPS) evaluation of other policies needs. Thompson sampling has no
+        closed form, so it is estimated from `samples` draws.
+        """
+        X = np.atleast_2d(X)
+        k = len(ACTIONS)
+        if self.method == "linucb":
+            return np.eye(k)[self.select_many(X)]
+
+        arms = self.select_many(np.repeat(X, samples, axis=0)).reshape(len(X), samples)
+        return np.stack([np.bincount(row, minlength=k) for row in arms]) / samples
+
+    def greedy(self, X):
+        """Best arm by posterior mean (no exploration): what the policy has learned."""
+        with self._lock:
+            return (np.atleast_2d(X) @ self.theta.T).argmax(axis=1)
+
+    # -------------------------------
+    # Learning
+    # -------------------------------
+    def update_many(self, arms, X, rewards):
+        """
+        Folds a batch of (arm, context, reward) into the posteriors at once:
+        one Xᵀ X / Xᵀ r product per arm, whatever the batch size.
+        """
+        arms = np.asarray(arms, dtype=int)
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        rewards = np.asarray(rewards, dtype=float)
+
+        with self._lock:
+            touched = np.unique(arms)
+            for a in touched:
+                rows = arms == a
+                self.A[a] += X[rows].T @ X[rows]
+                self.b[a] += X[rows].T @ rewards[rows]
+            np.add.at(self.counts, arms, 1)
+            np.add.at(self.reward_sums, arms, rewards)
+
+            if len(arms) <= self.encoder.dim:
+                # Few rows (live feedback): rank-1 Sherman-Morrison updates, O(d²) each
+                for a, x in zip(arms, X):
+                    Ax = self.A_inv[a] @ x
+                    self.A_inv[a] -= np.outer(Ax, Ax) / (1.0 + x @ Ax)
+            else:
+                # Large batch (replay): re-invert the touched arms in one call
+                self.A_inv[touched] = np.linalg.inv(self.A[touched])
+            self.A_inv[touched] = (self.A_inv[touched] + self.A_inv[touched].transpose(0, 2, 1)) / 2
+            self._refresh(touched)
+
+    def update(self, action, x, reward):
+        self.update_many([action_index(action)], [x], [reward])
+
+    # -------------------------------
+    # Persistence
+    # -------------------------------
+    def save(self, path):
+        with self._lock:
+            np.savez(
+                path, A=self.A, b=self.b, A_inv=self.A_inv,
+                counts=self.counts, reward_sums=self.reward_sums,
+                config=np.array([self.method, self.alpha, self.noise,
+                                 self.encoder.user_buckets, self.encoder.topic_buckets], dtype=object)
+            )
+
+    @classmethod
+    def load(cls, path, seed=None):
+        data = np.load(path, allow_pickle=True)
+        method, alpha, noise, user_buckets, topic_buckets = data["config"]
+        learner = cls(ContextEncoder(int(user_buckets), int(topic_buckets)),
+                      method=str(method), alpha=float(alpha), noise=float(noise), seed=seed)
+        learner.A, learner.b, learner.A_inv = data["A"], data["b"], data["A_inv"]
+        learner.counts, learner.reward_sums = data["counts"], data["reward_sums"]
+        learner._refresh(np.arange(len(ACTIONS)))
+        return learner
+
+    def stats(self):
+        with self._lock:
+            return {
+                f"{a['verbosity']}/{a['tone']}": {
+                    "plays": int(n),
+                    "avg_reward": round(float(s / n), 3) if n else None
+                }
+                for a, n, s in zip(ACTIONS, self.counts, self.reward_sums)
+            }
+
+
+if __name__ == "__main__":
+    # Simulated users (see simulation.py): compare the bandit with the
+    # original rule-based update (flip on every negative reward).
+    import sys
+
+    from policy import ResponsePolicy
+    from policy_adapter import apply_policy_update
+    from simulation import SimulatedUsers
+
+    env = SimulatedUsers(seed=0)
+    steps = 5000
+    bandit = ContextualBandit(method=sys.argv[1] if len(sys.argv) > 1 else "thompson", seed=0)
+    rule_policies = {u: ResponsePolicy() for u in env.users}
+    bandit_rewards, rule_rewards = [], []
+
+    for _ in range(steps):
+        user, topic = env.sample_context()
+
+        action, x = bandit.select(user, topic)
+        _, interpretation = env.respond(user, topic, action)
+        bandit.update(action, x, interpretation["reward"])
+        bandit_rewards.append(interpretation["reward"])
+
+        policy = rule_policies[user]
+        _, interpretation = env.respond(user, topic, policy.as_dict())
+        apply_policy_update(policy, interpretation)
+        rule_rewards.append(interpretation["reward"])
+
+    last = steps // 5
+    print(f"Average reward over the last {last} of {steps} interactions")
+    print(f"  rule-based flip : {np.mean(rule_rewards[-last:]):+.3f}")
+    print(f"  bandit ({bandit.method}): {np.mean(bandit_rewards[-last:]):+.3f}")
@@ -1,5 +1,7 @@
 from langchain.prompts import ChatPromptTemplate
+import copy
 import json
+import re
 
 # feedback_prompt = ChatPromptTemplate.from_messages([
 #     ("system",
@@ -39,13 +41,13 @@ Then determine direction:
 - Otherwise → no_change
 
 Return ONLY valid JSON in this format:
-{
+{{
   "reward": -1 | 0 | 1,
-  "dimensions": {
+  "dimensions": {{
     "verbosity": "increase | decrease | no_change",
     "tone": "more_friendly | more_formal | no_change"
-  }
-}
+  }}
+}}
 """),
     ("human", "{feedback}")
 ])
@@ -70,29 +72,86 @@ Return ONLY valid JSON in this format:
 #         }
 
 
+FALLBACK_INTERPRETATION = {
+    "reward": -1,
+    "dimensions": {
+        "verbosity": "increase",
+        "tone": "no_change"
+    }
+}
+
+
+def parse_interpretation(content, feedback):
+    """LLM reply → interpretation dict, with the semantic guardrails applied."""
+    parsed = json.loads(content)
+
+    # Guardrail: semantic sanity check
+    fb = feedback.lower()
+    if "too short" in fb and parsed["reward"] >= 0:
+        parsed["reward"] = -1
+        parsed["dimensions"]["verbosity"] = "increase"
+
+    if "too long" in fb and parsed["reward"] >= 0:
+        parsed["reward"] = -1
+        parsed["dimensions"]["verbosity"] = "decrease"
+
+    return parsed
+
+
 def interpret_feedback(feedback, llm):
     try:
         chain = feedback_prompt | llm
         response = chain.invoke({"feedback": feedback})
-        parsed = json.loads(response.content)
+        return parse_interpretation(response.content, feedback)
 
-        # Guardrail: semantic sanity check
-        fb = feedback.lower()
-        if "too short" in fb and parsed["reward"] >= 0:
-            parsed["reward"] = -1
-            parsed["dimensions"]["verbosity"] = "increase"
+    except Exception:
+        return copy.deepcopy(FALLBACK_INTERPRETATION)
 
-        if "too long" in fb and parsed["reward"] >= 0:
-            parsed["reward"] = -1
-            parsed["dimensions"]["verbosity"] = "decrease"
 
-        return parsed
+# ------------------------------------------------
+# Local prefilter (no LLM call)
+# ------------------------------------------------
+HEURISTICS = {
+    "increase": re.compile(r"too short|more detail|not enough (detail|depth)|go into more|elaborate|expand on", re.I),
+    "decrease": re.compile(r"too long|too much text|shorter|keep it brief|more concise|tl;?dr|too verbose", re.I),
+    "more_friendly": re.compile(r"friendl|warmer|too cold|a bit cold|robotic|harsh|too formal|stiff", re.I),
+    "more_formal": re.compile(r"more formal|more professional|too casual|slang", re.I),
+    "negative": re.compile(r"not (what|helpful|clear|useful|good)|unhelpful|missed|wrong|useless|confus|unclear", re.I),
+    "positive": re.compile(r"\b(great|perfect|excellent|helpful|thanks|thank you|very clear|exactly what|love it)\b", re.I),
+    # Bare acceptance only: "ok but ..." goes on to the other rules or the LLM
+    "neutral": re.compile(r"^\s*(ok|okay|fine|meh|sure)[\s.!]*$", re.I),
+    # "not great", "no thanks", "wasn't very clear": praise words, not praise
+    "negation": re.compile(r"\b(not|no|never|nothing|hardly|barely|isn'?t|wasn'?t|aren'?t|weren'?t|don'?t|doesn'?t|didn'?t)\b", re.I),
+}
 
-    except Exception:
-        return {
-            "reward": -1,
-            "dimensions": {
-                "verbosity": "increase",
-                "tone": "no_change"
-            }
-        }
+
+def heuristic_interpretation(feedback):
+    """
+    Interprets clear-cut feedback with keyword rules.
+    Returns None when the feedback is ambiguous and needs the LLM.
+    """
+    verbosity = "no_change"
+    if HEURISTICS["increase"].search(feedback):
+        verbosity = "increase"
+    elif HEURISTICS["decrease"].search(feedback):
+        verbosity = "decrease"
+
+    tone = "no_change"
+    if HEURISTICS["more_friendly"].search(feedback):
+        tone = "more_friendly"
+    elif HEURISTICS["more_formal"].search(feedback):
+        tone = "more_formal"
+
+    if verbosity != "no_change" or tone != "no_change" or HEURISTICS["negative"].search(feedback):
+        reward = -1
+    elif HEURISTICS["negation"].search(feedback):
+        # Negated praise or acceptance is left to the LLM
+        return None
+    elif HEURISTICS["positive"].search(feedback):
+        reward = 1
+    elif HEURISTICS["neutral"].search(feedback):
+        reward = 0
+    else:
+        return None
+
+    return {"reward": reward, "dimensions": {"verbosity": verbosity, "tone": tone}}
@@ -0,0 +1,40 @@
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+
+class FeedbackLog:
+    """
+    EXPERIENCE LOG
+    Append-only JSONL file, one line per feedback event:
+
+        {"ts", "user_id", "query", "action", "propensity",
+         "feedback", "reward", "dimensions", "source"}
+
+    action is the (verbosity, tone) that produced the response and
+    propensity the probability the policy had of choosing it; together
+    with the reward they let offline_trainer.py replay and compare policies.
+    """
+
+    def __init__(self, path="./feedback_log.jsonl"):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, event):
+        event = {"ts": datetime.now(timezone.utc).isoformat(), **event}
+        line = json.dumps(event, ensure_ascii=False)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    def read(self):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def __len__(self):
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, encoding="utf-8") as f:
+            return sum(1 for line in f if line.strip())
@@ -0,0 +1,238 @@
+"""
+OFFLINE REPLAY TRAINING
+Fits the response policy from the feedback log in one batched pass, and
+compares policies counterfactually on held-out events.
+
+1. Interpret: logged rewards are reused; with --reinterpret every event is
+   re-scored - clear-cut feedback by the local keyword prefilter, the rest
+   by the LLM reward model, deduplicated and sent as one concurrent batch.
+2. Evaluate: train on the older events, replay the newest --holdout share.
+   For each candidate policy:
+     ips     inverse-propensity estimate of its average reward
+     snips   self-normalised IPS (lower variance)
+     replay  average reward on the events where it agrees with the log
+3. Fit: all events folded into a ContextualBandit with one vectorized
+   update, saved for app.py to start from.
+
+    python offline_trainer.py --simulate 5000            # synthetic log, no API key
+    python offline_trainer.py --log feedback_log.jsonl --reinterpret
+"""
+
+import argparse
+import re
+import time
+from collections import Counter
+
+import numpy as np
+
+from bandit import ACTIONS, ContextualBandit, action_index
+from feedback_interpreter import feedback_prompt, heuristic_interpretation, parse_interpretation
+from feedback_log import FeedbackLog
+
+POLICY_PATH = "./bandit_policy.npz"
+
+
+# ------------------------------------------------
+# 1. Interpretation
+# ------------------------------------------------
+def _normalize(text):
+    return re.sub(r"\s+", " ", text.strip().lower())
+
+
+def interpret_events(events, llm=None, reinterpret=False, max_concurrency=8):
+    """
+    Returns one interpretation per event (None if it could not be scored)
+    and counts per source: logged / heuristic / llm / skipped / failed.
+    """
+    stats = Counter()
+    interpretations = [None] * len(events)
+    pending = {}                                   # normalized feedback -> event indices
+
+    for i, event in enumerate(events):
+        if not reinterpret and event.get("reward") is not None:
+            interpretations[i] = {"reward": event["reward"], "dimensions": event.get("dimensions", {})}
+            stats["logged"] += 1
+            continue
+
+        interpretation = heuristic_interpretation(event.get("feedback", ""))
+        if interpretation is not None:
+            interpretations[i] = interpretation
+            stats["heuristic"] += 1
+        else:
+            pending.setdefault(_normalize(event.get("feedback", "")), []).append(i)
+
+    if not pending:
+        return interpretations, stats
+
+    if llm is None:
+        stats["skipped"] += sum(len(ids) for ids in pending.values())
+        return interpretations, stats
+
+    # One LLM call per distinct feedback text, run concurrently
+    texts = [events[ids[0]]["feedback"] for ids in pending.values()]
+    replies = (feedback_prompt | llm).batch(
+        [{"feedback": t} for t in texts],
+        config={"max_concurrency": max_concurrency},
+        return_exceptions=True
+    )
+    stats["llm_calls"] = len(texts)
+
+    for ids, text, reply in zip(pending.values(), texts, replies):
+        try:
+            interpretation = parse_interpretation(reply.content, text)
+        except Exception:
+            stats["failed"] += len(ids)
+            continue
+        for i in ids:
+            interpretations[i] = interpretation
+        stats["llm"] += len(ids)
+
+    return interpretations, stats
+
+
+# ------------------------------------------------
+# 2. Counterfactual replay
+# ------------------------------------------------
+def to_arrays(events, interpretations, encoder):
+    """Scored events -> contexts X, logged arms, rewards, propensities."""
+    rows = [(e, i) for e, i in zip(events, interpretations) if i is not None]
+    X = encoder.encode_many([e["user_id"] for e, _ in rows], [e["query"] for e, _ in rows])
+    arms = np.array([action_index(e["action"]) for e, _ in rows], dtype=int)
+    rewards = np.array([i["reward"] for _, i in rows], dtype=float)
+    # Events logged without a propensity are treated as uniformly random
+    propensities = np.array([e.get("propensity") or 1 / len(ACTIONS) for e, _ in rows], dtype=float)
+    return X, arms, rewards, propensities
+
+
+def replay_metrics(target_arms, arms, rewards, propensities, min_propensity=0.01):
+    match = target_arms == arms
+    weights = match / np.maximum(propensities, min_propensity)
+    return {
+        "ips": round(float(np.mean(weights * rewards)), 3),
+        "snips": round(float(np.sum(weights * rewards) / np.sum(weights)), 3) if weights.sum() else None,
+        "replay": round(float(rewards[match].mean()), 3) if match.any() else None,
+        "matches": int(match.sum()),
+    }
+
+
+def evaluate(X, arms, rewards, propensities, holdout=0.2, method="thompson"):
+    """Trains candidates on the older events and replays the newest `holdout` share."""
+    split = int(len(arms) * (1 - holdout))
+    train, test = slice(0, split), slice(split, None)
+
+    learner = ContextualBandit(method=method)
+    learner.update_many(arms[train], X[train], rewards[train])
+
+    # Best single arm on the training events
+    arm_means = np.array([
+        rewards[train][arms[train] == a].mean() if (arms[train] == a).any() else -np.inf
+        for a in range(len(ACTIONS))
+    ])
+    best = int(arm_means.argmax())
+    default = action_index({"verbosity": "medium", "tone": "neutral"})
+
+    n = len(arms[test])
+    candidates = {
+        "logged (behaviour)": arms[test],
+        "default medium/neutral": np.full(n, default),
+        f"best constant {ACTIONS[best]['verbosity']}/{ACTIONS[best]['tone']}": np.full(n, best),
+        "bandit (greedy)": learner.greedy(X[test]),
+    }
+
+    results = []
+    for name, target in candidates.items():
+        results.append({"policy": name, **replay_metrics(target, arms[test], rewards[test], propensities[test])})
+    results[0]["ips"] = results[0]["snips"] = results[0]["replay"] = round(float(rewards[test].mean()), 3)
+    return results
+
+
+# ------------------------------------------------
+# 3. Fit
+# ------------------------------------------------
+def fit_policy(X, arms, rewards, method="thompson"):
+    learner = ContextualBandit(method=method)
+    learner.update_many(arms, X, rewards)
+    return learner
+
+
+# ------------------------------------------------
+# Synthetic log (no API key needed)
+# ------------------------------------------------
+def simulate_log(log, steps, seed=0):
+    """Runs a live bandit against simulated users, logging like app.py does."""
+    from simulation import SimulatedUsers
+
+    env = SimulatedUsers(seed=seed)
+    learner = ContextualBandit(seed=seed)
+    for _ in range(steps):
+        user, query = env.sample_context()
+        action, x = learner.select(user, query)
+        propensity = learner.action_probabilities(x, samples=100)[0, action_index(action)]
+        feedback, interpretation = env.respond(user, query, action)
+        learner.update(action, x, interpretation["reward"])
+        log.append({
+            "user_id": user,
+            "query": query,
+            "action": action,
+            "propensity": round(float(propensity), 4),
+            "feedback": feedback,
+            "reward": interpretation["reward"],
+            "dimensions": interpretation["dimensions"],
+            "source": "simulation"
+        })
+
+
+def print_table(rows):
+    columns = list(rows[0].keys())
+    widths = [max(len(c), *(len(str(r[c])) for r in rows)) for c in columns]
+
+    print("  ".join(c.rjust(w) for c, w in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(str(row[c]).rjust(w) for c, w in zip(columns, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline replay training for the response policy")
+    parser.add_argument("--log", default="./feedback_log.jsonl")
+    parser.add_argument("--simulate", type=int, default=0, help="append N simulated events to the log first")
+    parser.add_argument("--reinterpret", action="store_true", help="re-score feedback instead of using logged rewards")
+    parser.add_argument("--no-llm", action="store_true", help="prefilter only; ambiguous feedback is skipped")
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    parser.add_argument("--holdout", type=float, default=0.2)
+    parser.add_argument("--method", choices=["thompson", "linucb"], default="thompson")
+    parser.add_argument("--save", default=POLICY_PATH)
+    args = parser.parse_args()
+
+    log = FeedbackLog(args.log)
+    if args.simulate:
+        start = time.perf_counter()
+        simulate_log(log, args.simulate)
+        print(f"Simulated {args.simulate} events in {time.perf_counter() - start:.1f}s")
+
+    events = log.read()
+    if not events:
+        print(f"No events in {args.log}")
+        return
+
+    llm = None
+    if args.reinterpret and not args.no_llm:
+        from llm import evaluator_llm as llm
+
+    start = time.perf_counter()
+    interpretations, stats = interpret_events(events, llm, args.reinterpret, args.max_concurrency)
+    print(f"Interpreted {len(events)} events in {time.perf_counter() - start:.2f}s: {dict(stats)}")
+
+    learner = ContextualBandit(method=args.method)
+    X, arms, rewards, propensities = to_arrays(events, interpretations, learner.encoder)
+
+    print(f"\nCounterfactual replay on the newest {args.holdout:.0%} of {len(arms)} events\n")
+    print_table(evaluate(X, arms, rewards, propensities, args.holdout, args.method))
+
+    start = time.perf_counter()
+    learner = fit_policy(X, arms, rewards, args.method)
+    print(f"\nFitted on {len(arms)} events in {(time.perf_counter() - start) * 1000:.1f} ms -> {args.save}")
+    learner.save(args.save)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,26 @@
-def apply_policy_update(policy, interpretation):
+from bandit import ACTIONS
+
+
+def apply_policy_update(policy, interpretation, learner=None, context=None, action=None):
     """
     RL LEARNING STEP
     Updates policy based on reward + direction
+
+    With a learner (bandit.ContextualBandit) the reward is folded into the
+    learner's estimate for `action` - the one that produced the response
+    being rated, by default the current policy - in `context`, and the next
+    action is chosen from everything learned so far. Without one, the
+    original rule applies: flip on a negative reward.
     """
 
     reward = interpretation.get("reward", 0)
     dims = interpretation.get("dimensions", {})
 
+    if learner is not None:
+        learner.update(action or policy.as_dict(), context, reward)
+        policy.update(ACTIONS[int(learner.select_many(context)[0])])
+        return
+
     # Learn only if reward is negative
     if reward < 0:
         if dims.get("verbosity") == "increase":
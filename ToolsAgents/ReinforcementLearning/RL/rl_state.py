@@ -8,15 +8,20 @@ class RLState:
         self.step = 0
         self.last_action = None
         self.last_reward = None
+        self.last_context = None    # x(s) the last action was chosen for
+        self.last_propensity = None  # P(last_action | x) under the policy
+        self.total_reward = 0
 
     def update(self, action, reward):
         self.step += 1
         self.last_action = action
         self.last_reward = reward
+        self.total_reward += reward
 
     def as_dict(self):
         return {
             "step": self.step,
             "last_action": self.last_action,
-            "last_reward": self.last_reward
+            "last_reward": self.last_reward,
+            "avg_reward": round(self.total_reward / self.step, 3) if self.step else None
         }
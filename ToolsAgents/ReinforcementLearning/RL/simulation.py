@@ -0,0 +1,67 @@
+import numpy as np
+
+from bandit import TONE, VERBOSITY
+
+TOPICS = ["python api error", "career growth plan", "explain reinforcement learning"]
+
+
+class SimulatedUsers:
+    """
+    SIMULATED ENVIRONMENT
+    Each user has a preferred tone, each topic a preferred depth.
+
+    respond() returns what a real user would type plus the ground-truth
+    interpretation (reward -1 | 0 | 1 and the direction to move in).
+    A share of clicks is noisy (reward flipped), as with real feedback.
+    """
+
+    def __init__(self, n_users=20, noise=0.1, seed=0):
+        self.rng = np.random.default_rng(seed)
+        self.noise = noise
+        self.users = [f"user{i}" for i in range(n_users)]
+        self.user_tone = {u: TONE[self.rng.integers(len(TONE))] for u in self.users}
+        self.topic_verbosity = dict(zip(TOPICS, VERBOSITY))
+
+    def sample_context(self):
+        return self.users[self.rng.integers(len(self.users))], TOPICS[self.rng.integers(len(TOPICS))]
+
+    def preferred(self, user, query):
+        return {"verbosity": self.topic_verbosity[query], "tone": self.user_tone[user]}
+
+    def respond(self, user, query, action):
+        want = self.preferred(user, query)
+        hits = (action["verbosity"] == want["verbosity"]) + (action["tone"] == want["tone"])
+        reward = hits - 1
+        if self.rng.random() < self.noise:
+            reward = -reward
+
+        dv = VERBOSITY.index(want["verbosity"]) - VERBOSITY.index(action["verbosity"])
+        verbosity = "increase" if dv > 0 else "decrease" if dv < 0 else "no_change"
+        tone = "no_change"
+        if want["tone"] != action["tone"]:
+            tone = {"friendly": "more_friendly", "formal": "more_formal"}.get(want["tone"], "no_change")
+
+        interpretation = {"reward": reward, "dimensions": {"verbosity": verbosity, "tone": tone}}
+        return self._text(reward, verbosity, tone), interpretation
+
+    def _text(self, reward, verbosity, tone):
+        parts = []
+        if verbosity == "increase":
+            parts.append(self._pick(["Too short", "Can you go into more detail?", "Not enough depth"]))
+        elif verbosity == "decrease":
+            parts.append(self._pick(["Too long", "Way too much text, keep it brief", "Shorter please"]))
+        if tone == "more_friendly":
+            parts.append(self._pick(["a bit cold, be friendlier", "sounds robotic"]))
+        elif tone == "more_formal":
+            parts.append(self._pick(["please be more formal", "too casual for work"]))
+
+        if not parts:
+            if reward > 0:
+                return self._pick(["Great answer, thanks!", "Perfect, very clear", "Helpful"])
+            if reward < 0:
+                return self._pick(["Not what I needed", "Hmm, that missed the point", "Could you try a different angle?"])
+            return self._pick(["ok", "Fine I guess"])
+        return ", ".join(parts)
+
+    def _pick(self, options):
+        return options[self.rng.integers(len(options))]
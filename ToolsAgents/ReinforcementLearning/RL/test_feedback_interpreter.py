@@ -0,0 +1,32 @@
+import pytest
+
+from feedback_interpreter import heuristic_interpretation
+
+# feedback -> (reward, tone), or None when the LLM has to decide
+CASES = [
+    ("Helpful", (1, "no_change")),
+    ("Thanks, exactly what I needed", (1, "no_change")),
+    ("Unhelpful answer", (-1, "no_change")),
+    ("That was unhelpful", (-1, "no_change")),
+    ("not helpful", (-1, "no_change")),
+    ("ok but too formal", (-1, "more_friendly")),
+    ("too stiff", (-1, "more_friendly")),
+    ("Too short", (-1, "no_change")),
+    ("ok", (0, "no_change")),
+    ("Fine.", (0, "no_change")),
+    ("ok but could be better", None),
+    ("not great", None),
+    ("no thanks", None),
+]
+
+
+@pytest.mark.parametrize("feedback, expected", CASES)
+def test_heuristic_interpretation(feedback, expected):
+    interpretation = heuristic_interpretation(feedback)
+
+    if expected is None:
+        assert interpretation is None
+    else:
+        reward, tone = expected
+        assert interpretation["reward"] == reward
+        assert interpretation["dimensions"]["tone"] == tone
@@ -3,11 +3,14 @@ from dotenv import load_dotenv
 from typing import TypedDict, List
 
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_community.vectorstores import FAISS
 from langchain.tools import tool
 
 from langgraph.graph import StateGraph, END
 
+from refinement import RefinementController, count_tokens
+from context_compression import ContextCompressor
+from agentic_v5.vector_index import load_vectorstore
+
 load_dotenv()
 
 # =========================
@@ -27,14 +30,27 @@ VECTOR_DB_PATH = "hr_faiss_index"
 
 embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
 
-vectorstore = FAISS.load_local(
-    VECTOR_DB_PATH,
-    embeddings,
-    allow_dangerous_deserialization=True
-)
+vectorstore = load_vectorstore(VECTOR_DB_PATH, embeddings)
 
 retriever = vectorstore.as_retriever(search_kwargs={"k":4})
 
+compressor = ContextCompressor()
+
+
+# =========================
+# REFINEMENT CONTROLLER
+# =========================
+
+TOKEN_BUDGET = 6000
+
+controller = RefinementController(
+    llm,
+    pass_score=0.8,
+    min_improvement=0.05,
+    max_rounds=2,
+    token_budget=TOKEN_BUDGET
+)
+
 
 # =========================
 # STATE
@@ -47,6 +63,11 @@ class AgentState(TypedDict):
     evaluation: str
     retries: int
     trace: List[str]
+    score: object
+    scores: List[float]
+    best_answer: str
+    tokens: int
+    next_action: str
 
 
 # =========================
@@ -57,17 +78,8 @@ def retrieve_hr_policy(query):
 
     docs = retriever.invoke(query)
 
-    results = []
-
-    for d in docs:
-
-        source = d.metadata.get("source","Unknown")
-
-        results.append(
-            f"{d.page_content}\n[CITATION: {source}]"
-        )
-
-    return "\n\n".join(results)
+    # Overlapping chunks merged, only query-relevant sentences kept
+    return compressor.compress(query, docs, citations=True)
 
 
 # =========================
@@ -90,36 +102,19 @@ Question:
 {question}
 """
 
-    return llm.invoke(prompt).content
+    message = llm.invoke(prompt)
+
+    return message.content, count_tokens(message, prompt)
 
 
 # =========================
 # TOOL: EVALUATE
 # =========================
 
-def evaluate_answer(question, answer):
-
-    prompt = f"""
-Evaluate the HR response.
-
-Criteria:
-1 Relevance
-2 Policy Alignment
-3 Ethical Tone
-
-Question:
-{question}
-
-Answer:
-{answer}
+def evaluate_answer(question, answer, context):
 
-Return:
-
-Verdict: PASS or FAIL
-Reason:
-"""
-
-    return llm.invoke(prompt).content
+    # Structured numeric score instead of a PASS / FAIL string
+    return controller.score(question, answer, context)
 
 
 # =========================
@@ -143,9 +138,9 @@ def retrieval_node(state):
 
     trace.append("Retrieval Agent → Searching HR knowledge base")
 
-    context = retrieve_hr_policy(state["question"])
+    context, stats = retrieve_hr_policy(state["question"])
 
-    trace.append("Retrieval Agent → Context retrieved")
+    trace.append(f"Retrieval Agent → Context retrieved, {stats.summary()}")
 
     return {
         "context":context,
@@ -161,13 +156,14 @@ def drafting_node(state):
 
     trace.append("Drafting Agent → Generating HR response")
 
-    answer = draft_answer(
+    answer, tokens = draft_answer(
         state["question"],
         state["context"]
     )
 
     return {
         "answer":answer,
+        "tokens":state.get("tokens",0) + tokens,
         "trace":trace
     }
 
@@ -180,15 +176,44 @@ def evaluation_node(state):
 
     trace.append("Evaluation Agent → Evaluating response")
 
-    evaluation = evaluate_answer(
+    score, eval_tokens = evaluate_answer(
         state["question"],
-        state["answer"]
+        state["answer"],
+        state["context"]
+    )
+
+    tokens = state.get("tokens",0) + eval_tokens
+    scores = state.get("scores",[]) + [score.value]
+
+    trace.append(f"Evaluation Agent → Score {score.value:.2f} ({tokens} tokens used)")
+
+    # A redraft that scored worse never replaces the best answer so far;
+    # the kept answer keeps its own score, evaluation and failing sentences
+    answer = state["answer"]
+    if len(scores) > 1 and score.value < max(scores[:-1]):
+        answer = state["best_answer"]
+        score = state["score"]
+        trace.append(f"Evaluation Agent → Regression, keeping the earlier answer ({score.value:.2f})")
+    best_answer = answer
+
+    next_action, reason = controller.decide(
+        scores,
+        state.get("retries",0),
+        tokens,
+        can_patch=bool(score.failing_sentences)
     )
 
-    trace.append("Evaluation Agent → Evaluation completed")
+    if next_action == "end":
+        trace.append(f"Evaluation Agent → Stopping: {reason}")
 
     return {
-        "evaluation":evaluation,
+        "answer":answer,
+        "best_answer":best_answer,
+        "evaluation":score.summary(),
+        "score":score,
+        "scores":scores,
+        "tokens":tokens,
+        "next_action":next_action,
         "trace":trace
     }
 
@@ -199,15 +224,8 @@ def evaluation_node(state):
 
 def evaluation_router(state):
 
-    if "PASS" in state["evaluation"]:
-        return "end"
-
-    retries = state.get("retries",0)
-
-    if retries >= 2:
-        return "end"
-
-    return "redraft"
+    # Decided by the refinement controller in evaluation_node
+    return state.get("next_action","end")
 
 
 # =========================
@@ -218,30 +236,21 @@ def redraft_node(state):
 
     trace = state["trace"]
 
-    trace.append("Planner Agent → Evaluation failed, improving answer")
+    trace.append("Planner Agent → Evaluation failed, rewriting failing sentences")
 
     retries = state["retries"] + 1
 
-    prompt = f"""
-The previous answer failed evaluation.
-
-Evaluation feedback:
-{state['evaluation']}
-
-Improve the answer.
-
-Context:
-{state['context']}
-
-Question:
-{state['question']}
-"""
-
-    answer = llm.invoke(prompt).content
+    # Only the failing sentences and their closest context chunks are sent
+    answer, tokens = controller.patch(
+        state["answer"],
+        state["score"],
+        state["context"]
+    )
 
     return {
         "answer":answer,
         "retries":retries,
+        "tokens":state.get("tokens",0) + tokens,
         "trace":trace
     }
 
@@ -292,6 +301,8 @@ while True:
     result = graph.invoke({
         "question":q,
         "retries":0,
+        "tokens":0,
+        "scores":[],
         "trace":[]
     })
 
@@ -304,4 +315,6 @@ while True:
     print(result["answer"])
 
     print("\n--- EVALUATION ---\n")
-    print(result["evaluation"])
\ No newline at end of file
+    print(result["evaluation"])
+
+    print(f"\nTokens used: {result['tokens']} / {TOKEN_BUDGET}")
\ No newline at end of file
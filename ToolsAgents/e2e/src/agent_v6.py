@@ -5,11 +5,13 @@ import os
 from dotenv import load_dotenv
 
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_community.vectorstores import FAISS
 
-from langgraph.graph import StateGraph, END
+from langgraph.graph import StateGraph, START, END
 from typing import TypedDict
 
+from guardrails import GuardrailEngine
+from agentic_v5.vector_index import load_vectorstore
+
 load_dotenv()
 
 # -------------------------
@@ -26,14 +28,16 @@ VECTOR_DB_PATH = "hr_faiss_index"
 
 embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
 
-vectorstore = FAISS.load_local(
-    VECTOR_DB_PATH,
-    embeddings,
-    allow_dangerous_deserialization=True
-)
+vectorstore = load_vectorstore(VECTOR_DB_PATH, embeddings)
 
 retriever = vectorstore.as_retriever(search_kwargs={"k": 4})
 
+# -------------------------
+# GUARDRAILS
+# -------------------------
+
+guardrails = GuardrailEngine(embeddings, llm)
+
 
 # -------------------------
 # STATE OBJECT
@@ -44,6 +48,8 @@ class AgentState(TypedDict):
     context: str
     answer: str
     evaluation: str
+    blocked: bool
+    draft: str
 
 
 # -------------------------
@@ -54,23 +60,19 @@ def ethics_check(state):
 
     query = state["question"]
 
-    prompt = f"""
-Determine if this query violates workplace ethics.
+    # Local rules / similarity first, LLM only for ambiguous queries
+    verdict = guardrails.check_input(query)
 
-Return SAFE or ETHICS_VIOLATION.
-
-Query: {query}
-"""
-
-    result = llm.invoke(prompt).content
-
-    if "ETHICS_VIOLATION" in result:
+    if not verdict.safe:
 
         return {
-            "answer": "I cannot assist with bypassing company ethics policies."
+            "blocked": True,
+            "answer": "I cannot assist with bypassing company ethics policies.",
+            "evaluation": f"Blocked by ethics check ({verdict.source})"
         }
 
-    return state
+    # Only write our own keys: this node may run in parallel with retrieval
+    return {"blocked": False}
 
 
 # -------------------------
@@ -92,12 +94,9 @@ def retrieve_policy(state):
 # NODE 3 — Generate Answer
 # -------------------------
 
-def generate_answer(state):
+def draft_prompt(question, context):
 
-    question = state["question"]
-    context = state["context"]
-
-    prompt = f"""
+    return f"""
 Use the HR policy to answer the question.
 
 Policy:
@@ -107,11 +106,58 @@ Question:
 {question}
 """
 
-    answer = llm.invoke(prompt).content
+
+def generate_answer(state):
+
+    answer = llm.invoke(
+        draft_prompt(state["question"], state["context"])
+    ).content
 
     return {"answer": answer}
 
 
+# -------------------------
+# SPECULATIVE DRAFT
+# -------------------------
+# Runs before the ethics verdict is known; kept in "draft" and only
+# promoted to "answer" once the query has been cleared.
+
+def speculative_draft(state):
+
+    draft = llm.invoke(
+        draft_prompt(state["question"], state["context"])
+    ).content
+
+    return {"draft": draft}
+
+
+# -------------------------
+# SPECULATION GATE
+# -------------------------
+
+def speculation_gate(state):
+
+    if state.get("blocked"):
+        # Discard speculative work for blocked queries
+        return {"context": "", "draft": ""}
+
+    if state.get("draft"):
+        return {"answer": state["draft"]}
+
+    return {}
+
+
+def gate_router(state):
+
+    if state.get("blocked"):
+        return "blocked"
+
+    if state.get("draft"):
+        return "evaluate"
+
+    return "generate"
+
+
 # -------------------------
 # NODE 4 — Evaluation Agent
 # -------------------------
@@ -145,22 +191,67 @@ Return PASS or FAIL with reason.
 # BUILD GRAPH
 # -------------------------
 
-workflow = StateGraph(AgentState)
+# speculative=True starts retrieval (and, with speculative_drafting, the
+# answer draft) alongside the ethics check. Safe queries then pay
+# max(ethics, retrieval) instead of the sum; blocked queries discard the work.
+
+def build_graph(speculative=True, speculative_drafting=False):
+
+    workflow = StateGraph(AgentState)
+
+    workflow.add_node("ethics_check", ethics_check)
+    workflow.add_node("retrieve_policy", retrieve_policy)
+    workflow.add_node("generate_answer", generate_answer)
+    workflow.add_node("evaluate_response", evaluate_response)
+
+    if not speculative:
+
+        workflow.set_entry_point("ethics_check")
+
+        workflow.add_conditional_edges(
+            "ethics_check",
+            gate_router,
+            {
+                "blocked": END,
+                "evaluate": "retrieve_policy",
+                "generate": "retrieve_policy"
+            }
+        )
+
+        workflow.add_edge("retrieve_policy", "generate_answer")
+
+    else:
+
+        workflow.add_node("speculation_gate", speculation_gate)
+
+        workflow.add_edge(START, "ethics_check")
+        workflow.add_edge(START, "retrieve_policy")
+
+        if speculative_drafting:
+            workflow.add_node("speculative_draft", speculative_draft)
+            workflow.add_edge("retrieve_policy", "speculative_draft")
+            workflow.add_edge(["ethics_check", "speculative_draft"], "speculation_gate")
+        else:
+            workflow.add_edge(["ethics_check", "retrieve_policy"], "speculation_gate")
+
+        workflow.add_conditional_edges(
+            "speculation_gate",
+            gate_router,
+            {
+                "blocked": END,
+                "evaluate": "evaluate_response",
+                "generate": "generate_answer"
+            }
+        )
 
-workflow.add_node("ethics_check", ethics_check)
-workflow.add_node("retrieve_policy", retrieve_policy)
-workflow.add_node("generate_answer", generate_answer)
-workflow.add_node("evaluate_response", evaluate_response)
+    workflow.add_edge("generate_answer", "evaluate_response")
 
-workflow.set_entry_point("ethics_check")
+    workflow.add_edge("evaluate_response", END)
 
-workflow.add_edge("ethics_check", "retrieve_policy")
-workflow.add_edge("retrieve_policy", "generate_answer")
-workflow.add_edge("generate_answer", "evaluate_response")
+    return workflow.compile()
 
-workflow.add_edge("evaluate_response", END)
 
-graph = workflow.compile()
+graph = build_graph(speculative=True)
 
 
 # -------------------------
@@ -177,4 +268,4 @@ while True:
     result = graph.invoke({"question": query})
 
     print("\nAnswer:\n", result["answer"])
-    print("\nEvaluation:\n", result["evaluation"])
\ No newline at end of file
+    print("\nEvaluation:\n", result.get("evaluation", "No evaluation generated"))
\ No newline at end of file
@@ -0,0 +1,199 @@
+import json
+import re
+from dataclasses import dataclass
+from typing import Dict, List
+
+# Three checks that used to be tools of a nested ReAct evaluation agent.
+# Each maps to (prompt, passing verdict, failing verdict).
+
+RELEVANCE_PROMPT = """
+You are evaluating whether the response answers the user's question.
+
+Example 1
+Question: What is onboarding?
+Answer: Onboarding is the process of integrating new employees.
+Verdict: RELEVANT
+
+Example 2
+Question: What is onboarding?
+Answer: The company values ethical conduct.
+Verdict: NOT_RELEVANT
+
+Now evaluate:
+
+{data}
+
+Return only:
+RELEVANT or NOT_RELEVANT
+"""
+
+POLICY_ALIGNMENT_PROMPT = """
+Determine whether the response aligns with HR policies.
+
+Example:
+
+Policy: Harassment must be reported to HR.
+Answer: Employees should report harassment to HR.
+Verdict: ALIGNED
+
+Answer: Ignore harassment incidents.
+Verdict: NOT_ALIGNED
+
+Now evaluate:
+
+{data}
+
+Return only:
+ALIGNED or NOT_ALIGNED
+"""
+
+ETHICS_TONE_PROMPT = """
+Evaluate whether the response maintains professional workplace tone.
+
+Example:
+
+Answer: Please report harassment to HR.
+Verdict: PROFESSIONAL
+
+Answer: Ignore the issue.
+Verdict: UNETHICAL
+
+Now evaluate:
+
+{data}
+
+Return only:
+PROFESSIONAL or UNETHICAL
+"""
+
+COMBINED_PROMPT = """
+You are evaluating a response from an HR assistant on three criteria:
+
+relevance: RELEVANT or NOT_RELEVANT
+policy_alignment: ALIGNED or NOT_ALIGNED
+ethical_tone: PROFESSIONAL or UNETHICAL
+
+Now evaluate:
+
+{data}
+
+Return ONLY JSON:
+{{"relevance": "...", "policy_alignment": "...", "ethical_tone": "..."}}
+"""
+
+CHECKS = {
+    "relevance": (RELEVANCE_PROMPT, "RELEVANT", "NOT_RELEVANT"),
+    "policy_alignment": (POLICY_ALIGNMENT_PROMPT, "ALIGNED", "NOT_ALIGNED"),
+    "ethical_tone": (ETHICS_TONE_PROMPT, "PROFESSIONAL", "UNETHICAL"),
+}
+
+
+def parse_verdict(text: str, check: str) -> str:
+    _, passing, failing = CHECKS[check]
+    # "NOT ALIGNED" / "not-aligned" -> "NOT_ALIGNED"
+    text = re.sub(r"[\s\-]+", "_", text.upper())
+
+    # The failing label contains the passing one ("NOT_RELEVANT"), test it first
+    if failing in text:
+        return failing
+    if passing in text:
+        return passing
+    return "UNKNOWN"
+
+
+@dataclass
+class EvaluationResult:
+    data: str
+    verdicts: Dict[str, str]
+
+    @property
+    def passed(self) -> bool:
+        return all(
+            self.verdicts.get(check) == passing
+            for check, (_, passing, _) in CHECKS.items()
+        )
+
+    def summary(self) -> str:
+        lines = [f"{check}: {verdict}" for check, verdict in self.verdicts.items()]
+        lines.append(f"Overall Verdict: {'PASS' if self.passed else 'FAIL'}")
+        return "\n".join(lines)
+
+
+class EvaluationService:
+    """
+    Evaluates HR responses in one round-trip.
+
+    mode="concurrent" sends the three checks in parallel,
+    mode="combined" sends one structured multi-criteria prompt.
+    """
+
+    def __init__(self, llm, mode: str = "concurrent", max_concurrency: int = 8):
+        if mode not in ("concurrent", "combined"):
+            raise ValueError(f"Unknown evaluation mode: {mode}")
+
+        self.llm = llm
+        self.mode = mode
+        self.config = {"max_concurrency": max_concurrency}
+
+    # -------------------------
+    # PROMPTS / PARSING
+    # -------------------------
+
+    def _prompts(self, items: List[str]) -> List[str]:
+        if self.mode == "combined":
+            return [COMBINED_PROMPT.format(data=data) for data in items]
+
+        return [
+            prompt.format(data=data)
+            for data in items
+            for prompt, _, _ in CHECKS.values()
+        ]
+
+    def _results(self, items: List[str], messages) -> List[EvaluationResult]:
+        outputs = [message.content for message in messages]
+        results = []
+
+        for i, data in enumerate(items):
+
+            if self.mode == "combined":
+                match = re.search(r"\{.*\}", outputs[i], re.DOTALL)
+                try:
+                    parsed = json.loads(match.group(0)) if match else {}
+                except json.JSONDecodeError:
+                    parsed = {}
+
+                verdicts = {
+                    check: parse_verdict(str(parsed.get(check, "")), check)
+                    for check in CHECKS
+                }
+            else:
+                row = outputs[i * len(CHECKS):(i + 1) * len(CHECKS)]
+                verdicts = {
+                    check: parse_verdict(text, check)
+                    for check, text in zip(CHECKS, row)
+                }
+
+            results.append(EvaluationResult(data, verdicts))
+
+        return results
+
+    # -------------------------
+    # PUBLIC API
+    # -------------------------
+
+    def evaluate(self, data: str) -> EvaluationResult:
+        return self.evaluate_many([data])[0]
+
+    def evaluate_many(self, items: List[str]) -> List[EvaluationResult]:
+        """
+        Evaluates many answers with a single batched call to the LLM.
+        """
+        messages = self.llm.batch(self._prompts(items), config=self.config)
+        return self._results(items, messages)
+
+    async def aevaluate(self, data: str) -> EvaluationResult:
+        return (await self.aevaluate_many([data]))[0]
+
+    async def aevaluate_many(self, items: List[str]) -> List[EvaluationResult]:
+        messages = await self.llm.abatch(self._prompts(items), config=self.config)
+        return self._results(items, messages)
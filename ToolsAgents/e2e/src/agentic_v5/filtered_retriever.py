@@ -0,0 +1,156 @@
+import json
+import os
+from typing import Dict, List, Optional
+
+import faiss
+import numpy as np
+
+# Metadata captured at ingest time (see ingest.py / documents/metadata.json)
+FILTER_FIELDS = ["tenant", "region", "doc_type", "department", "version"]
+
+DATE_FIELD = "effective_date"
+
+GLOBAL_REGION = "global"
+
+
+def load_document_metadata(path: str) -> Dict[str, dict]:
+    """
+    Reads documents/metadata.json into {file name: metadata},
+    with the "defaults" block applied to every document.
+    """
+    if not os.path.exists(path):
+        return {}
+
+    with open(path) as f:
+        data = json.load(f)
+
+    defaults = data.get("defaults", {})
+    return {
+        name: {**defaults, **meta}
+        for name, meta in data.get("documents", {}).items()
+    }
+
+
+def tag_documents(documents, metadata: Dict[str, dict], defaults: Optional[dict] = None):
+    """
+    Adds metadata to loaded pages, matched on the source file name.
+    """
+    for doc in documents:
+        name = os.path.basename(doc.metadata.get("source", ""))
+        doc.metadata.update(metadata.get(name, defaults or {}))
+    return documents
+
+
+def tenant_filters_from_env() -> dict:
+    """
+    Deployment-level scope (HR_TENANT, HR_REGION), so one shared index
+    can serve every tenant. Documents tagged "global" apply in every
+    region, so a regional deployment matches its own region or "global";
+    a global deployment leaves region unfiltered.
+    """
+    filters = {"tenant": os.getenv("HR_TENANT")}
+
+    region = os.getenv("HR_REGION")
+    if region and region.lower() != GLOBAL_REGION:
+        filters["region"] = [region, GLOBAL_REGION]
+
+    return {key: value for key, value in filters.items() if value}
+
+
+class MetadataIndex:
+    """
+    One boolean bitmap per (field, value) over the FAISS ids, plus an array
+    of effective dates. A filter is the AND of bitmaps, so it costs a few
+    vector operations no matter how many tenants share the index.
+    """
+
+    def __init__(self, vectorstore, fields: List[str] = FILTER_FIELDS):
+        self.size = vectorstore.index.ntotal
+        self.bitmaps: Dict[tuple, np.ndarray] = {}
+        self.dates = np.full(self.size, np.datetime64("NaT"), dtype="datetime64[D]")
+
+        for i, doc_id in vectorstore.index_to_docstore_id.items():
+            metadata = vectorstore.docstore.search(doc_id).metadata
+
+            for field in fields:
+                if field in metadata:
+                    key = (field, str(metadata[field]))
+                    if key not in self.bitmaps:
+                        self.bitmaps[key] = np.zeros(self.size, dtype=bool)
+                    self.bitmaps[key][i] = True
+
+            if metadata.get(DATE_FIELD):
+                self.dates[i] = np.datetime64(metadata[DATE_FIELD], "D")
+
+    def values(self, field: str) -> List[str]:
+        return sorted(value for f, value in self.bitmaps if f == field)
+
+    def mask(self, filters: Optional[dict] = None) -> np.ndarray:
+        """
+        filters: {field: value or [values]}, plus optional
+        "effective_from" / "effective_to" ISO dates (inclusive).
+        """
+        mask = np.ones(self.size, dtype=bool)
+
+        for field, value in (filters or {}).items():
+            if field == "effective_from":
+                mask &= self.dates >= np.datetime64(value, "D")
+            elif field == "effective_to":
+                mask &= self.dates <= np.datetime64(value, "D")
+            else:
+                allowed = np.zeros(self.size, dtype=bool)
+                for v in value if isinstance(value, (list, tuple, set)) else [value]:
+                    allowed |= self.bitmaps.get((field, str(v)), False)
+                mask &= allowed
+
+        return mask
+
+
+class FilteredRetriever:
+    """
+    Pre-filtered similarity search over one shared FAISS index. The filter
+    is applied inside FAISS (IDSelectorBitmap), so top-k is always taken
+    from the allowed documents only.
+    """
+
+    def __init__(self, vectorstore, k: int = 4, default_filters: Optional[dict] = None):
+        self.vectorstore = vectorstore
+        self.k = k
+        self.default_filters = default_filters or {}
+        self.metadata_index = MetadataIndex(vectorstore)
+
+    def _search_params(self, selector):
+        config = getattr(self.vectorstore, "index_config", {"index_type": "flat", "params": {}})
+        params = config.get("params", {})
+
+        if config["index_type"] == "ivfpq":
+            return faiss.SearchParametersIVF(sel=selector, nprobe=params.get("nprobe", 8))
+        if config["index_type"] == "hnsw":
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=params.get("efSearch", 64))
+        return faiss.SearchParameters(sel=selector)
+
+    def search_by_vector(self, vector, filters: Optional[dict] = None, k: Optional[int] = None):
+        k = k or self.k
+        mask = self.metadata_index.mask({**self.default_filters, **(filters or {})})
+
+        if mask.all():
+            return self.vectorstore.similarity_search_by_vector(vector, k=k)
+
+        if not mask.any():
+            return []
+
+        bits = np.packbits(mask, bitorder="little")
+        selector = faiss.IDSelectorBitmap(self.metadata_index.size, faiss.swig_ptr(bits))
+
+        query = np.asarray([vector], dtype="float32")
+        _, ids = self.vectorstore.index.search(
+            query, min(k, int(mask.sum())), params=self._search_params(selector)
+        )
+
+        docstore = self.vectorstore.docstore
+        id_map = self.vectorstore.index_to_docstore_id
+        return [docstore.search(id_map[i]) for i in ids[0] if i != -1]
+
+    def search(self, query: str, filters: Optional[dict] = None, k: Optional[int] = None):
+        vector = self.vectorstore.embeddings.embed_query(query)
+        return self.search_by_vector(vector, filters, k)
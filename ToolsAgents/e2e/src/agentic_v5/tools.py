@@ -1,41 +1,57 @@
+import os
+
 from langchain.tools import tool
 from langchain_openai import OpenAIEmbeddings
-from langchain_community.vectorstores import FAISS
-from evaluator_agent import evaluation_executor
+from vector_index import load_vectorstore
+from filtered_retriever import FilteredRetriever, tenant_filters_from_env
+from evaluation_service import EvaluationService
+from llm_config import llm
 
 VECTOR_DB_PATH = "hr_faiss_index"
 
 embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
 
-vectorstore = FAISS.load_local(
-    VECTOR_DB_PATH,
-    embeddings,
-    allow_dangerous_deserialization=True
+vectorstore = load_vectorstore(VECTOR_DB_PATH, embeddings)
+
+retriever = FilteredRetriever(
+    vectorstore,
+    k=4,
+    default_filters=tenant_filters_from_env()
 )
 
-retriever = vectorstore.as_retriever(search_kwargs={"k": 4})
+
+def search_policies(query, **filters):
+    """
+    Filtered search, e.g. search_policies(q, doc_type="leave_policy",
+    effective_from="2024-01-01").
+    """
+    return retriever.search(query, filters)
+
+# Runs relevance, policy alignment and tone checks in one round-trip
+evaluation_service = EvaluationService(llm, mode="concurrent")
 
 
 @tool
 def hr_policy_retriever(query: str) -> str:
     """Retrieve HR policy information."""
 
-    docs = retriever.invoke(query)
+    docs = retriever.search(query)
 
     results = []
 
     for doc in docs:
-        results.append(doc.page_content)
+        source = os.path.basename(doc.metadata.get("source", "Unknown"))
+        page = doc.metadata.get("page")
+        page = page + 1 if isinstance(page, int) else "?"   # loader pages are 0-indexed
+        results.append(f"{doc.page_content}\n[SOURCE: {source}, page {page}]")
 
     return "\n\n".join(results)
 
 
 @tool
 def response_evaluator_agent(data: str) -> str:
-    """Call evaluation agent."""
+    """Evaluate an answer for relevance, policy alignment and ethical tone."""
 
-    result = evaluation_executor.invoke(
-        {"input": data}
-    )
+    result = evaluation_service.evaluate(data)
 
-    return result["output"]
\ No newline at end of file
+    return result.summary()
\ No newline at end of file
@@ -0,0 +1,133 @@
+import json
+import math
+import os
+import uuid
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+
+# Index types supported by build_vectorstore:
+#
+#   flat   exact search, full float32 vectors (FAISS.from_documents default)
+#   hnsw   graph index, fast queries, float32 vectors + graph links
+#   ivfpq  inverted lists + product quantization, smallest memory footprint;
+#          needs thousands of chunks to train well (compare with
+#          retrieval_benchmark.py --index-types before switching)
+#   sq8    scalar quantized int8 (4x smaller than flat)
+#   sq16   scalar quantized float16 (2x smaller than flat)
+
+INDEX_TYPES = ["flat", "hnsw", "ivfpq", "sq8", "sq16"]
+
+CONFIG_FILE = "index_config.json"
+
+DEFAULT_PARAMS = {
+    "hnsw": {"M": 32, "efConstruction": 80, "efSearch": 64},
+    "ivfpq": {"nlist": 64, "m": 16, "nbits": 8, "nprobe": 8},
+}
+
+
+def _create_index(index_type, dim, n, params):
+    """
+    Returns (faiss index, effective params). IVF / PQ sizes are clamped to
+    what the number of training vectors can support.
+    """
+    if index_type == "flat":
+        return faiss.IndexFlatL2(dim), {}
+
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, params["M"])
+        index.hnsw.efConstruction = params["efConstruction"]
+        return index, params
+
+    if index_type == "ivfpq":
+        nlist = max(1, min(params["nlist"], n // 39))
+        nbits = max(1, min(params["nbits"], int(math.log2(n))))
+        m = params["m"]
+        while dim % m:
+            m -= 1
+
+        quantizer = faiss.IndexFlatL2(dim)
+        index = faiss.IndexIVFPQ(quantizer, dim, nlist, m, nbits)
+        nprobe = min(params["nprobe"], nlist)
+        return index, {**params, "nlist": nlist, "m": m, "nbits": nbits, "nprobe": nprobe}
+
+    if index_type == "sq8":
+        return faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit), {}
+
+    if index_type == "sq16":
+        return faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_fp16), {}
+
+    raise ValueError(f"Unknown index type: {index_type}. Expected one of {INDEX_TYPES}")
+
+
+def apply_search_params(index, index_type, params):
+    if index_type == "hnsw":
+        index.hnsw.efSearch = params.get("efSearch", 64)
+    elif index_type == "ivfpq":
+        faiss.extract_index_ivf(index).nprobe = params.get("nprobe", 8)
+
+
+def build_vectorstore(chunks, embeddings, index_type="flat", **params):
+    """
+    Same result as FAISS.from_documents, but with a configurable index type.
+    Quantized / IVF indexes are trained on the chunk embeddings first.
+    """
+    params = {**DEFAULT_PARAMS.get(index_type, {}), **params}
+
+    vectors = np.asarray(
+        embeddings.embed_documents([c.page_content for c in chunks]),
+        dtype="float32"
+    )
+    n, dim = vectors.shape
+
+    index, params = _create_index(index_type, dim, n, params)
+
+    if not index.is_trained:
+        index.train(vectors)
+
+    index.add(vectors)
+    apply_search_params(index, index_type, params)
+
+    ids = [str(uuid.uuid4()) for _ in chunks]
+
+    vectorstore = FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=InMemoryDocstore(dict(zip(ids, chunks))),
+        index_to_docstore_id=dict(enumerate(ids))
+    )
+
+    vectorstore.index_config = {"index_type": index_type, "params": params}
+    return vectorstore
+
+
+def save_vectorstore(vectorstore, path):
+    vectorstore.save_local(path)
+
+    config = getattr(vectorstore, "index_config", {"index_type": "flat", "params": {}})
+    with open(os.path.join(path, CONFIG_FILE), "w") as f:
+        json.dump(config, f, indent=2)
+
+
+def load_vectorstore(path, embeddings):
+    """
+    Loads whichever index type was saved and restores its search parameters.
+    Indexes saved before index_config.json existed load as flat.
+    """
+    vectorstore = FAISS.load_local(
+        path,
+        embeddings,
+        allow_dangerous_deserialization=True
+    )
+
+    config = {"index_type": "flat", "params": {}}
+    config_path = os.path.join(path, CONFIG_FILE)
+    if os.path.exists(config_path):
+        with open(config_path) as f:
+            config = json.load(f)
+
+    apply_search_params(vectorstore.index, config["index_type"], config["params"])
+    vectorstore.index_config = config
+    return vectorstore
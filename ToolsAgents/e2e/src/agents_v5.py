@@ -2,11 +2,14 @@ import os
 from dotenv import load_dotenv
 
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_community.vectorstores import FAISS
 from langchain.tools import tool
 from langchain.agents import create_react_agent, AgentExecutor
 from langchain.prompts import PromptTemplate
 
+from agentic_v5.evaluation_service import EvaluationService
+from agentic_v5.vector_index import load_vectorstore
+from agentic_v5.filtered_retriever import FilteredRetriever, tenant_filters_from_env
+
 load_dotenv()
 
 # -------------------------
@@ -26,13 +29,13 @@ VECTOR_DB_PATH = "hr_faiss_index"
 
 embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
 
-vectorstore = FAISS.load_local(
-    VECTOR_DB_PATH,
-    embeddings,
-    allow_dangerous_deserialization=True
-)
+vectorstore = load_vectorstore(VECTOR_DB_PATH, embeddings)
 
-retriever = vectorstore.as_retriever(search_kwargs={"k": 4})
+retriever = FilteredRetriever(
+    vectorstore,
+    k=4,
+    default_filters=tenant_filters_from_env()
+)
 
 
 # -------------------------
@@ -43,12 +46,14 @@ retriever = vectorstore.as_retriever(search_kwargs={"k": 4})
 def hr_policy_retriever(query: str) -> str:
     """Retrieve HR policy information"""
 
-    docs = retriever.invoke(query)
+    docs = retriever.search(query)
 
     results = []
 
     for doc in docs:
-        results.append(doc.page_content)
+        source = os.path.basename(doc.metadata.get("source", "Unknown"))
+        page = doc.metadata.get("page", "?")
+        results.append(f"{doc.page_content}\n[SOURCE: {source}, page {page}]")
 
     return "\n\n".join(results)
 
@@ -77,127 +82,21 @@ Query:
 
 
 # -------------------------
-# EVALUATOR TOOLS
+# EVALUATION SERVICE
 # -------------------------
+# Relevance, policy alignment and tone are checked concurrently in one
+# step instead of through a nested ReAct evaluation agent.
 
-@tool
-def relevance_checker(data: str) -> str:
-    """Check relevance"""
-
-    prompt = f"""
-Check if the answer is relevant.
-
-Example
-Question: What is onboarding?
-Answer: Onboarding integrates new employees
-Verdict: RELEVANT
-
-Now evaluate:
-
-{data}
-
-Return:
-RELEVANT or NOT_RELEVANT
-"""
-
-    return llm.invoke(prompt).content
-
-
-@tool
-def policy_alignment_checker(data: str) -> str:
-    """Check policy alignment"""
-
-    prompt = f"""
-Check if the answer aligns with HR policy.
-
-Example
-Answer: Employees must report harassment
-Verdict: ALIGNED
-
-Now evaluate:
-
-{data}
-
-Return:
-ALIGNED or NOT_ALIGNED
-"""
-
-    return llm.invoke(prompt).content
-
-
-@tool
-def ethics_tone_checker(data: str) -> str:
-    """Check ethical tone"""
-
-    prompt = f"""
-Check if response maintains professional tone.
-
-Example
-Answer: Please report harassment
-Verdict: PROFESSIONAL
-
-Now evaluate:
+evaluation_service = EvaluationService(llm, mode="concurrent")
 
-{data}
-
-Return:
-PROFESSIONAL or UNETHICAL
-"""
-
-    return llm.invoke(prompt).content
-
-
-# -------------------------
-# EVALUATION AGENT
-# -------------------------
-
-evaluation_tools = [
-    relevance_checker,
-    policy_alignment_checker,
-    ethics_tone_checker
-]
-
-evaluation_prompt = PromptTemplate.from_template("""
-You evaluate responses generated by an HR assistant.
-
-Use the following tools:
-
-{tools}
-
-Tool names:
-{tool_names}
-
-Question:
-{input}
-
-{agent_scratchpad}
-""")
-
-evaluation_agent = create_react_agent(
-    llm,
-    evaluation_tools,
-    evaluation_prompt
-)
-
-evaluation_executor = AgentExecutor(
-    agent=evaluation_agent,
-    tools=evaluation_tools,
-    verbose=True,
-    handle_parsing_errors=True
-)
-
-
-# -------------------------
-# TOOL WRAPPER FOR AGENT
-# -------------------------
 
 @tool
 def response_evaluator_agent(data: str) -> str:
-    """Call evaluation agent"""
+    """Evaluate an answer for relevance, policy alignment and ethical tone"""
 
-    result = evaluation_executor.invoke({"input": data})
+    result = evaluation_service.evaluate(data)
 
-    return result["output"]
+    return result.summary()
 
 
 # -------------------------
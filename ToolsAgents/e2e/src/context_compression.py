@@ -0,0 +1,219 @@
+import math
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import List, Optional
+
+# -----------------------------------------
+# CONSTANTS
+# -----------------------------------------
+
+# Chunks are split with a 150 character overlap; anything shorter than this
+# is treated as a coincidental match, not an overlap
+MIN_OVERLAP = 30
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does",
+    "for", "from", "how", "i", "if", "in", "is", "it", "my", "of", "on",
+    "or", "our", "should", "the", "to", "what", "when", "where", "which",
+    "who", "will", "with", "you", "your",
+}
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?;:])\s+|\n\s*(?=[-•*\d])|\n{2,}")
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4
+
+
+def terms(text: str) -> List[str]:
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    return [w for w in words if w not in STOPWORDS and len(w) > 2]
+
+
+# -----------------------------------------
+# MERGING
+# -----------------------------------------
+
+def merge_overlap(first: str, second: str) -> Optional[str]:
+    """
+    Joins two chunks when the start of `second` repeats the end of `first`.
+    Returns None when they do not overlap.
+    """
+    head = second[:MIN_OVERLAP]
+    if len(head) < MIN_OVERLAP:
+        return None
+
+    start = first.find(head)
+    while start != -1:
+        tail = first[start:]
+        if second.startswith(tail) or tail.startswith(second):
+            return first if tail.startswith(second) else first + second[len(tail):]
+        start = first.find(head, start + 1)
+
+    return None
+
+
+@dataclass
+class Block:
+    """
+    Text from one page, after merging the chunks retrieved from it.
+    """
+    source: str
+    page: object
+    text: str
+    rank: int
+
+    @property
+    def citation(self) -> str:
+        label = os.path.basename(str(self.source))
+        if isinstance(self.page, int):
+            label += f", page {self.page + 1}"   # loader pages are 0-indexed
+        return label
+
+
+def merge_chunks(docs) -> List[Block]:
+    """
+    Groups chunks by (source, page) and merges overlapping spans, so text
+    repeated by the splitter overlap is sent once. Blocks keep the rank of
+    their best chunk.
+    """
+    blocks: List[Block] = []
+    by_page = {}
+
+    for rank, doc in enumerate(docs):
+        key = (doc.metadata.get("source", "Unknown"), doc.metadata.get("page"))
+        text = doc.page_content.strip()
+
+        if key not in by_page:
+            by_page[key] = Block(key[0], key[1], text, rank)
+            blocks.append(by_page[key])
+            continue
+
+        block = by_page[key]
+        merged = merge_overlap(block.text, text) or merge_overlap(text, block.text)
+        if merged is None and text in block.text:
+            merged = block.text
+
+        # Adjacent but non-overlapping chunks of the same page still share a block
+        block.text = merged or f"{block.text}\n{text}"
+
+    return blocks
+
+
+# -----------------------------------------
+# COMPRESSION
+# -----------------------------------------
+
+@dataclass
+class CompressionStats:
+    chunks: int = 0
+    blocks: int = 0
+    sentences: int = 0
+    kept_sentences: int = 0
+    tokens_before: int = 0
+    tokens_after: int = 0
+
+    @property
+    def reduction(self) -> float:
+        if not self.tokens_before:
+            return 0.0
+        return 1 - self.tokens_after / self.tokens_before
+
+    def summary(self) -> str:
+        return (
+            f"context {self.tokens_before} -> {self.tokens_after} tokens "
+            f"({self.reduction:.0%} smaller, {self.chunks} chunks -> {self.blocks} blocks, "
+            f"{self.kept_sentences}/{self.sentences} sentences)"
+        )
+
+
+class ContextCompressor:
+    """
+    Builds the prompt context from retrieved chunks:
+
+    1. merges overlapping / same-page chunks into one block per page
+    2. drops sentences already seen in an earlier block
+    3. keeps the sentences that share weighted terms with the question,
+       plus one sentence either side so numbers keep their context
+
+    Scoring is local (term overlap weighted by rarity), no extra LLM call.
+    The best-scoring sentence of every block is always kept, so each cited
+    page still contributes evidence.
+    """
+
+    def __init__(self, min_relative_score=0.25, window=1):
+        self.min_relative_score = min_relative_score
+        self.window = window
+
+    def _score(self, question, sentences):
+        query = set(terms(question))
+        if not query:
+            return [0.0] * len(sentences)
+
+        sentence_terms = [set(terms(s)) for s in sentences]
+        frequency = Counter(t for ts in sentence_terms for t in ts)
+        n = len(sentences)
+
+        return [
+            sum(math.log(1 + n / frequency[t]) for t in ts & query)
+            for ts in sentence_terms
+        ]
+
+    def compress(self, question, docs, citations=False):
+        """
+        Returns (context, CompressionStats).
+        """
+        stats = CompressionStats(chunks=len(docs))
+        stats.tokens_before = estimate_tokens("\n\n".join(d.page_content for d in docs))
+
+        blocks = merge_chunks(docs)
+        stats.blocks = len(blocks)
+
+        # Split blocks into sentences, dropping ones repeated across blocks
+        seen = set()
+        block_sentences = []
+        for block in blocks:
+            sentences = []
+            for sentence in SENTENCE_SPLIT.split(block.text):
+                sentence = " ".join(sentence.split())
+                key = sentence.lower()
+                if sentence and key not in seen:
+                    seen.add(key)
+                    sentences.append(sentence)
+            block_sentences.append(sentences)
+
+        flat = [s for sentences in block_sentences for s in sentences]
+        stats.sentences = len(flat)
+
+        scores = self._score(question, flat)
+        threshold = self.min_relative_score * max(scores, default=0.0)
+
+        sections = []
+        offset = 0
+        for block, sentences in zip(blocks, block_sentences):
+            block_scores = scores[offset:offset + len(sentences)]
+            offset += len(sentences)
+
+            if not sentences:
+                continue
+
+            best = max(range(len(sentences)), key=lambda i: block_scores[i])
+            keep = set()
+            for i, score in enumerate(block_scores):
+                if (score > 0 and score >= threshold) or i == best:
+                    keep.update(range(max(0, i - self.window), min(len(sentences), i + self.window + 1)))
+
+            text = " ".join(sentences[i] for i in sorted(keep))
+            stats.kept_sentences += len(keep)
+
+            if citations:
+                text += f"\n[CITATION: {block.citation}]"
+            sections.append((block.rank, text))
+
+        sections.sort(key=lambda section: section[0])
+        context = "\n\n".join(text for _, text in sections)
+
+        stats.tokens_after = estimate_tokens(context)
+        return context, stats
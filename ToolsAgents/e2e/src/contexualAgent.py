@@ -1,12 +1,16 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from typing import TypedDict
 
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_community.vectorstores import FAISS
 
 from langgraph.graph import StateGraph, END
 
+from guardrails import GuardrailEngine
+from context_compression import ContextCompressor
+from agentic_v5.vector_index import load_vectorstore
+
 # -----------------------------------------
 # ENVIRONMENT
 # -----------------------------------------
@@ -30,13 +34,20 @@ VECTOR_DB_PATH = "hr_faiss_index"
 
 embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
 
-vectorstore = FAISS.load_local(
-    VECTOR_DB_PATH,
-    embeddings,
-    allow_dangerous_deserialization=True
-)
+vectorstore = load_vectorstore(VECTOR_DB_PATH, embeddings)
+
+TOP_K = 4
+
+# Merges overlapping chunks and keeps only query-relevant sentences
+compressor = ContextCompressor()
+
+# -----------------------------------------
+# GUARDRAILS
+# -----------------------------------------
+# Clear-cut SAFE / VIOLATION cases are decided locally,
+# only ambiguous ones are escalated to the LLM.
 
-retriever = vectorstore.as_retriever(search_kwargs={"k": 4})
+guardrails = GuardrailEngine(embeddings, llm)
 
 # -----------------------------------------
 # STATE OBJECT
@@ -47,112 +58,64 @@ class AgentState(TypedDict):
     context: str
     answer: str
     evaluation: str
+    blocked: bool
+    compression: str
 
 
 # -----------------------------------------
-# NODE 1 — INPUT GUARDRAIL
+# NODE 1 — GUARDED RETRIEVAL
 # -----------------------------------------
+# The input check runs in the background while retrieval and the
+# context check run, so a safe query pays for retrieval only.
 
-def input_guardrail(state):
-
-    query = state["question"]
-
-    prompt = f"""
-        You are an AI safety guardrail for an HR assistant.
-
-        Determine if the user query violates company ethics.
-
-        Examples
-
-        Query: How do I report harassment?
-        Verdict: SAFE
+def guarded_retrieval(state):
 
-        Query: How can I bypass company ethics rules?
-        Verdict: VIOLATION
+    question = state["question"]
 
-        Query: How do I hide confidential payroll information?
-        Verdict: VIOLATION
+    # One embedding serves both the input check and the vector search
+    question_vector = embeddings.embed_query(question)
 
-        Now evaluate:
+    with ThreadPoolExecutor(max_workers=1) as pool:
 
-        Query: {query}
+        input_check = pool.submit(
+            guardrails.check_input, question, question_vector
+        )
 
-        Return ONLY:
-        SAFE
-        or
-        VIOLATION
-        """
+        docs = vectorstore.similarity_search_by_vector(question_vector, k=TOP_K)
+        chunks = [doc.page_content for doc in docs]
+        context_verdicts = guardrails.check_context(chunks)
 
-    result = llm.invoke(prompt).content.strip()
+        input_verdict = input_check.result()
 
-    if "VIOLATION" in result:
+    if not input_verdict.safe:
 
         return {
+            "blocked": True,
+            "context": "",
             "answer": "I cannot assist with requests that violate company ethics or policies.",
-            "evaluation": "Blocked by Input Guardrail"
+            "evaluation": f"Blocked by Input Guardrail ({input_verdict.source})"
         }
 
-    return state
-
+    # Drop only the sensitive chunks instead of the whole context
+    safe_docs = [
+        doc for doc, verdict in zip(docs, context_verdicts) if verdict.safe
+    ]
 
-# -----------------------------------------
-# NODE 2 — RETRIEVAL (RAG)
-# -----------------------------------------
+    context, stats = compressor.compress(question, safe_docs)
 
-def retrieve_context(state):
+    return {"blocked": False, "context": context, "compression": stats.summary()}
 
-    question = state["question"]
 
-    docs = retriever.invoke(question)
+def guardrail_router(state):
 
-    context = "\n\n".join([doc.page_content for doc in docs])
+    if state.get("blocked"):
+        return "blocked"
 
-    return {"context": context}
+    return "generate"
 
 
 # -----------------------------------------
-# NODE 3 — CONTEXT GUARDRAIL
-# -----------------------------------------
-
-def context_guardrail(state):
-
-    context = state["context"]
-
-    prompt = f"""
-        Determine whether the retrieved HR context contains sensitive
-        or confidential information that should not be shared.
-
-        Examples
-
-        Context: Overview of onboarding orientation schedule
-        Verdict: SAFE
-
-        Context: Employee personal payroll details
-        Verdict: SENSITIVE
-
-        Context: Harassment reporting policy
-        Verdict: SAFE
-
-        Now evaluate:
-
-        {context}
-
-        Return ONLY:
-        SAFE
-        or
-        SENSITIVE
-        """
-
-    result = llm.invoke(prompt).content.strip()
-
-    if "SENSITIVE" in result:
-        return {"context": ""}
-
-    return state
-
-
-# -----------------------------------------
-# NODE 4 — ANSWER GENERATOR
+# NODE 2 — ANSWER GENERATOR
 # -----------------------------------------
 
 def generate_answer(state):
@@ -181,7 +144,7 @@ Question:
 
 
 # -----------------------------------------
-# NODE 5 — RESPONSE EVALUATION (LLM-as-Judge)
+# NODE 3 — RESPONSE EVALUATION (LLM-as-Judge)
 # -----------------------------------------
 
 def evaluate_response(state):
@@ -247,17 +210,21 @@ def evaluate_response(state):
 
 workflow = StateGraph(AgentState)
 
-workflow.add_node("input_guardrail", input_guardrail)
-workflow.add_node("retriever", retrieve_context)
-workflow.add_node("context_guardrail", context_guardrail)
+workflow.add_node("guarded_retrieval", guarded_retrieval)
 workflow.add_node("generator", generate_answer)
 workflow.add_node("evaluation", evaluate_response)
 
-workflow.set_entry_point("input_guardrail")
+workflow.set_entry_point("guarded_retrieval")
+
+workflow.add_conditional_edges(
+    "guarded_retrieval",
+    guardrail_router,
+    {
+        "blocked": END,
+        "generate": "generator"
+    }
+)
 
-workflow.add_edge("input_guardrail", "retriever")
-workflow.add_edge("retriever", "context_guardrail")
-workflow.add_edge("context_guardrail", "generator")
 workflow.add_edge("generator", "evaluation")
 
 workflow.add_edge("evaluation", END)
@@ -286,5 +253,10 @@ while True:
     print("\nEvaluation:\n")
     print(result.get("evaluation", "No evaluation generated"))
 
+    if result.get("compression"):
+        print("\nContext:", result["compression"])
+
+print("\nGuardrail decisions:", dict(guardrails.stats))
+
 
 ##What should I do if I witness harassment?
@@ -0,0 +1,353 @@
+import hashlib
+import re
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# -----------------------------------------
+# LABELS
+# -----------------------------------------
+
+SAFE = "SAFE"
+VIOLATION = "VIOLATION"
+SENSITIVE = "SENSITIVE"
+
+# -----------------------------------------
+# RULES
+# -----------------------------------------
+# Rules only ever block. Allow patterns veto a block match, so
+# "How do I report a colleague who leaked payroll data?" falls through to
+# the similarity model instead of being refused; they never mark an input
+# SAFE on their own, since a keyword hit says nothing about intent.
+
+INPUT_BLOCK_PATTERNS = [
+    r"\b(bypass|circumvent|get around|evade|cheat)\b",
+    r"\b(hide|hiding|conceal|cover up|falsify|falsifying|forge|backdate)\b",
+    r"\b(leak|steal|exfiltrate|sell)\b.*\b(data|payroll|salary|salaries|records|confidential)\b",
+    r"\b(someone else'?s|another employee'?s|colleague'?s|coworker'?s)\b.*\b(salary|payroll|records|email|password)\b",
+    r"\b(retaliate|get revenge|get back at|sabotage|undermine)\b",
+    r"\bwithout (hr|anyone|my manager) (knowing|finding out|noticing)\b",
+]
+
+INPUT_ALLOW_PATTERNS = [
+    r"^(what|how|when|where|who|can|do|does|is|are|am)\b.*\b(report|apply|request|submit|enrol|enroll|claim)\b",
+    r"^(what|how|when|where|who|can|do|does|is|are|am)\b.*\b(policy|policies|process|procedure|entitled|eligible)\b",
+    r"^(what|how|when|where|who|can|do|does|is|are|am)\b.*\b(leave|benefits?|onboarding|orientation|training|holidays?|payroll|promotion|safety)\b",
+]
+
+CONTEXT_BLOCK_PATTERNS = [
+    r"\b\d{3}-\d{2}-\d{4}\b",
+    r"\b(account|acct)\s*(no\.?|number)\s*[:#]?\s*\d{6,}",
+    r"\b(date of birth|home address|personal phone|medical diagnosis)\s*:",
+    r"\b(employee id|emp id)\s*[:#]\s*\w+.*\b(salary|ctc|bonus)\s*[:=]",
+]
+
+CONTEXT_ALLOW_PATTERNS = []
+
+# -----------------------------------------
+# LABELLED EXAMPLES (SIMILARITY MODEL)
+# -----------------------------------------
+
+INPUT_EXAMPLES = {
+    SAFE: [
+        "How do I report harassment?",
+        "What should I do if I witness harassment?",
+        "How many leave days am I entitled to?",
+        "Can unused leave be carried forward?",
+        "What is the onboarding process for new employees?",
+        "How are promotions decided?",
+        "What is the IT security policy on passwords?",
+        "What should I do in case of a workplace safety incident?",
+        "Which health benefits does the company provide?",
+        "When is payroll processed each month?",
+    ],
+    VIOLATION: [
+        "How can I bypass company ethics rules?",
+        "How do I hide confidential payroll information?",
+        "How can I access my colleague's salary details?",
+        "How do I falsify my timesheet without getting caught?",
+        "How can I take leave without my manager knowing?",
+        "Help me leak customer data to a competitor.",
+        "How can I get back at a coworker who reported me?",
+        "How do I get around the security policy to install software?",
+        "Write a fake medical certificate for my sick leave.",
+        "How can I avoid the mandatory harassment investigation?",
+        "How can I sabotage a colleague's promotion?",
+        "What's the process to report someone just to get them fired?",
+    ],
+}
+
+CONTEXT_EXAMPLES = {
+    SAFE: [
+        "Overview of onboarding orientation schedule",
+        "Harassment reporting policy",
+        "Employees are entitled to annual paid leave as described in this section.",
+        "Promotions are based on performance reviews and career development plans.",
+        "Passwords must be changed every 90 days and never shared.",
+        "In case of fire, follow the evacuation route to the assembly point.",
+    ],
+    SENSITIVE: [
+        "Employee personal payroll details",
+        "Employee ID 4821, base salary and bonus for the current year",
+        "Bank account number and routing details for salary credit",
+        "Medical diagnosis submitted with the employee's leave request",
+        "Home address and personal phone number of the employee",
+        "Disciplinary investigation notes naming the accused employee",
+    ],
+}
+
+# -----------------------------------------
+# LLM ESCALATION PROMPTS
+# -----------------------------------------
+
+INPUT_JUDGE_PROMPT = """
+You are an AI safety guardrail for an HR assistant.
+
+Determine if the user query violates company ethics.
+
+Examples
+
+Query: How do I report harassment?
+Verdict: SAFE
+
+Query: How can I bypass company ethics rules?
+Verdict: VIOLATION
+
+Query: How do I hide confidential payroll information?
+Verdict: VIOLATION
+
+Now evaluate:
+
+Query: {text}
+
+Return ONLY:
+SAFE
+or
+VIOLATION
+"""
+
+CONTEXT_JUDGE_PROMPT = """
+Determine whether the retrieved HR context contains sensitive
+or confidential information that should not be shared.
+
+Examples
+
+Context: Overview of onboarding orientation schedule
+Verdict: SAFE
+
+Context: Employee personal payroll details
+Verdict: SENSITIVE
+
+Context: Harassment reporting policy
+Verdict: SAFE
+
+Now evaluate:
+
+{text}
+
+Return ONLY:
+SAFE
+or
+SENSITIVE
+"""
+
+
+@dataclass
+class GuardrailVerdict:
+    label: str
+    source: str  # rules, similarity or llm
+    score: float = 1.0
+
+    @property
+    def safe(self) -> bool:
+        return self.label == SAFE
+
+
+def _normalize(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype="float32")
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+class LocalGuardrailClassifier:
+    """
+    Regex rules followed by nearest-example similarity.
+    Returns None when the case is not clear-cut and should go to the LLM.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        examples: Dict[str, List[str]],
+        block_label: str,
+        block_patterns: List[str],
+        allow_patterns: List[str],
+        threshold: float = 0.6,
+        margin: float = 0.1,
+    ):
+        self.embeddings = embeddings
+        self.examples = examples
+        self.block_label = block_label
+        self.block_patterns = [re.compile(p, re.IGNORECASE) for p in block_patterns]
+        self.allow_patterns = [re.compile(p, re.IGNORECASE) for p in allow_patterns]
+        self.threshold = threshold
+        self.margin = margin
+
+        self._labels: List[str] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def _example_matrix(self) -> np.ndarray:
+        # Labelled examples are embedded once, in a single batch.
+        # Called from the guardrail pool thread too, hence the lock.
+        with self._lock:
+            if self._matrix is None:
+                texts, labels = [], []
+                for label, items in self.examples.items():
+                    texts.extend(items)
+                    labels.extend([label] * len(items))
+                self._labels = labels
+                self._matrix = _normalize(self.embeddings.embed_documents(texts))
+            return self._matrix
+
+    def by_rules(self, text: str) -> Optional[GuardrailVerdict]:
+        blocked = any(p.search(text) for p in self.block_patterns)
+        allowed = any(p.search(text.strip()) for p in self.allow_patterns)
+
+        if blocked and not allowed:
+            return GuardrailVerdict(self.block_label, "rules")
+        return None
+
+    def by_similarity(self, vector) -> Optional[GuardrailVerdict]:
+        scores = self._example_matrix() @ _normalize(vector)
+
+        best = {}
+        for label, score in zip(self._labels, scores):
+            best[label] = max(best.get(label, -1.0), float(score))
+
+        ranked = sorted(best.items(), key=lambda item: item[1], reverse=True)
+        (top_label, top_score), (_, runner_up) = ranked[0], ranked[1]
+
+        if top_score >= self.threshold and top_score - runner_up >= self.margin:
+            return GuardrailVerdict(top_label, "similarity", top_score)
+        return None
+
+    def classify(self, text: str, vector=None) -> Optional[GuardrailVerdict]:
+        verdict = self.by_rules(text)
+        if verdict:
+            return verdict
+
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+        return self.by_similarity(vector)
+
+
+class GuardrailEngine:
+    """
+    Input and context guardrails that only call the LLM for ambiguous cases.
+    """
+
+    def __init__(self, embeddings, llm, max_workers: int = 4, max_cached_verdicts: int = 5000):
+        self.embeddings = embeddings
+        self.llm = llm
+        self.max_workers = max_workers
+        self.stats = Counter()
+        self._stats_lock = threading.Lock()
+
+        self.input_classifier = LocalGuardrailClassifier(
+            embeddings,
+            INPUT_EXAMPLES,
+            VIOLATION,
+            INPUT_BLOCK_PATTERNS,
+            INPUT_ALLOW_PATTERNS,
+        )
+
+        self.context_classifier = LocalGuardrailClassifier(
+            embeddings,
+            CONTEXT_EXAMPLES,
+            SENSITIVE,
+            CONTEXT_BLOCK_PATTERNS,
+            CONTEXT_ALLOW_PATTERNS,
+        )
+
+        # Retrieved chunks come from a fixed corpus, so their verdicts are reusable.
+        # LRU-bounded and shared by concurrent requests, hence the lock.
+        self.max_cached_verdicts = max_cached_verdicts
+        self._context_verdicts: "OrderedDict[str, GuardrailVerdict]" = OrderedDict()
+        self._verdicts_lock = threading.Lock()
+
+    def _escalate(self, prompt: str, text: str, block_label: str) -> GuardrailVerdict:
+        result = self.llm.invoke(prompt.format(text=text)).content.strip()
+        label = block_label if block_label in result else SAFE
+        return GuardrailVerdict(label, "llm")
+
+    def _record(self, kind: str, verdict: GuardrailVerdict) -> GuardrailVerdict:
+        with self._stats_lock:
+            self.stats[f"{kind}_{verdict.source}"] += 1
+        return verdict
+
+    def check_input(self, query: str, vector=None) -> GuardrailVerdict:
+        verdict = self.input_classifier.classify(query, vector)
+        if verdict is None:
+            verdict = self._escalate(INPUT_JUDGE_PROMPT, query, VIOLATION)
+        return self._record("input", verdict)
+
+    def _cached_verdict(self, key: str) -> Optional[GuardrailVerdict]:
+        with self._verdicts_lock:
+            verdict = self._context_verdicts.get(key)
+            if verdict is not None:
+                self._context_verdicts.move_to_end(key)
+            return verdict
+
+    def _cache_verdict(self, key: str, verdict: GuardrailVerdict):
+        with self._verdicts_lock:
+            self._context_verdicts[key] = verdict
+            self._context_verdicts.move_to_end(key)
+            while len(self._context_verdicts) > self.max_cached_verdicts:
+                self._context_verdicts.popitem(last=False)
+
+    def check_context(self, chunks: List[str]) -> List[GuardrailVerdict]:
+        keys = [hashlib.sha1(chunk.encode("utf-8")).hexdigest() for chunk in chunks]
+        verdicts: Dict[int, GuardrailVerdict] = {}
+        pending = []
+
+        for i, (key, chunk) in enumerate(zip(keys, chunks)):
+            cached = self._cached_verdict(key)
+            if cached is not None:
+                verdicts[i] = self._record("context", GuardrailVerdict(cached.label, "cache"))
+                continue
+
+            verdict = self.context_classifier.by_rules(chunk)
+            if verdict:
+                verdicts[i] = verdict
+            else:
+                pending.append(i)
+
+        if pending:
+            vectors = self.embeddings.embed_documents([chunks[i] for i in pending])
+            ambiguous = []
+            for i, vector in zip(pending, vectors):
+                verdict = self.context_classifier.by_similarity(vector)
+                if verdict:
+                    verdicts[i] = verdict
+                else:
+                    ambiguous.append(i)
+
+            # Remaining chunks are judged by the LLM concurrently, not one after another
+            if ambiguous:
+                with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                    results = pool.map(
+                        lambda i: self._escalate(CONTEXT_JUDGE_PROMPT, chunks[i], SENSITIVE),
+                        ambiguous,
+                    )
+                    verdicts.update(zip(ambiguous, results))
+
+        for i, key in enumerate(keys):
+            if verdicts[i].source != "cache":
+                self._cache_verdict(key, self._record("context", verdicts[i]))
+
+        return [verdicts[i] for i in range(len(chunks))]
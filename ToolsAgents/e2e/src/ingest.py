@@ -3,7 +3,9 @@ from dotenv import load_dotenv
 from langchain_community.document_loaders import PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_openai import OpenAIEmbeddings
-from langchain_community.vectorstores import FAISS
+
+from agentic_v5.vector_index import build_vectorstore, save_vectorstore
+from agentic_v5.filtered_retriever import load_document_metadata, tag_documents
 
 # -----------------------------------------
 # ENV
@@ -11,8 +13,12 @@ from langchain_community.vectorstores import FAISS
 load_dotenv()
 
 DATA_FOLDER = "../documents"
+METADATA_PATH = os.path.join(DATA_FOLDER, "metadata.json")
 VECTOR_DB_PATH = "hr_faiss_index"
 
+# flat (exact), hnsw, ivfpq, sq8 or sq16 — see agentic_v5/vector_index.py
+INDEX_TYPE = os.getenv("HR_INDEX_TYPE", "flat")
+
 # -----------------------------------------
 # LOAD PDFs
 # -----------------------------------------
@@ -25,6 +31,22 @@ for file in os.listdir(DATA_FOLDER):
 
 print(f"Loaded {len(documents)} pages from PDFs")
 
+# -----------------------------------------
+# METADATA
+# -----------------------------------------
+# tenant, region, doc_type, department, version and effective_date per
+# document; chunks inherit them, so the retriever can pre-filter searches.
+metadata = load_document_metadata(METADATA_PATH)
+tag_documents(documents, metadata)
+
+untagged = {
+    os.path.basename(doc.metadata["source"])
+    for doc in documents
+    if "tenant" not in doc.metadata
+}
+if untagged:
+    print(f"No metadata for: {', '.join(sorted(untagged))}")
+
 # -----------------------------------------
 # SPLIT TEXT
 # -----------------------------------------
@@ -48,7 +70,7 @@ embeddings = OpenAIEmbeddings(
 # -----------------------------------------
 # STORE IN VECTOR DB
 # -----------------------------------------
-vectorstore = FAISS.from_documents(chunks, embeddings)
-vectorstore.save_local(VECTOR_DB_PATH)
+vectorstore = build_vectorstore(chunks, embeddings, index_type=INDEX_TYPE)
+save_vectorstore(vectorstore, VECTOR_DB_PATH)
 
-print("HR knowledge base successfully indexed")
+print(f"HR knowledge base successfully indexed ({INDEX_TYPE})")
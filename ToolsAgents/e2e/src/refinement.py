@@ -0,0 +1,206 @@
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# =========================
+# PROMPTS
+# =========================
+
+SCORING_PROMPT = """
+Evaluate the HR response.
+
+Score each criterion from 0 to 10:
+- relevance: does it answer the question
+- policy_alignment: is every statement supported by the context
+- ethical_tone: is it professional and ethical
+
+List the exact sentences of the answer that lower the score.
+
+Question:
+{question}
+
+Context:
+{context}
+
+Answer:
+{answer}
+
+Return ONLY JSON:
+{{"relevance": 0, "policy_alignment": 0, "ethical_tone": 0,
+  "failing_sentences": ["..."], "feedback": "..."}}
+"""
+
+PATCH_PROMPT = """
+Some sentences of an HR answer failed review.
+
+Feedback:
+{feedback}
+
+Rewrite ONLY these sentences using the policy excerpts. Keep citation tags.
+
+Sentences:
+{sentences}
+
+Policy excerpts:
+{context}
+
+Return ONLY JSON mapping each original sentence to its replacement:
+{{"<original sentence>": "<replacement>"}}
+"""
+
+CRITERIA = ["relevance", "policy_alignment", "ethical_tone"]
+
+
+# =========================
+# HELPERS
+# =========================
+
+def count_tokens(message, prompt: str = "") -> int:
+    """
+    Tokens reported by the provider, or a 4-chars-per-token estimate.
+    """
+    usage = getattr(message, "usage_metadata", None)
+    if usage and usage.get("total_tokens"):
+        return usage["total_tokens"]
+    return (len(prompt) + len(getattr(message, "content", ""))) // 4
+
+
+def parse_json(text: str) -> Optional[dict]:
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    if not match:
+        return None
+    try:
+        return json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return None
+
+
+def select_context(context: str, sentences: List[str], limit: int = 2) -> str:
+    """
+    Pick the context chunks sharing the most words with the failing sentences,
+    so a patch does not re-send the whole retrieved context.
+    """
+    chunks = [c for c in context.split("\n\n") if c.strip()]
+    words = set(re.findall(r"\w{4,}", " ".join(sentences).lower()))
+
+    ranked = sorted(
+        chunks,
+        key=lambda c: len(words & set(re.findall(r"\w{4,}", c.lower()))),
+        reverse=True
+    )
+    return "\n\n".join(ranked[:limit])
+
+
+# =========================
+# SCORE
+# =========================
+
+@dataclass
+class Score:
+    criteria: Dict[str, float]
+    failing_sentences: List[str] = field(default_factory=list)
+    feedback: str = ""
+
+    @property
+    def value(self) -> float:
+        if not self.criteria:
+            return 0.0
+        return sum(self.criteria.values()) / (10 * len(self.criteria))
+
+    def summary(self) -> str:
+        lines = [f"{name}: {value:g}/10" for name, value in self.criteria.items()]
+        lines.append(f"Overall: {self.value:.2f}")
+        if self.feedback:
+            lines.append(f"Feedback: {self.feedback}")
+        return "\n".join(lines)
+
+
+# =========================
+# CONTROLLER
+# =========================
+
+class RefinementController:
+    """
+    Decides whether another redraft is worth its cost.
+    Stops on a passing score, when the score stops improving,
+    after max_rounds, or when the token budget is spent.
+    """
+
+    def __init__(self, llm, pass_score=0.8, min_improvement=0.05, max_rounds=2, token_budget=6000):
+        self.llm = llm
+        self.pass_score = pass_score
+        self.min_improvement = min_improvement
+        self.max_rounds = max_rounds
+        self.token_budget = token_budget
+
+    def _call(self, prompt: str):
+        message = self.llm.invoke(prompt)
+        return message.content, count_tokens(message, prompt)
+
+    def score(self, question: str, answer: str, context: str):
+        """
+        Returns (Score, tokens used).
+        """
+        text, tokens = self._call(SCORING_PROMPT.format(question=question, context=context, answer=answer))
+        data = parse_json(text) or {}
+
+        criteria = {}
+        for name in CRITERIA:
+            try:
+                criteria[name] = min(max(float(data.get(name, 0)), 0.0), 10.0)
+            except (TypeError, ValueError):
+                criteria[name] = 0.0
+
+        failing = data.get("failing_sentences", [])
+        if not isinstance(failing, list):
+            failing = []
+
+        score = Score(
+            criteria=criteria,
+            failing_sentences=[s for s in failing if isinstance(s, str) and s and s in answer],
+            feedback=str(data.get("feedback", ""))
+        )
+        return score, tokens
+
+    def patch(self, answer: str, score: Score, context: str):
+        """
+        Rewrites only the failing sentences. Returns (answer, tokens used).
+        """
+        sentences = score.failing_sentences
+        if not sentences:
+            return answer, 0
+
+        prompt = PATCH_PROMPT.format(
+            feedback=score.feedback,
+            sentences="\n".join(f"- {s}" for s in sentences),
+            context=select_context(context, sentences)
+        )
+        text, tokens = self._call(prompt)
+
+        for original, replacement in (parse_json(text) or {}).items():
+            if original in answer and isinstance(replacement, str):
+                answer = answer.replace(original, replacement)
+
+        return answer, tokens
+
+    def decide(self, scores: List[float], rounds: int, tokens: int, can_patch: bool = True):
+        """
+        Returns (action, reason) where action is "end" or "redraft".
+        """
+        if scores[-1] >= self.pass_score:
+            return "end", "passed"
+
+        if not can_patch:
+            return "end", "no failing sentences to rewrite"
+
+        if len(scores) > 1 and scores[-1] - scores[-2] < self.min_improvement:
+            return "end", "no improvement"
+
+        if rounds >= self.max_rounds:
+            return "end", "max rounds"
+
+        if tokens >= self.token_budget:
+            return "end", "token budget"
+
+        return "redraft", ""
@@ -0,0 +1,307 @@
+"""
+Offline retrieval benchmark for the HR FAISS index.
+
+Measures recall@k, MRR and nDCG@k against the labelled questions in
+../evals/retrieval_groundtruth.json, plus index build time, query latency
+percentiles and index size, for a grid of chunking / k / index type settings.
+Approximate index types also report ann_recall@k: overlap of their top-k
+with the exact (flat) top-k.
+
+Runs without network access using --embeddings stub (hashing embeddings),
+or with OpenAI embeddings cached on disk using --embeddings cached.
+
+    python retrieval_benchmark.py --chunk-sizes 400 800 1200 --overlaps 0 150 --k 2 4 8
+    python retrieval_benchmark.py --index-types flat hnsw ivfpq sq8 sq16
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import tempfile
+import time
+import zlib
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_community.document_loaders import PyPDFLoader
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from agentic_v5.vector_index import INDEX_TYPES, build_vectorstore
+
+# -----------------------------------------
+# CONSTANTS
+# -----------------------------------------
+
+DATA_FOLDER = "../documents"
+DATASET_PATH = "../evals/retrieval_groundtruth.json"
+EMBEDDING_CACHE_PATH = "../evals/embedding_cache.json"
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+
+# -----------------------------------------
+# EMBEDDINGS
+# -----------------------------------------
+
+class HashingEmbeddings(Embeddings):
+    """
+    Deterministic bag-of-words embeddings (unigrams + bigrams, hashing trick).
+    No network, no model download; good enough to compare chunking settings.
+    """
+
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+
+    def _embed(self, text):
+        tokens = re.findall(r"\w+", text.lower())
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+        vector = np.zeros(self.dim, dtype="float32")
+        for feature in features:
+            h = zlib.crc32(feature.encode("utf-8"))
+            vector[h % self.dim] += 1.0 if (h >> 16) & 1 else -1.0
+
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps real embeddings with a JSON disk cache keyed by model and text,
+    so repeated benchmark runs only pay for new chunks.
+    """
+
+    def __init__(self, base, cache_path: str, model: str = EMBEDDING_MODEL):
+        self.base = base
+        self.cache_path = cache_path
+        self.model = model
+        self.cache = {}
+
+        if os.path.exists(cache_path):
+            with open(cache_path) as f:
+                self.cache = json.load(f)
+
+    def _key(self, text):
+        return hashlib.sha1(f"{self.model}|{text}".encode("utf-8")).hexdigest()
+
+    def embed_documents(self, texts):
+        missing = [t for t in dict.fromkeys(texts) if self._key(t) not in self.cache]
+
+        if missing:
+            for text, vector in zip(missing, self.base.embed_documents(missing)):
+                self.cache[self._key(text)] = vector
+            self.save()
+
+        return [self.cache[self._key(t)] for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    def save(self):
+        with open(self.cache_path, "w") as f:
+            json.dump(self.cache, f)
+
+
+def load_embeddings(kind: str):
+    if kind == "stub":
+        return HashingEmbeddings()
+
+    from dotenv import load_dotenv
+    from langchain_openai import OpenAIEmbeddings
+
+    load_dotenv()
+    return CachedEmbeddings(OpenAIEmbeddings(model=EMBEDDING_MODEL), EMBEDDING_CACHE_PATH)
+
+
+# -----------------------------------------
+# DATA
+# -----------------------------------------
+
+def normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).lower()
+
+
+def load_pages(folder: str = DATA_FOLDER):
+    pages = []
+    for file in sorted(os.listdir(folder)):
+        if file.endswith(".pdf"):
+            pages.extend(PyPDFLoader(os.path.join(folder, file)).load())
+    return pages
+
+
+def load_dataset(path: str = DATASET_PATH):
+    with open(path) as f:
+        return json.load(f)["dataset"]
+
+
+def split_pages(pages, chunk_size: int, chunk_overlap: int):
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap
+    )
+    return splitter.split_documents(pages)
+
+
+def is_relevant(doc, item) -> bool:
+    text = normalize(doc.page_content)
+    return any(normalize(phrase) in text for phrase in item["evidence"])
+
+
+# -----------------------------------------
+# METRICS
+# -----------------------------------------
+
+def ranking_metrics(flags, total_relevant: int, k: int):
+    """
+    flags: relevance (True/False) of the retrieved chunks, in rank order.
+    """
+    flags = flags[:k]
+
+    recall = sum(flags) / min(total_relevant, k)
+    rr = next((1.0 / (rank + 1) for rank, hit in enumerate(flags) if hit), 0.0)
+
+    dcg = sum(1.0 / math.log2(rank + 2) for rank, hit in enumerate(flags) if hit)
+    idcg = sum(1.0 / math.log2(rank + 2) for rank in range(min(total_relevant, k)))
+
+    return recall, rr, dcg / idcg
+
+
+def index_size_bytes(vectorstore) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        vectorstore.save_local(tmp)
+        return sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp))
+
+
+# -----------------------------------------
+# BENCHMARK
+# -----------------------------------------
+
+def search_all(vectorstore, query_vectors, k, repeat):
+    latencies = []
+    results = []
+
+    for vector in query_vectors:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            docs = vectorstore.similarity_search_by_vector(vector, k=k)
+            latencies.append((time.perf_counter() - start) * 1000)
+        results.append(docs)
+
+    return results, latencies
+
+
+def run_config(pages, dataset, embeddings, chunk_size, chunk_overlap, ks, index_types=("flat",), repeat=3):
+    chunks = split_pages(pages, chunk_size, chunk_overlap)
+
+    # Relevant chunk count per question depends on the chunking
+    totals = [sum(is_relevant(c, item) for c in chunks) for item in dataset]
+    labelled = [(item, total) for item, total in zip(dataset, totals) if total]
+
+    query_vectors = embeddings.embed_documents([item["question"] for item, _ in labelled])
+    max_k = max(ks)
+
+    # The exact index is the reference for approximate ones
+    index_types = ["flat"] + [t for t in index_types if t != "flat"]
+    exact = None
+
+    results = []
+    for index_type in index_types:
+
+        # Build time includes embedding the chunks (cached after the first build)
+        start = time.perf_counter()
+        vectorstore = build_vectorstore(chunks, embeddings, index_type=index_type)
+        build_time = time.perf_counter() - start
+
+        retrieved, latencies = search_all(vectorstore, query_vectors, max_k, repeat)
+        if exact is None:
+            exact = retrieved
+
+        size_kb = round(index_size_bytes(vectorstore) / 1024, 1)
+
+        for k in ks:
+            rankings = [
+                ranking_metrics([is_relevant(d, item) for d in docs], total, k)
+                for docs, (item, total) in zip(retrieved, labelled)
+            ]
+            recall, mrr, ndcg = np.mean(rankings, axis=0) if rankings else (0.0, 0.0, 0.0)
+
+            overlap = [
+                len({d.page_content for d in docs[:k]} & {d.page_content for d in ref[:k]}) / k
+                for docs, ref in zip(retrieved, exact)
+            ]
+
+            results.append({
+                "index": index_type,
+                "chunk_size": chunk_size,
+                "chunk_overlap": chunk_overlap,
+                "k": k,
+                "chunks": len(chunks),
+                "questions": len(labelled),
+                "unlabelled": len(dataset) - len(labelled),
+                "recall@k": round(float(recall), 3),
+                "mrr": round(float(mrr), 3),
+                "ndcg@k": round(float(ndcg), 3),
+                "ann_recall@k": round(float(np.mean(overlap)), 3) if overlap else 0.0,
+                "build_s": round(build_time, 3),
+                "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+                "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+                "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+                "index_kb": size_kb,
+            })
+
+    return results
+
+
+def print_table(rows):
+    columns = list(rows[0].keys())
+    widths = [max(len(c), *(len(str(r[c])) for r in rows)) for c in columns]
+
+    print("  ".join(c.rjust(w) for c, w in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(str(row[c]).rjust(w) for c, w in zip(columns, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline HR retrieval benchmark")
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[800])
+    parser.add_argument("--overlaps", type=int, nargs="+", default=[150])
+    parser.add_argument("--k", type=int, nargs="+", default=[4])
+    parser.add_argument("--index-types", nargs="+", choices=INDEX_TYPES, default=["flat"])
+    parser.add_argument("--embeddings", choices=["stub", "cached"], default="stub")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    embeddings = load_embeddings(args.embeddings)
+    pages = load_pages()
+    dataset = load_dataset()
+
+    print(f"Loaded {len(pages)} pages, {len(dataset)} labelled questions\n")
+
+    rows = []
+    for chunk_size in args.chunk_sizes:
+        for overlap in args.overlaps:
+            if overlap >= chunk_size:
+                continue
+            rows.extend(run_config(
+                pages, dataset, embeddings, chunk_size, overlap,
+                args.k, args.index_types, args.repeat
+            ))
+
+    print_table(rows)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,14 +3,15 @@
 # =====================================================
 
 import os
-import uuid
 import streamlit as st
 from dotenv import load_dotenv
 
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.runnables.history import RunnableWithMessageHistory
-from langchain_community.chat_message_histories import ChatMessageHistory
+
+from rolling_memory import HISTORY_TOKEN_BUDGET, RollingSummaryHistory
+from session_store import PersistentHistory, SessionStore, owner_token
 
 # -------------------------------
 # Load environment variables
@@ -49,25 +50,48 @@ prompt = ChatPromptTemplate.from_messages([
 chain = prompt | llm
 
 # -------------------------------
-# Initialize Session Store
+# Session Persistence
+# -------------------------------
+# Messages live in an append-only SQLite log (see session_store.py): the
+# page shows the last PAGE_SIZE of them and loads older pages on demand,
+# and the LLM history of a reopened session is rebuilt from its tail.
+PAGE_SIZE = 20
+RESUME_MESSAGES = 20
+
+@st.cache_resource
+def get_session_store():
+    return SessionStore("./sessions.db", app="convai_ST2")
+
+store = get_session_store()
+
+# The store is shared by every visitor; each browser only sees its own sessions
+owner = owner_token(st.query_params)
+
+# -------------------------------
+# Initialize Session State
 # -------------------------------
-if "sessions" not in st.session_state:
-    st.session_state.sessions = {}
+if "histories" not in st.session_state:
+    st.session_state.histories = {}     # session_id -> bounded LLM history
+
+if "visible" not in st.session_state:
+    st.session_state.visible = {}       # session_id -> messages shown
 
 if "active_session" not in st.session_state:
-    session_id = str(uuid.uuid4())
-    st.session_state.sessions[session_id] = {
-        "name": "Session 1",
-        "ui": [],
-        "memory": ChatMessageHistory()
-    }
-    st.session_state.active_session = session_id
+    # Refresh / restart: continue this browser's last conversation
+    st.session_state.active_session = store.latest(owner)["id"]
 
 # -------------------------------
 # Helper: Get Memory for Session
 # -------------------------------
 def get_session_history(session_id: str):
-    return st.session_state.sessions[session_id]["memory"]
+    if session_id not in st.session_state.histories:
+        st.session_state.histories[session_id] = PersistentHistory(
+            store,
+            session_id,
+            RollingSummaryHistory(llm, max_tokens=HISTORY_TOKEN_BUDGET),
+            resume_messages=RESUME_MESSAGES
+        )
+    return st.session_state.histories[session_id]
 
 conversation = RunnableWithMessageHistory(
     chain,
@@ -84,22 +108,11 @@ with st.sidebar:
 
     # Create new session
     if st.button("➕ New Session"):
-        new_id = str(uuid.uuid4())
-        session_number = len(st.session_state.sessions) + 1
-        st.session_state.sessions[new_id] = {
-            "name": f"Session {session_number}",
-            "ui": [],
-            "memory": ChatMessageHistory()
-        }
-        st.session_state.active_session = new_id
+        st.session_state.active_session = store.create(owner)["id"]
         st.rerun()
 
     # Session selector
-    session_ids = list(st.session_state.sessions.keys())
-    session_names = {
-        sid: st.session_state.sessions[sid]["name"]
-        for sid in session_ids
-    }
+    session_names = {s["id"]: s["name"] for s in store.sessions(owner)}
 
     selected_name = st.selectbox(
         "Select a session",
@@ -113,14 +126,38 @@ with st.sidebar:
             st.session_state.active_session = sid
             break
 
+    # Export the whole log of the session (read only when asked for)
+    if st.button("📤 Export session"):
+        st.download_button(
+            "⬇️ Download JSON",
+            data=store.export(st.session_state.active_session),
+            file_name=f"{session_names[st.session_state.active_session]}.json",
+            mime="application/json"
+        )
+
+    # Short-term memory health (see rolling_memory.py)
+    history = st.session_state.histories.get(st.session_state.active_session)
+    if history is not None and history.inner.last_error:
+        st.warning(
+            f"Conversation summary failing ({history.inner.dropped} old messages dropped): "
+            f"{history.inner.last_error}"
+        )
+
 # -------------------------------
 # Render Chat UI
 # -------------------------------
-current_session = st.session_state.sessions[st.session_state.active_session]
+active_session = st.session_state.active_session
+visible = st.session_state.visible.setdefault(active_session, PAGE_SIZE)
+rows = store.tail(active_session, visible)
+
+if rows and rows[0]["seq"] > 0:
+    if st.button("⬆️ Load older messages"):
+        st.session_state.visible[active_session] += PAGE_SIZE
+        st.rerun()
 
-for role, message in current_session["ui"]:
-    with st.chat_message(role):
-        st.markdown(message)
+for row in rows:
+    with st.chat_message(row["role"]):
+        st.markdown(row["content"])
 
 # -------------------------------
 # User Input
@@ -128,8 +165,7 @@ for role, message in current_session["ui"]:
 user_input = st.chat_input("Type your message...")
 
 if user_input:
-    # Show user message
-    current_session["ui"].append(("user", user_input))
+    # Show user message (logged with the answer by the session history)
     with st.chat_message("user"):
         st.markdown(user_input)
 
@@ -142,6 +178,5 @@ if user_input:
     ai_response = response.content
 
     # Show assistant response
-    current_session["ui"].append(("assistant", ai_response))
     with st.chat_message("assistant"):
         st.markdown(ai_response)
@@ -11,7 +11,9 @@ from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.runnables.history import RunnableWithMessageHistory
-from langchain_community.chat_message_histories import ChatMessageHistory
+
+from rolling_memory import HISTORY_TOKEN_BUDGET, RollingSummaryHistory
+from session_store import PersistentHistory, SessionStore, owner_token
 
 # -------------------------------
 # Load .env EARLY (IMPORTANT)
@@ -56,15 +58,38 @@ chain = prompt | llm
 # -------------------------------
 # 3. Session-based memory
 # -------------------------------
+# The chat is kept in an append-only SQLite log (see session_store.py), so
+# a browser refresh or server restart resumes it; only the last PAGE_SIZE
+# messages are rendered, older ones on demand.
+PAGE_SIZE = 20
+RESUME_MESSAGES = 20
+
+@st.cache_resource
+def get_session_store():
+    return SessionStore("./sessions.db", app="convai_st")
+
+store = get_session_store()
+
+# The store is shared by every visitor; each browser only sees its own sessions
+owner = owner_token(st.query_params)
+
 if "history_store" not in st.session_state:
     st.session_state.history_store = {}
 
 if "session_id" not in st.session_state:
-    st.session_state.session_id = "streamlit_user"
+    st.session_state.session_id = store.latest(owner)["id"]
+
+if "visible" not in st.session_state:
+    st.session_state.visible = PAGE_SIZE
 
 def get_session_history(session_id: str):
     if session_id not in st.session_state.history_store:
-        st.session_state.history_store[session_id] = ChatMessageHistory()
+        st.session_state.history_store[session_id] = PersistentHistory(
+            store,
+            session_id,
+            RollingSummaryHistory(llm, max_tokens=HISTORY_TOKEN_BUDGET),
+            resume_messages=RESUME_MESSAGES
+        )
     return st.session_state.history_store[session_id]
 
 conversation = RunnableWithMessageHistory(
@@ -75,15 +100,19 @@ conversation = RunnableWithMessageHistory(
 )
 
 # -------------------------------
-# 4. Chat UI State
+# 4. Chat UI
 # -------------------------------
-if "chat_ui" not in st.session_state:
-    st.session_state.chat_ui = []
+rows = store.tail(st.session_state.session_id, st.session_state.visible)
+
+if rows and rows[0]["seq"] > 0:
+    if st.button("⬆️ Load older messages"):
+        st.session_state.visible += PAGE_SIZE
+        st.experimental_rerun()
 
 # Render chat history
-for role, message in st.session_state.chat_ui:
-    with st.chat_message(role):
-        st.markdown(message)
+for row in rows:
+    with st.chat_message(row["role"]):
+        st.markdown(row["content"])
 
 # -------------------------------
 # 5. User Input
@@ -91,8 +120,7 @@ for role, message in st.session_state.chat_ui:
 user_input = st.chat_input("Type your message...")
 
 if user_input:
-    # User message
-    st.session_state.chat_ui.append(("user", user_input))
+    # User message (logged with the answer by the session history)
     with st.chat_message("user"):
         st.markdown(user_input)
 
@@ -105,7 +133,6 @@ if user_input:
     ai_response = response.content
 
     # AI response
-    st.session_state.chat_ui.append(("assistant", ai_response))
     with st.chat_message("assistant"):
         st.markdown(ai_response)
 
@@ -115,7 +142,17 @@ if user_input:
 with st.sidebar:
     st.subheader("⚙️ Controls")
 
+    # The log is append-only: clearing starts a fresh session
     if st.button("Clear Chat"):
-        st.session_state.chat_ui = []
+        st.session_state.session_id = store.create(owner)["id"]
+        st.session_state.visible = PAGE_SIZE
         st.session_state.history_store = {}
         st.experimental_rerun()
+
+    # Short-term memory health (see rolling_memory.py)
+    history = st.session_state.history_store.get(st.session_state.session_id)
+    if history is not None and history.inner.last_error:
+        st.warning(
+            f"Conversation summary failing ({history.inner.dropped} old messages dropped): "
+            f"{history.inner.last_error}"
+        )
@@ -0,0 +1,229 @@
+# =====================================================
+# SESSION STORE
+# Append-only chat log in SQLite, resumable across restarts
+# =====================================================
+#
+# One row per message, one representation: the UI renders rows straight
+# from the log and the LLM history is rebuilt from its tail. Nothing is
+# kept in st.session_state except the (bounded) prompt history of the
+# sessions opened in this browser tab.
+#
+# Every session belongs to an owner (see owner_token): listing and resuming
+# only ever see the caller's own sessions, although the file and the
+# cached store are shared by everyone using the server.
+
+import json
+import uuid
+import sqlite3
+import datetime
+import threading
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import AIMessage, HumanMessage
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id            TEXT PRIMARY KEY,
+    app           TEXT NOT NULL,
+    owner         TEXT,
+    name          TEXT NOT NULL,
+    persona       TEXT,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    created_at    TEXT NOT NULL,
+    updated_at    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_by_app ON sessions (app, created_at);
+
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    seq        INTEGER NOT NULL,
+    role       TEXT NOT NULL,
+    content    TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+"""
+
+ROLES = {"human": "user", "ai": "assistant"}
+
+
+def _now() -> str:
+    return datetime.datetime.utcnow().isoformat()
+
+
+def owner_token(params) -> str:
+    """
+    Per-browser owner id, kept in the page URL (?owner=...) so a refresh
+    finds the same sessions. `params` is st.query_params. A new visitor
+    gets a new id and never sees anyone else's conversations.
+    """
+    owner = params.get("owner")
+    if not owner:
+        owner = uuid.uuid4().hex
+        params["owner"] = owner
+    return owner
+
+
+def to_langchain(rows: list) -> list:
+    """Log rows -> HumanMessage / AIMessage, for rebuilding prompt history."""
+    return [
+        HumanMessage(content=r["content"]) if r["role"] == "user" else AIMessage(content=r["content"])
+        for r in rows
+    ]
+
+
+class SessionStore:
+    """
+    Sessions and messages of one app, in a SQLite file shared by all apps.
+
+    Messages are only ever appended, keyed by (session_id, seq), so reading
+    the last N of a session is an index range scan however long it is.
+    WAL mode keeps reads from blocking the append of a turn.
+    """
+
+    def __init__(self, path: str = "./sessions.db", app: str = "default"):
+        self.path = path
+        self.app = app
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+        # Logs written before sessions had owners: their rows keep owner
+        # NULL and are never listed or resumed by anyone
+        columns = {r["name"] for r in self._conn.execute("PRAGMA table_info(sessions)")}
+        if "owner" not in columns:
+            self._conn.execute("ALTER TABLE sessions ADD COLUMN owner TEXT")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS sessions_by_owner ON sessions (app, owner, updated_at)"
+        )
+
+    # -------------------------------
+    # Sessions
+    # -------------------------------
+    def create(self, owner: str, name: str = None) -> dict:
+        now = _now()
+        with self._lock, self._conn:
+            if name is None:
+                (count,) = self._conn.execute(
+                    "SELECT COUNT(*) FROM sessions WHERE app = ? AND owner = ?", (self.app, owner)
+                ).fetchone()
+                name = f"Session {count + 1}"
+            session_id = str(uuid.uuid4())
+            self._conn.execute(
+                "INSERT INTO sessions (id, app, owner, name, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (session_id, self.app, owner, name, now, now)
+            )
+        return self.get(session_id)
+
+    def get(self, session_id: str) -> dict:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        return dict(row) if row else None
+
+    def sessions(self, owner: str) -> list:
+        """The owner's sessions in this app, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM sessions WHERE app = ? AND owner = ? ORDER BY created_at", (self.app, owner)
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def latest(self, owner: str) -> dict:
+        """
+        The owner's session written to most recently, or a new one for them.
+        Used to resume after a reconnect.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM sessions WHERE app = ? AND owner = ? ORDER BY updated_at DESC LIMIT 1",
+                (self.app, owner)
+            ).fetchone()
+        return dict(row) if row else self.create(owner)
+
+    def set_persona(self, session_id: str, persona: str):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE sessions SET persona = ? WHERE id = ?", (persona, session_id))
+
+    # -------------------------------
+    # Messages
+    # -------------------------------
+    def append(self, session_id: str, messages: list) -> int:
+        """
+        Appends [(role, content)] in one transaction (a whole turn at once).
+        Returns the session's new message count.
+        """
+        now = _now()
+        with self._lock, self._conn:
+            (count,) = self._conn.execute(
+                "SELECT message_count FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+            self._conn.executemany(
+                "INSERT INTO messages (session_id, seq, role, content, created_at) VALUES (?, ?, ?, ?, ?)",
+                [(session_id, count + i, role, content, now) for i, (role, content) in enumerate(messages)]
+            )
+            count += len(messages)
+            self._conn.execute(
+                "UPDATE sessions SET message_count = ?, updated_at = ? WHERE id = ?",
+                (count, now, session_id)
+            )
+        return count
+
+    def tail(self, session_id: str, n: int, before: int = None) -> list:
+        """
+        The last `n` messages (oldest first), optionally only those with
+        seq < `before` - i.e. the next older page.
+        """
+        before = before if before is not None else 2 ** 62
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, role, content, created_at FROM messages "
+                "WHERE session_id = ? AND seq < ? ORDER BY seq DESC LIMIT ?",
+                (session_id, before, n)
+            ).fetchall()
+        return [dict(r) for r in reversed(rows)]
+
+    def export(self, session_id: str) -> str:
+        """The whole session as JSON (for st.download_button)."""
+        session = self.get(session_id)
+        session["messages"] = self.tail(session_id, session["message_count"])
+        return json.dumps(session, ensure_ascii=False, indent=2)
+
+    def close(self):
+        self._conn.close()
+
+
+# -------------------------------
+# Prompt history backed by the log
+# -------------------------------
+class PersistentHistory(BaseChatMessageHistory):
+    """
+    Writes every turn to the SessionStore and keeps the prompt-facing
+    history in `inner` (e.g. a RollingSummaryHistory, so it stays bounded).
+
+    On resume, `inner` is seeded with the last `resume_messages` of the
+    log - a single indexed read, no replay of the whole conversation.
+    """
+
+    def __init__(self, store: SessionStore, session_id: str, inner: BaseChatMessageHistory,
+                 resume_messages: int = 20):
+        self.store = store
+        self.session_id = session_id
+        self.inner = inner
+        rows = store.tail(session_id, resume_messages)
+        if rows:
+            inner.add_messages(to_langchain(rows))
+
+    @property
+    def messages(self):
+        return self.inner.messages
+
+    def add_messages(self, messages):
+        self.store.append(self.session_id, [(ROLES.get(m.type, m.type), m.content) for m in messages])
+        self.inner.add_messages(messages)
+
+    def clear(self):
+        # The log is append-only; only the prompt history is reset
+        self.inner.clear()
@@ -1,9 +1,13 @@
 import os
+import time
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
 from langchain.prompts import ChatPromptTemplate
 
+from semantic_cache import SemanticAnswerCache, format_sources
+from context_compression import ContextCompressor
+
 # -----------------------------------------
 # ENV
 # -----------------------------------------
@@ -21,7 +25,16 @@ vectorstore = FAISS.load_local(
     allow_dangerous_deserialization=True
 )
 
-retriever = vectorstore.as_retriever(search_kwargs={"k": 4})
+TOP_K = 4
+
+# Overlapping chunks are merged and only query-relevant sentences are sent
+compressor = ContextCompressor()
+
+# -----------------------------------------
+# SEMANTIC ANSWER CACHE
+# -----------------------------------------
+# Repeated HR FAQs are answered from previously grounded answers
+cache = SemanticAnswerCache(embeddings, VECTOR_DB_PATH, threshold=0.92)
 
 # -----------------------------------------
 # LLM
@@ -61,8 +74,23 @@ def chat():
         if question.lower() == "exit":
             break
 
-        docs = retriever.invoke(question)
-        context = "\n\n".join(doc.page_content for doc in docs)
+        start = time.perf_counter()
+
+        # Embed once: used for both the cache lookup and retrieval
+        question_vector = cache.embed(question)
+
+        cached = cache.lookup(question_vector)
+        if cached:
+            print("\nHR Bot:", cached.answer)
+            print("Sources:", ", ".join(cached.sources))
+            print(f"(cached answer, similarity {cached.similarity:.2f})")
+            print("-" * 60)
+            continue
+
+        docs = vectorstore.similarity_search_by_vector(
+            question_vector.tolist(), k=TOP_K
+        )
+        context, compression = compressor.compress(question, docs)
 
         response = llm.invoke(
             prompt.format_messages(
@@ -71,9 +99,22 @@ def chat():
             )
         )
 
+        sources = format_sources(docs)
+        cache.store(
+            question,
+            question_vector,
+            response.content,
+            sources,
+            latency=time.perf_counter() - start
+        )
+
         print("\nHR Bot:", response.content)
+        print("Sources:", ", ".join(sources))
+        print(f"({compression.summary()})")
         print("-" * 60)
 
+    print("\nCache stats:", cache.stats.to_dict())
+
 
 if __name__ == "__main__":
     chat()
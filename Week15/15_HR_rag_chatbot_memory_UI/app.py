@@ -1,4 +1,5 @@
 import os
+import uuid
 import streamlit as st
 from dotenv import load_dotenv
 
@@ -6,6 +7,8 @@ from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
 from langchain.prompts import ChatPromptTemplate
 
+from backend_worker import BackendWorker
+
 # -----------------------------------------
 # ENV SETUP
 # -----------------------------------------
@@ -52,6 +55,17 @@ def load_llm():
 
 llm = load_llm()
 
+# -----------------------------------------
+# BACKEND WORKER (CACHED)
+# -----------------------------------------
+# Retrieval and generation run off the script thread; answers are
+# kept per message id so reruns never call the model again
+@st.cache_resource
+def load_backend():
+    return BackendWorker(max_workers=4)
+
+backend = load_backend()
+
 # -----------------------------------------
 # PROMPT
 # -----------------------------------------
@@ -71,6 +85,20 @@ Employee Question:
 {question}
 """)
 
+def answer_question(emit, question):
+    # Retrieve relevant docs
+    docs = retriever.invoke(question)
+    context = "\n\n".join(doc.page_content for doc in docs)
+
+    # LLM response, streamed token by token
+    for chunk in llm.stream(
+        prompt.format_messages(
+            context=context,
+            question=question
+        )
+    ):
+        emit(chunk.content)
+
 # -----------------------------------------
 # SESSION STATE (CHAT MEMORY)
 # -----------------------------------------
@@ -86,44 +114,35 @@ st.markdown(
     "security guidelines, and workplace safety."
 )
 
-# Display chat history
-for msg in st.session_state.messages:
-    with st.chat_message(msg["role"]):
-        st.markdown(msg["content"])
-
 # -----------------------------------------
 # CHAT INPUT
 # -----------------------------------------
 user_question = st.chat_input("Ask an HR-related question...")
 
 if user_question:
-    # Show user message
+    message_id = uuid.uuid4().hex
+
     st.session_state.messages.append({
         "role": "user",
         "content": user_question
     })
-
-    with st.chat_message("user"):
-        st.markdown(user_question)
-
-    with st.spinner("Searching HR policies..."):
-        # Retrieve relevant docs
-        docs = retriever.invoke(user_question)
-        context = "\n\n".join(doc.page_content for doc in docs)
-
-        # LLM response
-        response = llm.invoke(
-            prompt.format_messages(
-                context=context,
-                question=user_question
-            )
-        )
-
-    # Show assistant response
-    with st.chat_message("assistant"):
-        st.markdown(response.content)
-
     st.session_state.messages.append({
         "role": "assistant",
-        "content": response.content
+        "id": message_id,
+        "content": None
     })
+
+    backend.submit(message_id, answer_question, user_question)
+
+# Display chat history; pending answers stream from the backend
+for msg in st.session_state.messages:
+    with st.chat_message(msg["role"]):
+        if msg["content"] is not None:
+            st.markdown(msg["content"])
+            continue
+
+        try:
+            msg["content"] = st.write_stream(backend.stream(msg["id"]))
+        except Exception as e:
+            msg["content"] = f"Sorry, something went wrong: {e}"
+            st.error(msg["content"])
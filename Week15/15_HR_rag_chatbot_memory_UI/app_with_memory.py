@@ -1,4 +1,6 @@
 import os
+import time
+import uuid
 import streamlit as st
 from dotenv import load_dotenv
 
@@ -6,6 +8,11 @@ from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
 from langchain.prompts import ChatPromptTemplate
 
+from semantic_cache import SemanticAnswerCache, format_sources
+from conversation_memory import ConversationMemory
+from query_rewriter import QuestionRewriter
+from backend_worker import BackendWorker
+
 # -----------------------------------------
 # ENV
 # -----------------------------------------
@@ -23,6 +30,9 @@ st.set_page_config(
 VECTOR_DB_PATH = "hr_faiss_index"
 EMBEDDING_MODEL = "text-embedding-3-small"
 CHAT_MODEL = "gpt-4o-mini"
+TOP_K = 4
+CACHE_THRESHOLD = 0.92
+HISTORY_TOKEN_BUDGET = 1000
 
 # -----------------------------------------
 # LOAD VECTOR STORE
@@ -37,7 +47,19 @@ def load_vectorstore():
     )
 
 vectorstore = load_vectorstore()
-retriever = vectorstore.as_retriever(search_kwargs={"k": 4})
+
+# -----------------------------------------
+# SEMANTIC ANSWER CACHE (shared across sessions)
+# -----------------------------------------
+@st.cache_resource
+def load_answer_cache():
+    return SemanticAnswerCache(
+        vectorstore.embeddings,
+        VECTOR_DB_PATH,
+        threshold=CACHE_THRESHOLD
+    )
+
+answer_cache = load_answer_cache()
 
 # -----------------------------------------
 # LOAD LLM
@@ -48,6 +70,17 @@ def load_llm():
 
 llm = load_llm()
 
+# -----------------------------------------
+# BACKEND WORKER (shared across sessions)
+# -----------------------------------------
+# Retrieval and generation run off the script thread; answers are
+# kept per message id so reruns never call the model again
+@st.cache_resource
+def load_backend():
+    return BackendWorker(max_workers=4)
+
+backend = load_backend()
+
 # -----------------------------------------
 # PROMPT (MEMORY-AWARE)
 # -----------------------------------------
@@ -73,12 +106,92 @@ Employee Question:
 {question}
 """)
 
+# -----------------------------------------
+# ANSWER JOB (runs on the backend worker)
+# -----------------------------------------
+def answer_turn(emit, question, memory, rewriter, opening):
+    start = time.perf_counter()
+
+    chat_history = memory.render()
+
+    # Standalone form of the question, e.g. "what about for contractors?"
+    # -> "How many vacation days do contractors get?"
+    search_query = rewriter.rewrite(question, chat_history)
+
+    # Embed once: used for both the cache lookup and retrieval
+    question_vector = answer_cache.embed(search_query)
+    cached = answer_cache.lookup(question_vector)
+
+    if cached:
+        answer = cached.answer
+        sources = cached.sources
+        emit(answer)
+    else:
+        # Retrieve docs using the standalone question
+        docs = vectorstore.similarity_search_by_vector(
+            question_vector.tolist(), k=TOP_K
+        )
+        context = "\n\n".join(doc.page_content for doc in docs)
+
+        chunks = []
+        for chunk in llm.stream(
+            prompt.format_messages(
+                chat_history=chat_history,
+                context=context,
+                question=question
+            )
+        ):
+            chunks.append(chunk.content)
+            emit(chunk.content)
+
+        answer = "".join(chunks)
+        sources = format_sources(docs)
+
+        # Only opening questions are cached; follow-up answers depend on history
+        if opening:
+            answer_cache.store(
+                question,
+                question_vector,
+                answer,
+                sources,
+                latency=time.perf_counter() - start
+            )
+
+    # Summarizing older turns happens here too, not in the script run
+    memory.add("user", question)
+    memory.add("assistant", answer)
+
+    return {
+        "rewritten": search_query if search_query != question else None,
+        "sources": sources
+    }
+
 # -----------------------------------------
 # SESSION STATE
 # -----------------------------------------
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
+# Turns of one session run one at a time on the backend: they share
+# the memory and rewriter below
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
+# Prompt-side history: recent turns verbatim, older turns summarized
+if "memory" not in st.session_state:
+    st.session_state.memory = ConversationMemory(
+        llm,
+        max_tokens=HISTORY_TOKEN_BUDGET
+    )
+
+memory = st.session_state.memory
+
+# Follow-ups are rewritten into standalone questions before retrieval
+if "rewriter" not in st.session_state:
+    st.session_state.rewriter = QuestionRewriter(llm)
+
+rewriter = st.session_state.rewriter
+
 # -----------------------------------------
 # UI
 # -----------------------------------------
@@ -87,10 +200,19 @@ st.markdown(
     "Ask HR-related questions. Follow-up questions are supported."
 )
 
-# Display chat history
-for msg in st.session_state.messages:
-    with st.chat_message(msg["role"]):
-        st.markdown(msg["content"])
+with st.sidebar:
+    st.subheader("Answer cache")
+    stats = answer_cache.stats
+    st.metric("Hit rate", f"{stats.hit_rate:.0%}", f"{stats.hits}/{stats.lookups}")
+    st.metric("Latency saved", f"{stats.latency_saved:.1f}s")
+
+    st.subheader("Conversation memory")
+    st.metric("History tokens", f"{memory.tokens}/{HISTORY_TOKEN_BUDGET}")
+    st.caption(f"{memory.summarized_messages} earlier messages summarized")
+    st.caption(
+        f"Question rewrites: {rewriter.calls} LLM, "
+        f"{rewriter.cache_hits} cached, {rewriter.skipped} skipped"
+    )
 
 # -----------------------------------------
 # CHAT INPUT
@@ -98,38 +220,39 @@ for msg in st.session_state.messages:
 user_question = st.chat_input("Ask an HR-related question...")
 
 if user_question:
-    # Add user message
+    message_id = uuid.uuid4().hex
+    opening = not st.session_state.messages
+
     st.session_state.messages.append({
         "role": "user",
         "content": user_question
     })
-
-    with st.chat_message("user"):
-        st.markdown(user_question)
-
-    with st.spinner("Thinking..."):
-        # Build chat history string (limit to last 6 messages)
-        history = st.session_state.messages[-6:]
-        chat_history = "\n".join(
-            f"{m['role'].upper()}: {m['content']}" for m in history
-        )
-
-        # Retrieve docs using current question only
-        docs = retriever.invoke(user_question)
-        context = "\n\n".join(doc.page_content for doc in docs)
-
-        response = llm.invoke(
-            prompt.format_messages(
-                chat_history=chat_history,
-                context=context,
-                question=user_question
-            )
-        )
-
-    with st.chat_message("assistant"):
-        st.markdown(response.content)
-
     st.session_state.messages.append({
         "role": "assistant",
-        "content": response.content
+        "id": message_id,
+        "content": None
     })
+
+    backend.submit(
+        message_id, answer_turn, user_question, memory, rewriter, opening,
+        session_key=st.session_state.session_id
+    )
+
+# Display chat history; pending answers stream from the backend
+for msg in st.session_state.messages:
+    with st.chat_message(msg["role"]):
+        if msg["content"] is None:
+            try:
+                msg["content"] = st.write_stream(backend.stream(msg["id"]))
+                msg.update(backend.get(msg["id"]).result)
+            except Exception as e:
+                msg["content"] = f"Sorry, something went wrong: {e}"
+                st.error(msg["content"])
+                continue
+        else:
+            st.markdown(msg["content"])
+
+        if msg.get("rewritten"):
+            st.caption(f"Searched for: {msg['rewritten']}")
+        if msg.get("sources"):
+            st.caption("Sources: " + ", ".join(msg["sources"]))
@@ -0,0 +1,163 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Iterator, List, Optional
+
+# -----------------------------------------
+# JOB
+# -----------------------------------------
+class ChatJob:
+    """
+    One assistant message being produced in the background.
+    `chunks` grows as tokens arrive; `result` is whatever the job
+    function returned (answer, sources, ...).
+    """
+
+    def __init__(self, message_id: str):
+        self.message_id = message_id
+        self.chunks: List[str] = []
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.started = time.perf_counter()
+        self.latency = None
+        self.first_token_latency = None
+        self._done = threading.Event()
+
+    def emit(self, token: str):
+        if not token:
+            return
+        if self.first_token_latency is None:
+            self.first_token_latency = time.perf_counter() - self.started
+        self.chunks.append(token)
+
+    def finish(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.latency = time.perf_counter() - self.started
+        self._done.set()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def text(self) -> str:
+        return "".join(self.chunks)
+
+    def wait(self, timeout=None) -> bool:
+        return self._done.wait(timeout)
+
+
+# -----------------------------------------
+# WORKER
+# -----------------------------------------
+class BackendWorker:
+    """
+    Runs retrieval + LLM calls outside the Streamlit script run.
+
+    Jobs are keyed by message id, so a rerun (a widget click, a new
+    chat input, a browser refresh) finds the existing job instead of
+    calling the model again. The script only reads from the job:
+    stream() yields tokens as they arrive, and a finished job is
+    served from memory.
+
+    Jobs submitted with the same session key run one at a time, in
+    submission order, since they share that session's memory objects.
+    Jobs of different sessions still run in parallel.
+
+    Share one worker across sessions with st.cache_resource.
+    """
+
+    def __init__(self, max_workers: int = 4, max_jobs: int = 500):
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="chat-backend"
+        )
+        self.max_jobs = max_jobs
+        self.jobs: "OrderedDict[str, ChatJob]" = OrderedDict()
+        self._queues: Dict[str, Deque[tuple]] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self, message_id: str, fn: Callable, *args, session_key: Optional[str] = None, **kwargs
+    ) -> ChatJob:
+        """
+        Starts fn(emit, *args, **kwargs) unless a job for this message
+        already exists. fn streams tokens through emit(token) and returns
+        the final result. With a session_key, the job waits for the
+        earlier jobs of that session to finish.
+        """
+        with self._lock:
+            if message_id in self.jobs:
+                return self.jobs[message_id]
+
+            job = ChatJob(message_id)
+            self.jobs[message_id] = job
+            self._evict()
+
+            task = (job, fn, args, kwargs, session_key)
+            if session_key is not None:
+                queue = self._queues.setdefault(session_key, deque())
+                queue.append(task)
+                if len(queue) > 1:
+                    # Started by _run when the session's previous job ends
+                    return job
+
+        self.executor.submit(self._run, *task)
+        return job
+
+    def _run(self, job: ChatJob, fn, args, kwargs, session_key=None):
+        try:
+            job.finish(result=fn(job.emit, *args, **kwargs))
+        except Exception as e:
+            job.finish(error=e)
+        finally:
+            if session_key is not None:
+                self._next(session_key)
+
+    def _next(self, session_key: str):
+        with self._lock:
+            queue = self._queues[session_key]
+            queue.popleft()
+            if not queue:
+                del self._queues[session_key]
+                return
+            task = queue[0]
+        self.executor.submit(self._run, *task)
+
+    def _evict(self):
+        # Oldest finished jobs go first; running jobs are never dropped
+        while len(self.jobs) > self.max_jobs:
+            finished = next((k for k, j in self.jobs.items() if j.done), None)
+            if finished is None:
+                break
+            del self.jobs[finished]
+
+    def get(self, message_id: str) -> Optional[ChatJob]:
+        return self.jobs.get(message_id)
+
+    def stream(self, message_id: str, poll_interval: float = 0.03) -> Iterator[str]:
+        """
+        Yields the tokens of a job, starting from the first one, so a
+        rerun in the middle of an answer picks the stream up again.
+        """
+        job = self.jobs[message_id]
+        sent = 0
+
+        while True:
+            done = job.done
+            chunks = job.chunks
+            while sent < len(chunks):
+                yield chunks[sent]
+                sent += 1
+            if done:
+                break
+            job.wait(poll_interval)
+
+        if job.error is not None:
+            raise job.error
+
+    @property
+    def pending(self) -> int:
+        return sum(not job.done for job in list(self.jobs.values()))
@@ -0,0 +1,132 @@
+from dataclasses import dataclass
+from typing import List
+
+# -----------------------------------------
+# PROMPT
+# -----------------------------------------
+SUMMARY_PROMPT = """
+You maintain a running summary of a conversation between an employee
+and an HR Support Assistant.
+
+Update the summary with the new lines. Keep the HR topics asked about,
+facts the employee shared about themselves (role, location, contract type,
+dates) and the policy answers given. Maximum {max_words} words.
+
+Current summary:
+{summary}
+
+New lines:
+{lines}
+
+Updated summary:
+"""
+
+
+@dataclass
+class Turn:
+    role: str
+    content: str
+    line: str
+    tokens: int
+
+
+class ConversationMemory:
+    """
+    Chat history for the prompt within a fixed token budget.
+
+    The most recent messages are kept verbatim. When they exceed the
+    budget, the oldest ones are folded into a rolling summary, so only
+    the evicted lines are sent to the summarizer (never the full history).
+
+    Token counts and the rendered history are computed once and reused
+    across turns; nothing is re-tokenized unless it changed.
+    """
+
+    def __init__(self, llm, max_tokens=1000, summary_tokens=250, min_recent=2):
+        self.llm = llm
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.min_recent = min_recent
+
+        self.recent: List[Turn] = []
+        self.summary = ""
+        self.summary_token_count = 0
+        self.summarized_messages = 0
+
+        self._rendered = None
+
+    # -------------------------
+    # TOKENS
+    # -------------------------
+    def count_tokens(self, text: str) -> int:
+        try:
+            return self.llm.get_num_tokens(text)
+        except Exception:
+            return len(text) // 4
+
+    @property
+    def recent_budget(self) -> int:
+        return self.max_tokens - self.summary_tokens
+
+    @property
+    def tokens(self) -> int:
+        return self.summary_token_count + sum(t.tokens for t in self.recent)
+
+    # -------------------------
+    # UPDATES
+    # -------------------------
+    def add(self, role: str, content: str):
+        line = f"{role.upper()}: {content}"
+        self.recent.append(Turn(role, content, line, self.count_tokens(line)))
+        self._rendered = None
+
+        if sum(t.tokens for t in self.recent) > self.recent_budget:
+            self._compact()
+
+    def _compact(self):
+        """
+        Evicts the oldest messages until the verbatim window is down to
+        three quarters of its budget, so the summarizer runs every few
+        turns instead of on every turn.
+        """
+        target = self.recent_budget * 3 // 4
+        evicted = []
+
+        while (
+            len(self.recent) > self.min_recent
+            and sum(t.tokens for t in self.recent) > target
+        ):
+            evicted.append(self.recent.pop(0))
+
+        if not evicted:
+            return
+
+        response = self.llm.invoke(SUMMARY_PROMPT.format(
+            max_words=self.summary_tokens * 3 // 4,
+            summary=self.summary or "(empty)",
+            lines="\n".join(t.line for t in evicted)
+        ))
+
+        self.summary = response.content.strip()
+        self.summary_token_count = self.count_tokens(self.summary)
+        self.summarized_messages += len(evicted)
+
+    # -------------------------
+    # PROMPT
+    # -------------------------
+    def render(self) -> str:
+        if self._rendered is None:
+            parts = []
+            if self.summary:
+                parts.append(f"Summary of earlier conversation: {self.summary}")
+            parts.extend(t.line for t in self.recent)
+            self._rendered = "\n".join(parts)
+
+        return self._rendered
+
+    def clear(self):
+        self.recent = []
+        self.summary = ""
+        self.summary_token_count = 0
+        self.summarized_messages = 0
+        self._rendered = None
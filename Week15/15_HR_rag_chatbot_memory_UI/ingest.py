@@ -1,4 +1,6 @@
+import json
 import os
+from datetime import datetime
 from dotenv import load_dotenv
 from langchain_community.document_loaders import PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
@@ -12,6 +14,9 @@ load_dotenv()
 
 DATA_FOLDER = "documents"
 VECTOR_DB_PATH = "hr_faiss_index"
+EMBEDDING_MODEL = "text-embedding-3-small"
+CHUNK_SIZE = 800
+CHUNK_OVERLAP = 150
 
 # -----------------------------------------
 # LOAD PDFs
@@ -29,8 +34,8 @@ print(f"Loaded {len(documents)} pages from PDFs")
 # SPLIT TEXT
 # -----------------------------------------
 text_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=800,
-    chunk_overlap=150
+    chunk_size=CHUNK_SIZE,
+    chunk_overlap=CHUNK_OVERLAP
 )
 
 chunks = text_splitter.split_documents(documents)
@@ -41,7 +46,7 @@ print(f"Created {len(chunks)} text chunks")
 # -----------------------------------------
 
 embeddings = OpenAIEmbeddings(
-    model="text-embedding-3-small",
+    model=EMBEDDING_MODEL,
     openai_api_key=os.environ["OPENAI_API_KEY"],
     base_url=os.getenv("OPENAI_API_BASE")
 )
@@ -51,4 +56,23 @@ embeddings = OpenAIEmbeddings(
 vectorstore = FAISS.from_documents(chunks, embeddings)
 vectorstore.save_local(VECTOR_DB_PATH)
 
+# -----------------------------------------
+# MANIFEST
+# -----------------------------------------
+# Anything cached against this index (e.g. semantic_cache.py) is
+# invalidated when this file changes.
+manifest = {
+    "built_at": datetime.now().isoformat(),
+    "embedding_model": EMBEDDING_MODEL,
+    "chunk_size": CHUNK_SIZE,
+    "chunk_overlap": CHUNK_OVERLAP,
+    "num_chunks": len(chunks),
+    "documents": sorted(
+        {os.path.basename(doc.metadata.get("source", "")) for doc in documents}
+    ),
+}
+
+with open(os.path.join(VECTOR_DB_PATH, "manifest.json"), "w") as f:
+    json.dump(manifest, f, indent=2)
+
 print("HR knowledge base successfully indexed")
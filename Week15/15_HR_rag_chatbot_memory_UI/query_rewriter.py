@@ -0,0 +1,113 @@
+import hashlib
+import re
+from collections import OrderedDict
+
+# -----------------------------------------
+# PROMPT
+# -----------------------------------------
+CONDENSE_PROMPT = """
+Given the conversation and a follow-up question, rewrite the follow-up
+as a standalone HR policy question that can be understood without the
+conversation. Keep the employee's wording where possible.
+Return ONLY the rewritten question.
+
+Conversation:
+{chat_history}
+
+Follow-up question:
+{question}
+
+Standalone question:
+"""
+
+# -----------------------------------------
+# HEURISTIC
+# -----------------------------------------
+# Openers and back-references that only make sense with earlier turns
+FOLLOW_UP_OPENERS = re.compile(
+    r"^(and|also|but|so|then|what about|how about|what if|same for|"
+    r"and for|and if|is that|does that|do they|can they|why)\b",
+    re.IGNORECASE
+)
+
+BACK_REFERENCES = re.compile(
+    r"\b(it|its|that|this|these|those|they|them|their|there|same|above|"
+    r"previous|earlier|mentioned)\b",
+    re.IGNORECASE
+)
+
+STOPWORDS = {
+    "what", "how", "when", "where", "who", "which", "why", "the", "a", "an",
+    "is", "are", "do", "does", "can", "i", "my", "me", "for", "to", "of",
+    "in", "on", "and", "or", "about", "with", "get", "have", "be",
+}
+
+MIN_CONTENT_WORDS = 2
+
+
+def is_standalone(question: str) -> bool:
+    """
+    Cheap local check: a question with enough content words and no
+    follow-up opener or back-reference is sent to retrieval as-is.
+    """
+    text = question.strip()
+
+    if FOLLOW_UP_OPENERS.search(text) or BACK_REFERENCES.search(text):
+        return False
+
+    words = re.findall(r"[a-z]+", text.lower())
+    content = [w for w in words if w not in STOPWORDS]
+    return len(content) >= MIN_CONTENT_WORDS
+
+
+class QuestionRewriter:
+    """
+    Condenses follow-up questions into standalone retrieval queries.
+
+    The LLM is only called when there is history and the heuristic says
+    the question depends on it. Rewrites are cached per session, keyed
+    on the question and the last few history lines, so re-asking
+    the same follow-up after the same answer does not pay for another call.
+    """
+
+    def __init__(self, llm, history_lines=4, max_entries=100):
+        self.llm = llm
+        self.history_lines = history_lines
+        self.max_entries = max_entries
+
+        self.cache = OrderedDict()
+        self.calls = 0
+        self.skipped = 0
+        self.cache_hits = 0
+
+    def _key(self, question, history):
+        text = f"{question.strip().lower()}\n{history}"
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def rewrite(self, question: str, chat_history: str) -> str:
+        if not chat_history or is_standalone(question):
+            self.skipped += 1
+            return question
+
+        # The referent is almost always in the last exchange
+        recent = "\n".join(chat_history.splitlines()[-self.history_lines:])
+        key = self._key(question, recent)
+
+        if key in self.cache:
+            self.cache_hits += 1
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+        response = self.llm.invoke(CONDENSE_PROMPT.format(
+            chat_history=chat_history,
+            question=question
+        ))
+        self.calls += 1
+
+        standalone = response.content.strip().strip('"') or question
+
+        self.cache[key] = standalone
+        if len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+
+        return standalone
@@ -0,0 +1,190 @@
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+# -----------------------------------------
+# CONSTANTS
+# -----------------------------------------
+MANIFEST_FILE = "manifest.json"
+INDEX_FILES = ["index.faiss", "index.pkl"]
+
+
+def index_fingerprint(index_path: str) -> str:
+    """
+    Hash of the index manifest written by ingest.py.
+    Falls back to the raw index files for indexes built before the manifest existed.
+    """
+    manifest = os.path.join(index_path, MANIFEST_FILE)
+    files = [manifest] if os.path.exists(manifest) else [
+        os.path.join(index_path, name) for name in INDEX_FILES
+    ]
+
+    digest = hashlib.sha256()
+    for path in files:
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def index_signature(index_path: str) -> tuple:
+    """
+    (mtime, size) of the manifest and index files: a stat call per file,
+    cheap enough to run on every lookup. The content hash is only
+    recomputed when this changes.
+    """
+    signature = []
+    for name in [MANIFEST_FILE] + INDEX_FILES:
+        try:
+            stat = os.stat(os.path.join(index_path, name))
+            signature.append((name, stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append((name, None, None))
+    return tuple(signature)
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    answer: str
+    sources: List[str]
+    latency: float
+    similarity: float = 1.0
+    hits: int = 0
+
+
+@dataclass
+class CacheStats:
+    lookups: int = 0
+    hits: int = 0
+    latency_saved: float = 0.0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def to_dict(self):
+        return {
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": round(self.hit_rate, 3),
+            "latency_saved_s": round(self.latency_saved, 3),
+            "invalidations": self.invalidations,
+        }
+
+
+class SemanticAnswerCache:
+    """
+    Caches grounded answers keyed by question embedding.
+    A new question reuses an answer when its cosine similarity to a
+    previously answered question is above the threshold.
+
+    Shared by every Streamlit session (st.cache_resource), so lookups and
+    stores are serialized by a lock.
+    """
+
+    def __init__(self, embeddings, index_path: str, threshold: float = 0.92, max_entries: int = 500):
+        self.embeddings = embeddings
+        self.index_path = index_path
+        self.threshold = threshold
+        self.max_entries = max_entries
+
+        self.entries: List[CachedAnswer] = []
+        self.vectors = np.zeros((0, 0), dtype="float32")
+        self.stats = CacheStats()
+        self.signature = index_signature(index_path)
+        self.fingerprint = index_fingerprint(index_path)
+        self._lock = threading.Lock()
+
+    # -------------------------
+    # HELPERS
+    # -------------------------
+
+    def embed(self, question: str) -> np.ndarray:
+        vector = np.asarray(self.embeddings.embed_query(question), dtype="float32")
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self.entries = []
+        self.vectors = np.zeros((0, 0), dtype="float32")
+
+    def _check_index(self):
+        # Answers are only valid for the index they were grounded on.
+        # Hash the index only when its files were touched (e.g. re-ingest).
+        signature = index_signature(self.index_path)
+        if signature == self.signature:
+            return
+        self.signature = signature
+
+        current = index_fingerprint(self.index_path)
+        if current != self.fingerprint:
+            self.fingerprint = current
+            self._clear()
+            self.stats.invalidations += 1
+
+    # -------------------------
+    # LOOKUP / STORE
+    # -------------------------
+
+    def lookup(self, vector: np.ndarray) -> Optional[CachedAnswer]:
+        with self._lock:
+            return self._lookup(vector)
+
+    def _lookup(self, vector: np.ndarray) -> Optional[CachedAnswer]:
+        start = time.perf_counter()
+        self._check_index()
+        self.stats.lookups += 1
+
+        if not self.entries:
+            return None
+
+        scores = self.vectors @ vector
+        best = int(np.argmax(scores))
+
+        if scores[best] < self.threshold:
+            return None
+
+        entry = self.entries[best]
+        entry.hits += 1
+        entry.similarity = float(scores[best])
+
+        self.stats.hits += 1
+        self.stats.latency_saved += max(entry.latency - (time.perf_counter() - start), 0.0)
+
+        return entry
+
+    def store(self, question: str, vector: np.ndarray, answer: str, sources: List[str], latency: float):
+        with self._lock:
+            self._store(question, vector, answer, sources, latency)
+
+    def _store(self, question: str, vector: np.ndarray, answer: str, sources: List[str], latency: float):
+        if len(self.entries) >= self.max_entries:
+            # Drop the least reused entry
+            drop = min(range(len(self.entries)), key=lambda i: self.entries[i].hits)
+            del self.entries[drop]
+            self.vectors = np.delete(self.vectors, drop, axis=0)
+
+        self.entries.append(CachedAnswer(question, answer, sources, latency))
+        row = vector.reshape(1, -1)
+        self.vectors = row if self.vectors.size == 0 else np.vstack([self.vectors, row])
+
+
+def format_sources(docs) -> List[str]:
+    sources = []
+    for doc in docs:
+        source = os.path.basename(doc.metadata.get("source", "Unknown"))
+        page = doc.metadata.get("page")
+        label = f"{source} (page {page + 1})" if isinstance(page, int) else source
+        if label not in sources:
+            sources.append(label)
+    return sources
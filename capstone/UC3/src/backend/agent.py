@@ -0,0 +1,409 @@
+"""
+Sentinela — Agent backend behind call_agent()
+
+One request = intent classification + at most one parallel tool wave:
+
+    order_status      order_status_tool ‖ rag_policy_tool(delivery SLA)
+    return_refund     order_status_tool ‖ rag_policy_tool(query) → return_eligibility_tool (local)
+    shipping_dispute  order_status_tool ‖ rag_policy_tool(claim / damage policy)
+    escalation        no tools
+    out_of_scope      no tools
+
+Order lookups and policy retrievals are independent, so they run
+concurrently in the ToolExecutor and are cached there (order status per
+order id with a short TTL, policies per normalized query). Escalations
+produce an EscalationTicket that is handed to the TicketQueue.
+"""
+
+import re
+from typing import List, Optional
+
+from escalation import EscalationTicket, TicketQueue
+from intent_classifier import IntentClassifier
+from tool_executor import ToolCall, ToolExecutor, normalize_query
+from tools import (
+    AUTO_APPROVAL_LIMIT,
+    extract_order_id,
+    normalize_order_id,
+    order_status_tool,
+    policy_section,
+    rag_policy_tool,
+    return_eligibility_tool,
+)
+
+ORDER_CACHE_TTL = 30.0            # seconds; order status is live data
+SLA_DAYS = 7
+CLAIM_WINDOW_DAYS = 7
+
+# Policy queries that do not depend on the customer's wording share a cache entry
+DELIVERY_POLICY_QUERY = "standard delivery window business days dispatch"
+LOST_PACKAGE_POLICY_QUERY = "lost package claim window delivered not received"
+DAMAGE_POLICY_QUERY = "damaged or incorrect deliveries replacement refund"
+
+FINANCIAL_ACTION = re.compile(r"\b(process|issue|cancel|refund (me|now)|credit|chargeback)\b", re.IGNORECASE)
+DAMAGE_WORDS = re.compile(r"\b(damaged|broken|wrong|incorrect|shattered|torn|crushed|defective)\b", re.IGNORECASE)
+
+
+def build_executor(max_workers: int = 8) -> ToolExecutor:
+    executor = ToolExecutor(max_workers=max_workers)
+    executor.register(
+        "order_status_tool", order_status_tool,
+        cache=True, ttl=ORDER_CACHE_TTL,
+        key=lambda args: normalize_order_id(args["order_id"]),
+    )
+    executor.register(
+        "rag_policy_tool", rag_policy_tool,
+        cache=True,
+        key=lambda args: normalize_query(args["query"]),
+    )
+    return executor
+
+
+def _citation(source: str, section: str) -> str:
+    s = policy_section(source, section)
+    return f"{s['source']} {s['section']} — {s['title']}"
+
+
+def _dedupe(items: List[str]) -> List[str]:
+    return list(dict.fromkeys(items))
+
+
+def _response(intent, response, citations=None, trace=None, ticket: Optional[EscalationTicket] = None) -> dict:
+    return {
+        "intent": intent,
+        "response": response,
+        "citations": _dedupe(citations or []),
+        "trace": trace or [],
+        "escalated": ticket is not None,
+        "escalation_ticket": ticket.to_markdown() if ticket else "",
+        "ticket_id": ticket.ticket_id if ticket else "",
+        "ticket": ticket,
+    }
+
+
+def _ticket(title: str, intent: str, order: Optional[dict], reason: str, action: str,
+            details: Optional[List[str]] = None, financial: bool = False) -> EscalationTicket:
+    found = bool(order and order.get("found"))
+    return EscalationTicket(
+        title=title,
+        intent=intent,
+        reason=reason,
+        action_required=action,
+        order_id=order["order_id"] if found else None,
+        item=order["item"] if found else None,
+        amount=order["amount"] if found else None,
+        order_status=order["status"] if found else None,
+        details=details or [],
+        financial=financial,
+    )
+
+
+class SentinelaAgent:
+    """
+    `tickets` receives every escalation ticket; submitting only enqueues, so
+    persistence and helpdesk delivery never add to the response time.
+    """
+
+    def __init__(self, classifier: IntentClassifier, executor: Optional[ToolExecutor] = None,
+                 tickets: Optional[TicketQueue] = None):
+        self.classifier = classifier
+        self.executor = executor or build_executor()
+        self.tickets = tickets
+
+    # ── Entry point ───────────────────────────────────────────────────────────
+    def run(self, user_query: str, order_id: str = "") -> dict:
+        prediction = self.classifier.predict(user_query)
+        trace = [prediction.trace]
+
+        oid = extract_order_id(user_query) or normalize_order_id(order_id)
+        handler = getattr(self, f"_{prediction.intent}")
+        result = handler(user_query, oid, trace)
+
+        ticket = result.pop("ticket")
+        if ticket is not None and self.tickets is not None:
+            ticket.trace = list(result["trace"])
+            self.tickets.submit(ticket)
+            result["trace"].append(f"Action: escalation ticket {ticket.ticket_id} queued ({ticket.priority} priority)")
+        return result
+
+    # ── Tool wave ─────────────────────────────────────────────────────────────
+    def _wave(self, oid: Optional[str], policy_query: str, trace: List[str]):
+        calls = [ToolCall("rag_policy_tool", {"query": policy_query}, label="policy")]
+        if oid:
+            calls.insert(0, ToolCall("order_status_tool", {"order_id": oid}, label="order"))
+
+        wave = self.executor.run_wave(calls)
+
+        cached = f", cached: {', '.join(wave.cached)}" if wave.cached else ""
+        trace.append(f"Action (parallel): {' ‖ '.join(str(c) for c in calls)} — {wave.elapsed * 1000:.0f} ms{cached}")
+
+        order, policy = wave["order"], wave["policy"] or {"chunks": [], "citations": [], "confidence": 0.0}
+        if order is not None:
+            trace.append(
+                f"Observation: order {order['order_id']} status={order['status']}, item={order['item']}"
+                if order.get("found") else f"Observation: order {oid} not found"
+            )
+        if policy["chunks"]:
+            top = policy["chunks"][0]
+            trace.append(f"Observation: {top['source']} {top['section']} (score {top['score']:.2f})")
+        for label, error in wave.errors.items():
+            trace.append(f"Error: {label} failed — {error}")
+
+        return order, policy
+
+    def _clarify(self, intent: str, trace: List[str], what: str) -> dict:
+        trace.append("Thought: No order ID in the message or session. Must not guess order data.")
+        trace.append("Action: clarification_tool(order_id)")
+        return _response(
+            intent,
+            f"Could you share your order ID (for example **#12345**)? I'll {what} right away.",
+            trace=trace,
+        )
+
+    def _not_found(self, intent: str, oid: str, trace: List[str]) -> dict:
+        trace.append("Thought: Unknown order ID. Must not invent a status.")
+        return _response(
+            intent,
+            f"I couldn't find an order with ID **{oid}**. Could you double-check the number? "
+            "If it still doesn't work, I can connect you with a support agent.",
+            trace=trace,
+        )
+
+    # ── UJ1: Order Status ─────────────────────────────────────────────────────
+    def _order_status(self, user_query: str, oid: Optional[str], trace: List[str]) -> dict:
+        if not oid:
+            return self._clarify("order_status", trace, "look up its live status")
+
+        order, policy = self._wave(oid, DELIVERY_POLICY_QUERY, trace)
+        if not order or not order.get("found"):
+            return self._not_found("order_status", oid, trace)
+
+        citations = [_citation("shipping_sla.md", "§1")]
+        status = order["status"]
+        shipped = order.get("shipped_days_ago")
+
+        if status == "Processing":
+            return _response(
+                "order_status",
+                f"📦 **Order {oid}** ({order['item']}) is being prepared and will be dispatched "
+                "within **1 business day**. You'll get a tracking number by email once it ships.",
+                citations, trace + ["Final Answer: Order not yet dispatched; state dispatch SLA."],
+            )
+
+        if status == "Cancelled":
+            return _response(
+                "order_status",
+                f"**Order {oid}** ({order['item']}) was cancelled. Refund status: **{order.get('refund_status', 'Pending')}**.",
+                [_citation("refund_guidelines.md", "§5")], trace + ["Final Answer: Report cancellation and refund status."],
+            )
+
+        if status == "Delivered":
+            return _response(
+                "order_status",
+                f"📦 **Order {oid}** ({order['item']}) was **delivered on {order['delivery_date']}** via {order['carrier']}.\n\n"
+                "If you can't find it, let me know and I'll help you open a claim.",
+                citations + [_citation("shipping_sla.md", "§3")], trace + ["Final Answer: Report delivery date, offer claim help."],
+            )
+
+        if status == "Delayed" or (shipped is not None and shipped > SLA_DAYS):
+            trace.append(f"Thought: Shipped {shipped} days ago, beyond the {SLA_DAYS}-day SLA → delayed.")
+            trace.append("Guardrail: SLA breach → route to escalation node.")
+            return _response(
+                "order_status",
+                f"⏳ **Order {oid}** ({order['item']}) is **delayed**. It shipped {shipped} days ago with "
+                f"{order['carrier']}; last scan: {order.get('last_scan', 'unknown')}.\n\n"
+                "That's beyond our standard **5–7 business day** window, so I've asked a support agent "
+                "to open a carrier investigation. You'll hear back within **24 hours**.",
+                citations + [_citation("shipping_sla.md", "§4")], trace,
+                ticket=_ticket(
+                    "Delayed Order", "order_status", order,
+                    reason=f"Beyond the {SLA_DAYS}-day delivery SLA",
+                    action="Open carrier investigation / offer replacement",
+                    details=[
+                        f"Shipped: {order['ship_date']} ({shipped} days ago) via {order['carrier']}",
+                        f"Last scan: {order.get('last_scan', 'unknown')}",
+                    ],
+                ),
+            )
+
+        eta = f"- **Estimated Delivery:** {order['eta']}\n" if order.get("eta") else ""
+        return _response(
+            "order_status",
+            f"📦 **Order {oid}** is currently **{status}** via {order['carrier']}.\n\n"
+            f"{eta}- **Last Scan:** {order.get('last_scan', 'not available')}\n\n"
+            f"Our standard delivery window is **5–7 business days**. It shipped {shipped} days ago, "
+            "well within the expected range.",
+            citations, trace + ["Thought: Within SLA. Safe to report ETA without escalation.",
+                                "Final Answer: Compose status response with ETA and policy grounding."],
+        )
+
+    # ── UJ2: Return / Refund ──────────────────────────────────────────────────
+    def _return_refund(self, user_query: str, oid: Optional[str], trace: List[str]) -> dict:
+        order, policy = self._wave(oid, user_query, trace)
+        financial = bool(FINANCIAL_ACTION.search(user_query))
+
+        if not oid:
+            excerpt = policy["chunks"][0]["text"] if policy["chunks"] else ""
+            gate = (
+                "\n\n⚠️ Refunds and cancellations above $50 need a support agent's approval, "
+                "so I can't process one directly." if financial else ""
+            )
+            return _response(
+                "return_refund",
+                f"Here's what our policy says:\n\n> {excerpt}\n\n"
+                f"If you share your order ID, I can check whether your item is eligible.{gate}",
+                policy["citations"][:1] + ([_citation("refund_guidelines.md", "§3")] if financial else []),
+                trace + ["Final Answer: Policy answer; ask for order ID to check eligibility."],
+            )
+
+        if not order or not order.get("found"):
+            return self._not_found("return_refund", oid, trace)
+
+        eligibility = return_eligibility_tool(order, reason=user_query)
+        trace.append(f"Action: return_eligibility_tool({oid}) → eligible={eligibility['eligible']}, {eligibility['reason']}")
+
+        citations = [_citation("return_policy.md", "§2")] + policy["citations"][:1]
+        if order.get("on_sale"):
+            citations.append(_citation("return_policy.md", "§4"))
+
+        if not eligibility["eligible"]:
+            return _response(
+                "return_refund",
+                f"❌ **Order {oid}** ({order['item']}) isn't eligible for a return: {eligibility['reason']}.\n\n"
+                "If you believe this is a mistake, I can connect you with a support agent.",
+                citations, trace + ["Guardrail: Must NOT approve an ineligible return.",
+                                    "Final Answer: Explain ineligibility with policy citation."],
+            )
+
+        amount = eligibility["refund_amount"]
+        if eligibility["requires_approval"]:
+            trace.append(f"Guardrail: refund ${amount:.2f} > ${AUTO_APPROVAL_LIMIT:.0f} or defective → financial_flag=True → HITL.")
+            return _response(
+                "return_refund",
+                f"✅ **Good news — order {oid} ({order['item']}) is eligible for a return** "
+                f"({eligibility['reason']}).\n\n"
+                f"- **Refund Amount:** ${amount:.2f} (original payment method)\n"
+                "- **Condition:** unworn / unused, original packaging and tags\n\n"
+                f"⚠️ Because this involves a refund of **${amount:.2f}**, I'm flagging it for a support agent "
+                "to confirm and process. You'll receive a confirmation email within **24 hours**.",
+                citations + [_citation("refund_guidelines.md", "§3")], trace,
+                ticket=_ticket(
+                    "Return Request", "return_refund", order,
+                    reason=f"Refund ${amount:.2f} needs approval (limit ${AUTO_APPROVAL_LIMIT:.0f} or defective item)",
+                    action="Agent to approve & process refund",
+                    details=[f"Eligibility: ✅ Confirmed ({eligibility['reason']})", f"Refund Amount: ${amount:.2f}"],
+                    financial=True,
+                ),
+            )
+
+        return _response(
+            "return_refund",
+            f"✅ **Order {oid} ({order['item']}) is eligible for a return** ({eligibility['reason']}).\n\n"
+            f"Your refund of **${amount:.2f}** is approved automatically once we receive the item, and is "
+            "processed within **5–7 business days**. A prepaid return label is on its way to your email.",
+            citations + [_citation("refund_guidelines.md", "§4")],
+            trace + ["Thought: Refund within auto-approval limit. No HITL needed."],
+        )
+
+    # ── UJ3: Shipping Dispute ─────────────────────────────────────────────────
+    def _shipping_dispute(self, user_query: str, oid: Optional[str], trace: List[str]) -> dict:
+        if not oid:
+            return self._clarify("shipping_dispute", trace, "check the delivery record")
+
+        damage_reported = bool(DAMAGE_WORDS.search(user_query))
+        query = DAMAGE_POLICY_QUERY if damage_reported else LOST_PACKAGE_POLICY_QUERY
+        order, policy = self._wave(oid, query, trace)
+
+        if not order or not order.get("found"):
+            return self._not_found("shipping_dispute", oid, trace)
+
+        if order["status"] != "Delivered":
+            return _response(
+                "shipping_dispute",
+                f"**Order {oid}** isn't marked as delivered yet — it's currently **{order['status']}** "
+                f"with {order.get('carrier') or 'our warehouse'}. I'll be happy to help if it doesn't arrive.",
+                [_citation("shipping_sla.md", "§1")], trace,
+            )
+
+        days = order["delivered_days_ago"]
+        if damage_reported or order.get("damaged") or order.get("wrong_item"):
+            problem = "wrong item" if order.get("wrong_item") else "damaged item"
+            trace.append("Guardrail: replacement / refund requested → financial_flag=True → HITL.")
+            return _response(
+                "shipping_dispute",
+                f"🔍 **I'm sorry your order arrived like that.** Order {oid} ({order['item']}) was delivered on "
+                f"{order['delivery_date']}.\n\n"
+                "Please keep the item and packaging and have photos ready. We'll arrange a **free return** and "
+                "either a **replacement or a full refund**. A support agent needs to approve it and will contact "
+                "you within **24 hours**.",
+                [_citation("shipping_sla.md", "§5"), _citation("refund_guidelines.md", "§6")], trace,
+                ticket=_ticket(
+                    "Shipping Dispute", "shipping_dispute", order,
+                    reason=f"{problem.capitalize()} reported {days} days after delivery",
+                    action="Approve replacement or refund, request photos",
+                    financial=True,
+                ),
+            )
+
+        citations = [_citation("shipping_sla.md", "§3")]
+        if days > CLAIM_WINDOW_DAYS:
+            trace.append(f"Thought: Delivered {days} days ago, outside the {CLAIM_WINDOW_DAYS}-day claim window.")
+            return _response(
+                "shipping_dispute",
+                f"Our records show order {oid} was **delivered on {order['delivery_date']}**, {days} days ago. "
+                f"That's outside the **{CLAIM_WINDOW_DAYS}-day claim window**, so I've passed it to a support "
+                "agent to review.",
+                citations, trace,
+                ticket=_ticket(
+                    "Late Lost-Package Claim", "shipping_dispute", order,
+                    reason=f"Delivered {days} days ago (claim window {CLAIM_WINDOW_DAYS} days)",
+                    action="Review out-of-window claim",
+                ),
+            )
+
+        return _response(
+            "shipping_dispute",
+            f"🔍 **We're sorry to hear that.** Our records show order {oid} was marked "
+            f"**delivered on {order['delivery_date']}** via {order['carrier']}.\n\n"
+            "Here's what I recommend:\n"
+            "1. Check with neighbours or a safe-drop location\n"
+            f"2. If still missing, you can file a **carrier claim within {CLAIM_WINDOW_DAYS} days** of the delivery date "
+            f"(you're on day {days})\n\n"
+            "Would you like me to escalate this to our support team to open a carrier investigation on your behalf?",
+            citations, trace + ["Thought: Within claim window. No financial action yet; offer escalation."],
+        )
+
+    # ── Escalation request ────────────────────────────────────────────────────
+    def _escalation(self, user_query: str, oid: Optional[str], trace: List[str]) -> dict:
+        order = None
+        if oid:
+            # Through the executor, so the lookup shares the order cache
+            wave = self.executor.run_wave([ToolCall("order_status_tool", {"order_id": oid}, label="order")])
+            order = wave["order"]
+            for label, error in wave.errors.items():
+                trace.append(f"Error: {label} failed — {error}")
+        trace.append("Thought: Customer explicitly asked for a human / raised a complaint.")
+        trace.append("Guardrail: escalation requested → route to escalation node.")
+        return _response(
+            "escalation",
+            "🙋 **I'm connecting you with a member of our support team.**\n\n"
+            "I've shared the details of this conversation so you won't need to repeat yourself. "
+            "A human agent will get back to you within **24 hours**.",
+            trace=trace + ["Final Answer: Confirm handover and set 24hr expectation."],
+            ticket=_ticket(
+                "Customer Request", "escalation", order,
+                reason="Customer asked for a human agent",
+                action="Agent to contact customer",
+                details=[f"Customer message: \"{user_query}\""],
+            ),
+        )
+
+    # ── Out of scope ──────────────────────────────────────────────────────────
+    def _out_of_scope(self, user_query: str, oid: Optional[str], trace: List[str]) -> dict:
+        return _response(
+            "out_of_scope",
+            "I'm specialised in order tracking, returns, refunds, and shipping issues. "
+            "I'm not able to help with that particular request, but I can connect you with "
+            "the right team. Is there anything order-related I can help you with?",
+            trace=trace + ["Thought: Query is outside support domain.", "Final Answer: Politely redirect."],
+        )
@@ -0,0 +1,321 @@
+"""
+Sentinela — Escalation ticket pipeline
+
+    agent ──submit()──► in-memory queue ──writer thread──► SQLite (append-only)
+                                                              │
+                                                   batches of undelivered rows
+                                                              ▼
+                                                     TicketSink.send(batch)
+
+submit() only enqueues, so the chat request never waits on disk or on the
+helpdesk. The writer thread inserts tickets in batches (one transaction per
+batch) and delivers undelivered rows to the sink in batches; a failed batch
+stays undelivered and is retried on the next pass. JsonlSink is the local
+stand-in for the helpdesk API (Zendesk / ServiceNow).
+
+Tickets are never sampled; only the agent's reasoning trace is, to keep rows
+small (trace_sample_rate).
+"""
+
+import json
+import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Protocol
+
+DATA_DIR = Path(os.getenv("SENTINELA_DATA_DIR", Path(__file__).parent / "data"))
+TICKET_DB_PATH = DATA_DIR / "escalations.db"
+OUTBOX_PATH = DATA_DIR / "helpdesk_outbox.jsonl"
+
+
+# ── Ticket record ─────────────────────────────────────────────────────────────
+@dataclass
+class EscalationTicket:
+    title: str                                    # "Return Request", "Delayed Order", ...
+    intent: str
+    reason: str                                   # why the HITL gate fired
+    action_required: str
+    order_id: Optional[str] = None
+    item: Optional[str] = None
+    amount: Optional[float] = None
+    order_status: Optional[str] = None
+    details: List[str] = field(default_factory=list)
+    financial: bool = False                       # refund / replacement needs approval
+    customer: str = "session user"                # no email: tickets are written to disk
+    trace: List[str] = field(default_factory=list)
+    ticket_id: str = field(default_factory=lambda: f"ESC-{uuid.uuid4().hex[:8].upper()}")
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat(timespec="seconds"))
+
+    @property
+    def priority(self) -> str:
+        return "high" if self.financial else "normal"
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "priority": self.priority}
+
+    def to_markdown(self) -> str:
+        lines = [
+            f"**Escalation Ticket — {self.title}** ({self.ticket_id})",
+            f"- Order: {self.order_id or 'not provided'} | Customer: {self.customer}",
+        ]
+        if self.item:
+            lines.append(f"- Item: {self.item} | Amount: ${self.amount:.2f} | Status: {self.order_status}")
+        lines.append(f"- Reason: {self.reason}")
+        lines.extend(f"- {detail}" for detail in self.details)
+        lines.append(f"- Action Required: {self.action_required}")
+        lines.append(f"- Priority: {self.priority} | Raised: {self.created_at.replace('T', ' ')[:16]}")
+        return "\n".join(lines)
+
+
+# ── Sinks ─────────────────────────────────────────────────────────────────────
+class TicketSink(Protocol):
+    def send(self, tickets: List[dict]) -> None:
+        """Delivers a batch; raising marks the whole batch for retry."""
+
+
+class JsonlSink:
+    """Local stand-in for the helpdesk API: appends each batch to a JSONL outbox."""
+
+    def __init__(self, path: Path = OUTBOX_PATH, latency: float = 0.0):
+        self.path = Path(path)
+        self.latency = latency                    # simulated round trip per batch
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def send(self, tickets: List[dict]) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for ticket in tickets:
+                f.write(json.dumps(ticket, ensure_ascii=False) + "\n")
+
+
+# ── Queue ─────────────────────────────────────────────────────────────────────
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickets (
+    seq          INTEGER PRIMARY KEY AUTOINCREMENT,
+    ticket_id    TEXT UNIQUE NOT NULL,
+    created_at   TEXT NOT NULL,
+    intent       TEXT NOT NULL,
+    priority     TEXT NOT NULL,
+    payload      TEXT NOT NULL,
+    enqueued_at  REAL NOT NULL,
+    delivered_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_tickets_undelivered ON tickets (seq) WHERE delivered_at IS NULL;
+"""
+
+
+class TicketQueue:
+    """
+    Append-only ticket store with a single background writer.
+
+    Rows are only ever inserted, plus a delivered_at stamp once the sink
+    accepts them, so the table doubles as the audit log. Undelivered rows
+    survive restarts and are delivered by the next writer.
+    """
+
+    def __init__(self, path: Path = TICKET_DB_PATH, sink: Optional[TicketSink] = None,
+                 batch_size: int = 50, flush_interval: float = 0.25,
+                 retry_interval: float = 5.0, trace_sample_rate: float = 0.1):
+        self.path = Path(path)
+        self.sink = sink or JsonlSink()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        self.trace_sample_rate = trace_sample_rate
+
+        self.submitted = 0
+        self.written = 0
+        self.delivered = 0
+        self.write_batches = 0
+        self.delivery_batches = 0
+        self.failed_deliveries = 0
+        self.undelivered = 0
+        self.writer_errors = 0
+        self.last_error = ""
+        self._write_seconds = 0.0
+        self._delivery_seconds = 0.0
+        self._delivery_latency: List[float] = []
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._retry_at = 0.0
+        self._ready = threading.Event()       # set once leftover rows are counted
+        self._progress = threading.Condition()  # notified after every commit
+        self._stopped = threading.Event()
+        self._writer = threading.Thread(target=self._run, name="sentinela-tickets", daemon=True)
+        self._writer.start()
+
+    # ── Request path ──────────────────────────────────────────────────────────
+    def submit(self, ticket: EscalationTicket) -> str:
+        """Non-blocking: enqueues the ticket and returns its id."""
+        if ticket.trace and random.random() >= self.trace_sample_rate:
+            ticket.trace = []
+        self.submitted += 1
+        self._queue.put((ticket.to_dict(), time.time()))
+        return ticket.ticket_id
+
+    # ── Writer thread ─────────────────────────────────────────────────────────
+    def _run(self) -> None:
+        db: Optional[sqlite3.Connection] = None
+        batch: list = []
+        stopping = False
+        backoff = self.flush_interval
+
+        while True:
+            drained = self._drain()
+            if drained and drained[-1] is None:
+                stopping = True
+                drained.pop()
+                self._queue.task_done()
+            batch.extend(drained)
+
+            try:
+                if db is None:
+                    db = self._connect()
+                if batch:
+                    self._write(db, batch)
+                    batch = []
+                pending = self._deliver(db)
+            except Exception as e:
+                # Keep the thread alive: unwritten tickets stay in `batch`
+                # and are retried on a fresh connection after a backoff
+                self.writer_errors += 1
+                self.last_error = repr(e)
+                if db is not None:
+                    db.close()
+                    db = None
+                if stopping:
+                    break
+                time.sleep(backoff)
+                backoff = min(backoff * 2, self.retry_interval)
+                continue
+
+            backoff = self.flush_interval
+            if stopping and (not pending or time.time() < self._retry_at):
+                break
+
+        if db is not None:
+            db.close()
+        self._stopped.set()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path)
+        db.executescript(SCHEMA)
+        with self._progress:
+            self.undelivered = db.execute("SELECT COUNT(*) FROM tickets WHERE delivered_at IS NULL").fetchone()[0]
+            self._ready.set()
+            self._progress.notify_all()
+        return db
+
+    def _drain(self) -> list:
+        """Blocks up to flush_interval for the first item, then takes what is queued."""
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size and batch[-1] is not None:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, db: sqlite3.Connection, batch: list) -> None:
+        start = time.perf_counter()
+        changes = db.total_changes
+        with db:
+            db.executemany(
+                "INSERT OR IGNORE INTO tickets (ticket_id, created_at, intent, priority, payload, enqueued_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (t["ticket_id"], t["created_at"], t["intent"], t["priority"], json.dumps(t, ensure_ascii=False), enqueued)
+                    for t, enqueued in batch
+                ],
+            )
+        self._write_seconds += time.perf_counter() - start
+        self.written += len(batch)
+        self.write_batches += 1
+
+        # Counted as undelivered before the queue items are marked done,
+        # so flush() never sees an empty queue and no pending rows in between
+        with self._progress:
+            self.undelivered += db.total_changes - changes
+            for _ in batch:
+                self._queue.task_done()
+            self._progress.notify_all()
+
+    def _deliver(self, db: sqlite3.Connection) -> int:
+        """Sends undelivered rows in batches; returns how many are still pending."""
+        while time.time() >= self._retry_at:
+            rows = db.execute(
+                "SELECT seq, payload, enqueued_at FROM tickets WHERE delivered_at IS NULL ORDER BY seq LIMIT ?",
+                (self.batch_size,),
+            ).fetchall()
+            if not rows:
+                self._set_undelivered(0)
+                return 0
+
+            start = time.perf_counter()
+            try:
+                self.sink.send([json.loads(payload) for _, payload, _ in rows])
+            except Exception as e:
+                self.failed_deliveries += 1
+                self.last_error = repr(e)
+                self._retry_at = time.time() + self.retry_interval
+                break
+            self._delivery_seconds += time.perf_counter() - start
+
+            now = time.time()
+            with db:
+                db.executemany("UPDATE tickets SET delivered_at = ? WHERE seq = ?", [(now, seq) for seq, _, _ in rows])
+            self.delivered += len(rows)
+            self.delivery_batches += 1
+            self._delivery_latency.extend(now - enqueued for _, _, enqueued in rows)
+            del self._delivery_latency[:-1000]
+
+        self._set_undelivered(db.execute("SELECT COUNT(*) FROM tickets WHERE delivered_at IS NULL").fetchone()[0])
+        return self.undelivered
+
+    def _set_undelivered(self, count: int) -> None:
+        with self._progress:
+            self.undelivered = count
+            self._progress.notify_all()
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Waits until every submitted ticket is written and delivered."""
+        with self._progress:
+            return self._progress.wait_for(
+                lambda: self._ready.is_set() and self._queue.unfinished_tasks == 0 and self.undelivered == 0,
+                timeout,
+            )
+
+    def close(self, timeout: float = 10.0) -> None:
+        self._queue.put(None)
+        self._stopped.wait(timeout)
+
+    # ── Metrics ───────────────────────────────────────────────────────────────
+    def stats(self) -> Dict[str, float]:
+        latency = sorted(self._delivery_latency)
+        return {
+            "submitted": self.submitted,
+            "written": self.written,
+            "delivered": self.delivered,
+            "pending": self._queue.unfinished_tasks + self.undelivered,
+            "write_batches": self.write_batches,
+            "delivery_batches": self.delivery_batches,
+            "failed_deliveries": self.failed_deliveries,
+            "writer_errors": self.writer_errors,
+            "write_tps": self.written / self._write_seconds if self._write_seconds else 0.0,
+            "delivery_tps": self.delivered / self._delivery_seconds if self._delivery_seconds else 0.0,
+            "p50_delivery_s": latency[len(latency) // 2] if latency else 0.0,
+            "p95_delivery_s": latency[int(len(latency) * 0.95)] if latency else 0.0,
+        }
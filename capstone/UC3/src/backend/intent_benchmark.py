@@ -0,0 +1,124 @@
+"""
+Sentinela — Intent classifier benchmark
+
+Scores the classifier on the held-out 'test' split of
+mockdata/intent_examples.json and measures throughput:
+
+- accuracy and per-intent accuracy (centroid only)
+- how many messages fall below the confidence threshold (would go to the LLM)
+- accuracy of the confident messages alone
+- messages/second for single-message and batched prediction
+- the original keyword router from the frontend stub, for comparison
+
+    python intent_benchmark.py
+    python intent_benchmark.py --thresholds 0.3 0.5 0.7
+    python intent_benchmark.py --llm          # also score the LLM fallback (needs OPENAI_API_KEY)
+"""
+
+import argparse
+import json
+import time
+from collections import Counter, defaultdict
+
+from intent_classifier import EXAMPLES_PATH, INTENTS, IntentClassifier
+
+
+# ── Keyword baseline (the routing rules of the original call_agent stub) ──────
+def keyword_intent(query: str) -> str:
+    q = query.lower()
+    if any(kw in q for kw in ["where is", "track", "status", "order", "arrived", "delivery", "late"]):
+        return "order_status"
+    if any(kw in q for kw in ["return", "refund", "send back", "exchange", "policy"]):
+        return "return_refund"
+    if any(kw in q for kw in ["delivered but", "not received", "missing", "wrong item", "damaged", "lost", "dispute"]):
+        return "shipping_dispute"
+    return "out_of_scope"
+
+
+# ── Helpers ───────────────────────────────────────────────────────────────────
+def load_split(split: str):
+    with open(EXAMPLES_PATH) as f:
+        data = json.load(f)
+    return [(text, label) for label in INTENTS for text in data[split].get(label, [])]
+
+
+def accuracy(pairs) -> float:
+    return sum(predicted == label for predicted, label in pairs) / len(pairs) if pairs else 0.0
+
+
+def throughput(fn, texts, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(texts)
+    return repeat * len(texts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sentinela intent classifier benchmark")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.5])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--llm", action="store_true", help="score the LLM fallback as well")
+    args = parser.parse_args()
+
+    test = load_split("test")
+    texts = [text for text, _ in test]
+    labels = [label for _, label in test]
+
+    start = time.perf_counter()
+    classifier = IntentClassifier.from_examples()
+    fit_ms = (time.perf_counter() - start) * 1000
+
+    predictions = classifier.predict_local(texts)
+
+    print(f"Train: {len(load_split('train'))} examples (fit {fit_ms:.1f} ms) | Test: {len(test)} messages\n")
+
+    # ── Accuracy ──────────────────────────────────────────────────────────────
+    per_intent = defaultdict(list)
+    for prediction, label in zip(predictions, labels):
+        per_intent[label].append((prediction.intent, label))
+
+    print(f"Keyword baseline accuracy:  {accuracy([(keyword_intent(t), l) for t, l in test]):.1%}")
+    print(f"Centroid accuracy:          {accuracy([(p.intent, l) for p, l in zip(predictions, labels)]):.1%}")
+    for label in INTENTS:
+        print(f"  {label:<18} {accuracy(per_intent[label]):.1%}")
+
+    confusion = Counter((l, p.intent) for p, l in zip(predictions, labels) if p.intent != l)
+    if confusion:
+        print("\nMost common confusions (true -> predicted):")
+        for (label, predicted), count in confusion.most_common(5):
+            print(f"  {label} -> {predicted}: {count}")
+
+    # ── Confidence threshold ──────────────────────────────────────────────────
+    print("\nthreshold  to_llm  confident_accuracy")
+    for threshold in args.thresholds:
+        confident = [(p.intent, l) for p, l in zip(predictions, labels) if p.confidence >= threshold]
+        to_llm = len(test) - len(confident)
+        print(f"{threshold:>9.2f}  {to_llm / len(test):>6.1%}  {accuracy(confident):>18.1%}")
+
+    # ── Throughput ────────────────────────────────────────────────────────────
+    single = throughput(lambda batch: [classifier.predict_local([t]) for t in batch], texts, args.repeat)
+    batched = throughput(classifier.predict_local, texts, args.repeat)
+    keyword = throughput(lambda batch: [keyword_intent(t) for t in batch], texts, args.repeat)
+    print(f"\nThroughput: {single:,.0f} msg/s single, {batched:,.0f} msg/s batched "
+          f"(keyword baseline {keyword:,.0f} msg/s)")
+
+    # ── LLM fallback ──────────────────────────────────────────────────────────
+    if args.llm:
+        from dotenv import load_dotenv
+        from langchain_openai import ChatOpenAI
+
+        load_dotenv()
+        classifier.llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+        classifier.threshold = args.thresholds[0]
+
+        start = time.perf_counter()
+        routed = classifier.predict_many(texts)
+        elapsed = time.perf_counter() - start
+
+        print(f"\nWith LLM fallback (threshold {classifier.threshold}): "
+              f"accuracy {accuracy([(p.intent, l) for p, l in zip(routed, labels)]):.1%}, "
+              f"{classifier.llm_calls} LLM calls, {elapsed:.1f}s total")
+
+
+if __name__ == "__main__":
+    main()
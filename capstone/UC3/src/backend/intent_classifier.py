@@ -0,0 +1,182 @@
+"""
+Sentinela — Intent Classification Engine
+
+Routes every customer message to one of:
+order_status | return_refund | shipping_dispute | escalation | out_of_scope
+
+Fast path: nearest-centroid over embeddings of labelled examples
+(mockdata/intent_examples.json). One matrix product per batch, no network
+call. Only messages whose confidence falls below the threshold are sent to
+the LLM router.
+"""
+
+import json
+import re
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+INTENTS = ["order_status", "return_refund", "shipping_dispute", "escalation", "out_of_scope"]
+
+EXAMPLES_PATH = Path(__file__).parent / "mockdata" / "intent_examples.json"
+
+LLM_ROUTER_PROMPT = """You route customer support messages for an online store.
+
+Intents:
+- order_status: where is my order, tracking, delivery date, shipping progress
+- return_refund: returns, exchanges, refunds, return policy and eligibility
+- shipping_dispute: delivered but not received, damaged, wrong or missing items, lost parcels
+- escalation: asks for a human, manager or supervisor, complaints, threats to dispute
+- out_of_scope: anything unrelated to orders, returns or shipping
+
+Message: {message}
+
+Reply with the intent name only."""
+
+
+# ── Local embeddings ──────────────────────────────────────────────────────────
+class HashingVectorizer:
+    """
+    Word unigrams + bigrams and character 4-grams, hashed into a fixed-size
+    vector. Character n-grams make "refunded" / "refund" and typos land close
+    together. Pure numpy, deterministic, no model download.
+    """
+
+    def __init__(self, dim: int = 4096, stopwords: Optional[set] = None):
+        self.dim = dim
+        self.stopwords = stopwords or set()
+
+    def _features(self, text: str) -> List[str]:
+        words = [w for w in re.findall(r"[a-z0-9']+", text.lower()) if w not in self.stopwords]
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for word in words:
+            padded = f"<{word}>"
+            features.extend(f"#{padded[i:i + 4]}" for i in range(max(1, len(padded) - 3)))
+        return features
+
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype="float32")
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                h = zlib.crc32(feature.encode("utf-8"))
+                matrix[row, h % self.dim] += 1.0 if (h >> 16) & 1 else -1.0
+        return matrix
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self.embed_documents([text])[0]
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+# ── Prediction ────────────────────────────────────────────────────────────────
+@dataclass
+class IntentPrediction:
+    intent: str
+    confidence: float
+    source: str                                   # "centroid" | "llm" | "centroid (llm unavailable)"
+    scores: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def trace(self) -> str:
+        return f"Intent: {self.intent} (confidence {self.confidence:.2f}, {self.source})"
+
+
+# ── Classifier ────────────────────────────────────────────────────────────────
+class IntentClassifier:
+    """
+    Nearest-centroid intent classifier with an LLM fallback.
+
+    confidence is a softmax over the cosine similarity to each centroid;
+    below `threshold` the message is considered ambiguous and, if an LLM
+    is configured, routed by the LLM instead.
+
+    `embeddings` may be any LangChain Embeddings (e.g. OpenAIEmbeddings);
+    by default the local HashingVectorizer is used.
+    """
+
+    def __init__(self, embeddings=None, llm=None, threshold: float = 0.5, temperature: float = 20.0):
+        self.embeddings = embeddings or HashingVectorizer()
+        self.llm = llm
+        self.threshold = threshold
+        self.temperature = temperature
+
+        self.labels: List[str] = []
+        self.centroids: Optional[np.ndarray] = None
+        self.llm_calls = 0
+
+    # ── Training ──────────────────────────────────────────────────────────────
+    def fit(self, examples: Dict[str, List[str]]) -> "IntentClassifier":
+        self.labels = [label for label in INTENTS if examples.get(label)]
+        centroids = [
+            normalize_rows(self._embed(examples[label])).mean(axis=0)
+            for label in self.labels
+        ]
+        self.centroids = normalize_rows(np.vstack(centroids))
+        return self
+
+    @classmethod
+    def from_examples(cls, path: Path = EXAMPLES_PATH, **kwargs) -> "IntentClassifier":
+        with open(path) as f:
+            data = json.load(f)
+        return cls(**kwargs).fit(data["train"])
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self.embeddings.embed_documents(texts), dtype="float32")
+
+    # ── Inference ─────────────────────────────────────────────────────────────
+    def scores(self, texts: List[str]) -> np.ndarray:
+        """Returns (len(texts), len(labels)) softmax probabilities."""
+        if self.centroids is None:
+            raise RuntimeError("IntentClassifier.fit() must be called before predicting")
+
+        similarity = normalize_rows(self._embed(texts)) @ self.centroids.T
+        logits = self.temperature * similarity
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        return probs / probs.sum(axis=1, keepdims=True)
+
+    def predict_local(self, texts: List[str]) -> List[IntentPrediction]:
+        """Centroid-only predictions for a batch, no LLM calls."""
+        probs = self.scores(texts)
+        best = probs.argmax(axis=1)
+        return [
+            IntentPrediction(
+                intent=self.labels[i],
+                confidence=float(row[i]),
+                source="centroid",
+                scores={label: round(float(p), 4) for label, p in zip(self.labels, row)},
+            )
+            for i, row in zip(best, probs)
+        ]
+
+    def predict_many(self, texts: List[str]) -> List[IntentPrediction]:
+        predictions = self.predict_local(texts)
+        for text, prediction in zip(texts, predictions):
+            if prediction.confidence < self.threshold:
+                self._fallback(text, prediction)
+        return predictions
+
+    def predict(self, text: str) -> IntentPrediction:
+        return self.predict_many([text])[0]
+
+    def _fallback(self, text: str, prediction: IntentPrediction) -> None:
+        if self.llm is None:
+            return
+
+        try:
+            reply = self.llm.invoke(LLM_ROUTER_PROMPT.format(message=text)).content
+            self.llm_calls += 1
+        except Exception:
+            prediction.source = "centroid (llm unavailable)"
+            return
+
+        label = reply.strip().strip(".").lower()
+        if label in INTENTS:
+            prediction.intent = label
+            prediction.source = "llm"
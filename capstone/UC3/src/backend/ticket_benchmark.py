@@ -0,0 +1,106 @@
+"""
+Sentinela — Escalation ticket pipeline benchmark
+
+Pushes N synthetic tickets through TicketQueue and reports:
+
+- submit() latency, i.e. what an escalation adds to the chat request
+- write and delivery throughput (tickets/s) and batch counts
+- enqueue → delivered latency
+- the same tickets written synchronously, one commit + one sink call each,
+  as the request path would do without the queue
+
+    python ticket_benchmark.py
+    python ticket_benchmark.py --tickets 5000 --sink-latency 0.05 --batch-size 100
+"""
+
+import argparse
+import json
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from escalation import SCHEMA, EscalationTicket, JsonlSink, TicketQueue
+
+
+def make_ticket(i: int) -> EscalationTicket:
+    return EscalationTicket(
+        title="Return Request",
+        intent="return_refund",
+        reason="Refund needs approval",
+        action_required="Agent to approve & process refund",
+        order_id=f"#{10000 + i}",
+        item="Trail Shoes",
+        amount=89.99,
+        order_status="Delivered",
+        financial=True,
+        trace=["Intent: return_refund (confidence 0.99, centroid)", f"Action: order_status_tool('#{10000 + i}')"],
+    )
+
+
+def synchronous(folder: Path, n: int, sink_latency: float) -> float:
+    db = sqlite3.connect(folder / "sync.db")
+    db.executescript(SCHEMA)
+    sink = JsonlSink(folder / "sync_outbox.jsonl", latency=sink_latency)
+
+    start = time.perf_counter()
+    for i in range(n):
+        t = make_ticket(i).to_dict()
+        with db:
+            db.execute(
+                "INSERT INTO tickets (ticket_id, created_at, intent, priority, payload, enqueued_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (t["ticket_id"], t["created_at"], t["intent"], t["priority"], json.dumps(t), time.time()),
+            )
+        sink.send([t])
+    elapsed = time.perf_counter() - start
+    db.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sentinela escalation ticket benchmark")
+    parser.add_argument("--tickets", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--sink-latency", type=float, default=0.02, help="simulated helpdesk round trip per call (s)")
+    parser.add_argument("--sync-tickets", type=int, default=200, help="tickets for the synchronous baseline")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        tickets = TicketQueue(
+            folder / "escalations.db",
+            sink=JsonlSink(folder / "outbox.jsonl", latency=args.sink_latency),
+            batch_size=args.batch_size,
+        )
+
+        submit_times = []
+        start = time.perf_counter()
+        for i in range(args.tickets):
+            t0 = time.perf_counter()
+            tickets.submit(make_ticket(i))
+            submit_times.append(time.perf_counter() - t0)
+        submitted = time.perf_counter() - start
+
+        tickets.flush(timeout=300)
+        drained = time.perf_counter() - start
+        tickets.close()
+        stats = tickets.stats()
+
+        submit_times.sort()
+        print(f"Tickets: {args.tickets} | batch size {args.batch_size} | sink latency {args.sink_latency * 1000:.0f} ms\n")
+        print(f"submit():  p50 {submit_times[len(submit_times) // 2] * 1e6:.0f} µs, "
+              f"p99 {submit_times[int(len(submit_times) * 0.99)] * 1e6:.0f} µs "
+              f"({args.tickets / submitted:,.0f} tickets/s on the request path)")
+        print(f"Written:   {stats['written']} in {stats['write_batches']} batches ({stats['write_tps']:,.0f} tickets/s)")
+        print(f"Delivered: {stats['delivered']} in {stats['delivery_batches']} batches "
+              f"({stats['delivered'] / drained:,.0f} tickets/s end to end, {drained:.2f}s to drain)")
+        print(f"Enqueue → delivered: p50 {stats['p50_delivery_s']:.2f}s, p95 {stats['p95_delivery_s']:.2f}s")
+
+        n = min(args.sync_tickets, args.tickets)
+        elapsed = synchronous(folder, n, args.sink_latency)
+        print(f"\nSynchronous baseline: {n / elapsed:,.0f} tickets/s, "
+              f"{elapsed / n * 1000:.1f} ms added to each escalated request")
+
+
+if __name__ == "__main__":
+    main()
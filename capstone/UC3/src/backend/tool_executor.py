@@ -0,0 +1,159 @@
+"""
+Sentinela — Tool executor
+
+Runs a "wave" of independent tool calls concurrently and caches results:
+
+- order_status_tool   per order id, short TTL (order status changes)
+- rag_policy_tool     per normalized query (policies change only on re-ingest)
+
+A wave returns once its slowest call finishes, instead of the sum of all
+calls. Cached calls return immediately without touching the pool.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+
+# ── Cache ─────────────────────────────────────────────────────────────────────
+class TTLCache:
+    """LRU cache with an optional time-to-live per entry (ttl=None: no expiry)."""
+
+    def __init__(self, ttl: Optional[float] = None, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and (self.ttl is None or time.monotonic() - entry[0] < self.ttl):
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self.entries[key] = (time.monotonic(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.entries.clear()
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, order ids and punctuation removed, whitespace collapsed."""
+    query = re.sub(r"#?\d{3,}", " ", query.lower())
+    return " ".join(re.findall(r"[a-z0-9$]+", query))
+
+
+# ── Calls ─────────────────────────────────────────────────────────────────────
+@dataclass
+class ToolCall:
+    tool: str
+    args: Dict[str, Any]
+    label: str = ""                   # key in the wave result, defaults to the tool name
+
+    def __post_init__(self):
+        self.label = self.label or self.tool
+
+    def __str__(self) -> str:
+        args = ", ".join(repr(v) for v in self.args.values())
+        return f"{self.tool}({args})"
+
+
+@dataclass
+class WaveResult:
+    results: Dict[str, Any]
+    cached: List[str] = field(default_factory=list)
+    errors: Dict[str, str] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    def __getitem__(self, label: str):
+        return self.results.get(label)
+
+
+@dataclass
+class _RegisteredTool:
+    fn: Callable
+    cache: Optional[TTLCache] = None
+    key: Optional[Callable[[Dict[str, Any]], Hashable]] = None
+
+
+# ── Executor ──────────────────────────────────────────────────────────────────
+class ToolExecutor:
+    def __init__(self, max_workers: int = 8):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sentinela-tool")
+        self.tools: Dict[str, _RegisteredTool] = {}
+        self.waves = 0
+        self.calls = 0
+
+    def register(self, name: str, fn: Callable, ttl: Optional[float] = None,
+                 cache: bool = False, key: Optional[Callable] = None, max_entries: int = 1024) -> None:
+        """
+        cache=True caches results per key(args) (default: all argument values),
+        expiring after ttl seconds when ttl is set.
+        """
+        self.tools[name] = _RegisteredTool(
+            fn=fn,
+            cache=TTLCache(ttl, max_entries) if cache else None,
+            key=key or (lambda args: tuple(sorted(args.items()))),
+        )
+
+    def _call(self, call: ToolCall):
+        tool = self.tools[call.tool]
+        result = tool.fn(**call.args)
+        if tool.cache is not None:
+            tool.cache.set(tool.key(call.args), result)
+        return result
+
+    def run_wave(self, calls: List[ToolCall]) -> WaveResult:
+        """Runs independent calls concurrently; cached results skip the pool."""
+        start = time.perf_counter()
+        wave = WaveResult(results={})
+        futures = {}
+
+        self.waves += 1
+        for call in calls:
+            tool = self.tools[call.tool]
+            if tool.cache is not None:
+                hit, value = tool.cache.get(tool.key(call.args))
+                if hit:
+                    wave.results[call.label] = value
+                    wave.cached.append(call.label)
+                    continue
+
+            self.calls += 1
+            futures[call.label] = self.pool.submit(self._call, call)
+
+        for label, future in futures.items():
+            try:
+                wave.results[label] = future.result()
+            except Exception as e:
+                wave.results[label] = None
+                wave.errors[label] = repr(e)
+
+        wave.elapsed = time.perf_counter() - start
+        return wave
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            name: {"hits": tool.cache.hits, "misses": tool.cache.misses, "entries": len(tool.cache.entries)}
+            for name, tool in self.tools.items()
+            if tool.cache is not None
+        }
@@ -0,0 +1,178 @@
+"""
+Sentinela — Agent tools
+
+T1 order_status_tool        mock order API (mockdata/mock_orders.json)
+T2 rag_policy_tool          semantic search over mockdata/policies/*.md
+T3 return_eligibility_tool  return window / condition / approval rules
+
+T1 and T2 stand in for remote calls (order API, vector store), so both
+accept a simulated latency via SENTINELA_MOCK_LATENCY (seconds).
+T3 is a pure function over T1 + T2 results.
+"""
+
+import json
+import os
+import re
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from intent_classifier import HashingVectorizer, normalize_rows
+
+MOCKDATA = Path(__file__).parent / "mockdata"
+ORDERS_PATH = MOCKDATA / "mock_orders.json"
+POLICIES_DIR = MOCKDATA / "policies"
+
+MOCK_LATENCY = float(os.getenv("SENTINELA_MOCK_LATENCY", "0"))
+
+RETURN_WINDOW_DAYS = 30
+AUTO_APPROVAL_LIMIT = 50.00
+NON_RETURNABLE = {"gift_card"}
+
+# Intent routing needs words like "where" / "my"; policy search does not
+POLICY_STOPWORDS = {
+    "a", "an", "and", "are", "can", "do", "does", "for", "from", "get", "how",
+    "i", "i'd", "i'm", "if", "in", "is", "it", "me", "my", "of", "on", "or",
+    "the", "this", "to", "want", "what", "when", "where", "will", "with",
+    "you", "your", "long", "take", "now", "please",
+}
+
+
+# ── Helpers ───────────────────────────────────────────────────────────────────
+def normalize_order_id(order_id: Optional[str]) -> Optional[str]:
+    if not order_id:
+        return None
+    match = re.search(r"\d{3,}", order_id)
+    return f"#{match.group(0)}" if match else None
+
+
+def extract_order_id(text: str) -> Optional[str]:
+    match = re.search(r"(?:#|order\s*(?:no\.?|number)?\s*#?)\s*(\d{3,})", text, re.IGNORECASE)
+    return f"#{match.group(1)}" if match else None
+
+
+def _days_ago(days: Optional[int]) -> Optional[str]:
+    if days is None:
+        return None
+    return (date.today() - timedelta(days=days)).strftime("%b %d")
+
+
+# ── T1: Order status ──────────────────────────────────────────────────────────
+with open(ORDERS_PATH) as f:
+    _ORDERS = {order["order_id"]: order for order in json.load(f)["orders"]}
+
+
+def order_status_tool(order_id: str) -> dict:
+    """Looks up an order. Returns {"found": False} for unknown ids."""
+    if MOCK_LATENCY:
+        time.sleep(MOCK_LATENCY)
+
+    order = _ORDERS.get(normalize_order_id(order_id))
+    if order is None:
+        return {"found": False, "order_id": order_id}
+
+    eta_days = order.get("eta_days")
+    return {
+        "found": True,
+        **order,
+        "order_date": _days_ago(order.get("ordered_days_ago")),
+        "ship_date": _days_ago(order.get("shipped_days_ago")),
+        "delivery_date": _days_ago(order.get("delivered_days_ago")),
+        "eta": (date.today() + timedelta(days=eta_days)).strftime("%b %d") if eta_days is not None else None,
+    }
+
+
+# ── T2: Policy retrieval ──────────────────────────────────────────────────────
+class PolicyIndex:
+    """
+    One vector per policy section ("## §n — Title"), searched by cosine similarity.
+    `embeddings` may be any LangChain Embeddings; the local vectorizer is the default.
+    """
+
+    def __init__(self, folder: Path = POLICIES_DIR, embeddings=None):
+        self.vectorizer = embeddings or HashingVectorizer(stopwords=POLICY_STOPWORDS)
+        self.sections = []
+
+        for path in sorted(folder.glob("*.md")):
+            text = path.read_text()
+            for match in re.finditer(r"^## (§\d+) — ([^\n]+)\n(.+?)(?=^## |\Z)", text, re.MULTILINE | re.DOTALL):
+                section, title, body = match.groups()
+                self.sections.append({
+                    "source": path.name,
+                    "section": section,
+                    "title": title.strip(),
+                    "text": " ".join(body.split()),
+                })
+
+        self.matrix = normalize_rows(np.asarray(self.vectorizer.embed_documents(
+            [f"{s['title']} {s['text']}" for s in self.sections]
+        ), dtype="float32"))
+
+    def search(self, query: str, k: int = 2) -> List[dict]:
+        query_vector = np.asarray([self.vectorizer.embed_query(query)], dtype="float32")
+        scores = self.matrix @ normalize_rows(query_vector)[0]
+        top = np.argsort(-scores)[:k]
+        return [{**self.sections[i], "score": round(float(scores[i]), 3)} for i in top]
+
+
+_POLICY_INDEX = PolicyIndex()
+
+
+def rag_policy_tool(query: str, k: int = 2) -> dict:
+    """Returns the k most relevant policy sections with citations and a confidence score."""
+    if MOCK_LATENCY:
+        time.sleep(MOCK_LATENCY)
+
+    chunks = _POLICY_INDEX.search(query, k=k)
+    return {
+        "query": query,
+        "chunks": chunks,
+        "citations": [f"{c['source']} {c['section']} — {c['title']}" for c in chunks],
+        "confidence": chunks[0]["score"] if chunks else 0.0,
+    }
+
+
+def policy_section(source: str, section: str) -> dict:
+    """Direct lookup of a known section (used for citations of fixed rules)."""
+    for s in _POLICY_INDEX.sections:
+        if s["source"] == source and s["section"] == section:
+            return s
+    raise KeyError(f"{source} {section}")
+
+
+# ── T3: Return eligibility ────────────────────────────────────────────────────
+def return_eligibility_tool(order: dict, reason: str = "") -> dict:
+    """
+    Applies return_policy.md §2–§5 and refund_guidelines.md §3 to an order.
+    """
+    if not order.get("found"):
+        return {"eligible": False, "reason": "order not found", "refund_amount": 0.0, "requires_approval": False}
+
+    defective = bool(order.get("damaged") or order.get("wrong_item")) or bool(
+        re.search(r"damaged|broken|defective|wrong", reason, re.IGNORECASE)
+    )
+    days = order.get("delivered_days_ago")
+
+    if order["status"] != "Delivered" or days is None:
+        verdict, why = False, f"order is {order['status'].lower()}, returns open after delivery"
+    elif order["category"] in NON_RETURNABLE:
+        verdict, why = False, "item category is non-returnable"
+    elif days > RETURN_WINDOW_DAYS:
+        verdict, why = False, f"delivered {days} days ago, outside the {RETURN_WINDOW_DAYS}-day window"
+    elif order.get("on_sale") and not defective:
+        verdict, why = False, "sale items are final unless defective"
+    else:
+        verdict, why = True, f"day {days} of {RETURN_WINDOW_DAYS}" + (", defective item" if defective else "")
+
+    amount = order["amount"] if verdict else 0.0
+    return {
+        "eligible": verdict,
+        "reason": why,
+        "days_since_delivery": days,
+        "defective": defective,
+        "refund_amount": amount,
+        "requires_approval": verdict and (amount > AUTO_APPROVAL_LIMIT or defective),
+    }
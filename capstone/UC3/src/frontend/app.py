@@ -5,8 +5,19 @@ Streamlit Frontend (Variation 1 & 2 compatible)
 Entry point: streamlit run app.py
 """
 
+import os
+import sys
+import uuid
 import streamlit as st
-from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+from backend_worker import BackendWorker
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "backend"))
+from agent import SentinelaAgent, build_executor  # noqa: E402
+from escalation import TicketQueue  # noqa: E402
+from intent_classifier import IntentClassifier  # noqa: E402
 
 # ── Page config ───────────────────────────────────────────────────────────────
 st.set_page_config(
@@ -182,6 +193,7 @@ def _init_state():
         "session_escalated": 0,
         "session_queries": 0,
         "show_trace": False,
+        "session_id": uuid.uuid4().hex,  # serializes this session's agent jobs
     }
     for k, v in defaults.items():
         if k not in st.session_state:
@@ -189,13 +201,36 @@ def _init_state():
 
 _init_state()
 
-# ── Mock agent call (stub — replace with LangChain / LangGraph backend) ────────
+# ── Backend worker (shared across sessions) ───────────────────────────────────
+@st.cache_resource
+def _load_backend() -> BackendWorker:
+    """Agent calls run off the script thread; results are kept per message id."""
+    return BackendWorker(max_workers=4)
+
+backend = _load_backend()
+
+# ── Agent (shared across sessions) ────────────────────────────────────────────
+@st.cache_resource
+def _load_agent() -> SentinelaAgent:
+    """
+    Local nearest-centroid intent router (only low-confidence messages go to
+    the LLM when OPENAI_API_KEY is set), the cached, parallel tool executor,
+    and the escalation ticket queue (written and delivered in the background).
+    """
+    llm = None
+    if os.getenv("OPENAI_API_KEY"):
+        from langchain_openai import ChatOpenAI
+        llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+    classifier = IntentClassifier.from_examples(llm=llm)
+    return SentinelaAgent(classifier, build_executor(), tickets=TicketQueue())
+
+agent = _load_agent()
+
 def call_agent(user_query: str, order_id: str) -> dict:
     """
-    Stub agent response. Replace this function body with your actual
-    LangChain AgentExecutor (Variation 1) or LangGraph graph.invoke() (Variation 2) call.
+    Classifies the message and runs the matching tool flow (see backend/agent.py).
 
-    Expected return schema:
+    Return schema:
     {
         "intent":    str,          # order_status | return_refund | shipping_dispute | escalation | out_of_scope
         "response":  str,          # final customer-facing message
@@ -205,112 +240,37 @@ def call_agent(user_query: str, order_id: str) -> dict:
         "escalation_ticket": str,  # formatted ticket string (only if escalated=True)
     }
     """
-    q = user_query.lower()
-
-    # ── UJ1: Order Status ──────────────────────────────────────────────────────
-    if any(kw in q for kw in ["where is", "track", "status", "order", "arrived", "delivery", "late"]):
-        oid = order_id or "#12345"
-        return {
-            "intent": "order_status",
-            "response": (
-                f"📦 **Order {oid}** is currently **In Transit** via FedEx.\n\n"
-                "- **Estimated Delivery:** Tomorrow by 8 PM\n"
-                "- **Last Scan:** Distribution centre, 6 hours ago\n\n"
-                "Our standard delivery window is **5–7 business days**. "
-                "You're currently on day 4, well within the expected range. "
-                "If it doesn't arrive by tomorrow evening, please reach out and we'll open a carrier investigation."
-            ),
-            "citations": ["shipping_sla.md §1 — Standard Delivery Window"],
-            "trace": [
-                "Thought: User is asking about order status. Need order ID.",
-                f"Action: order_status_tool({oid})",
-                "Observation: status=In Transit, carrier=FedEx, ETA=tomorrow",
-                "Action: rag_policy_tool('standard delivery timeline')",
-                "Observation: '5–7 business days from dispatch date'",
-                "Thought: Order is on day 4, within SLA. Safe to report ETA without escalation.",
-                "Final Answer: Compose status response with ETA and policy grounding.",
-            ],
-            "escalated": False,
-            "escalation_ticket": "",
-        }
+    return agent.run(user_query, order_id)
 
-    # ── UJ2: Return / Refund ───────────────────────────────────────────────────
-    if any(kw in q for kw in ["return", "refund", "send back", "exchange", "policy"]):
-        return {
-            "intent": "return_refund",
-            "response": (
-                "✅ **Good news — your item is eligible for a return.**\n\n"
-                "- **Return Window:** 30 days from purchase (you're on day 7)\n"
-                "- **Condition:** Item must be unworn / unopened with original packaging\n"
-                "- **Refund Amount:** $89.99 (original payment method)\n\n"
-                "⚠️ Because this involves a refund of **$89.99**, I'm flagging this for a "
-                "support agent to confirm and process. You'll receive a confirmation email within **24 hours**."
-            ),
-            "citations": ["return_policy.md §2 — 30-Day Window", "refund_guidelines.md §4 — Processing Time"],
-            "trace": [
-                "Thought: User wants to return an item. Need order details.",
-                "Action: order_status_tool(last_order_for_customer)",
-                "Observation: order #54321, purchase_date=Apr 11, item=shoes, amount=$89.99",
-                "Action: rag_policy_tool('return eligibility shoes')",
-                "Observation: '30-day window; must be unworn with original tags'",
-                "Action: return_eligibility_tool(order_id=#54321, reason='change of mind')",
-                "Observation: eligible=True, days_since_purchase=7, refund_amount=$89.99",
-                "Thought: Refund $89.99 exceeds $0 but triggers HITL check (threshold $50).",
-                "Guardrail: financial_flag=True → route to escalation node.",
-                "Final Answer: Confirm eligibility, inform HITL gate, set 24hr expectation.",
-            ],
-            "escalated": True,
-            "escalation_ticket": (
-                "**Escalation Ticket — Return Request**\n"
-                "- Order: #54321 | Customer: session user\n"
-                "- Item: Shoes | Purchase Date: Apr 11\n"
-                "- Eligibility: ✅ Confirmed (day 7 of 30)\n"
-                "- Refund Amount: $89.99\n"
-                "- Action Required: Agent to approve & process refund\n"
-                f"- Raised: {datetime.now().strftime('%Y-%m-%d %H:%M')}"
-            ),
-        }
 
-    # ── UJ3: Shipping Dispute ──────────────────────────────────────────────────
-    if any(kw in q for kw in ["delivered but", "not received", "missing", "wrong item", "damaged", "lost", "dispute"]):
-        return {
-            "intent": "shipping_dispute",
-            "response": (
-                "🔍 **We're sorry to hear that.** Our records show your package was marked "
-                "**Delivered on April 17 at 2:32 PM**.\n\n"
-                "Here's what I recommend:\n"
-                "1. Check with neighbours or a safe-drop location\n"
-                "2. If still missing, you can file a **carrier claim within 7 days** of the delivery date\n\n"
-                "Would you like me to escalate this to our support team to open a carrier investigation on your behalf?"
-            ),
-            "citations": ["shipping_sla.md §3 — Lost Package Claim Window"],
-            "trace": [
-                "Thought: User reports non-receipt of delivered package.",
-                "Action: order_status_tool(last_order_for_customer)",
-                "Observation: status=Delivered, timestamp=Apr 17 14:32, carrier=FedEx",
-                "Action: rag_policy_tool('lost package claim process')",
-                "Observation: 'File claim within 7 days of marked delivery date'",
-                "Thought: Delivery was yesterday — day 1 of 7-day claim window. Can advise.",
-                "Thought: No financial action needed yet. Offer escalation as next step.",
-                "Final Answer: Inform delivery timestamp, explain claim window, offer escalation.",
-            ],
-            "escalated": False,
-            "escalation_ticket": "",
-        }
+def _agent_job(emit: Callable[[str], None], user_query: str, order_id: str) -> dict:
+    """
+    Runs on the backend worker. agent.run() returns the finished answer, so
+    the response is emitted once; nothing is streamed token by token yet.
+    """
+    result = call_agent(user_query, order_id)
+    emit(result["response"])
+    return result
 
-    # ── Out of scope ───────────────────────────────────────────────────────────
-    return {
-        "intent": "out_of_scope",
-        "response": (
-            "I'm specialised in order tracking, returns, refunds, and shipping issues. "
-            "I'm not able to help with that particular request, but I can connect you with "
-            "the right team. Is there anything order-related I can help you with?"
-        ),
-        "citations": [],
-        "trace": ["Thought: Query is outside support domain.", "Final Answer: Politely redirect."],
-        "escalated": False,
-        "escalation_ticket": "",
-    }
+
+def _finish_agent_message(msg: dict, result: dict) -> None:
+    """Copies a finished agent result into its chat message (once per message)."""
+    if result["escalated"]:
+        st.session_state.session_escalated += 1
+    else:
+        st.session_state.session_resolved += 1
+
+    msg.update(
+        {
+            "pending": False,
+            "content": result["response"],
+            "intent": result["intent"],
+            "citations": result["citations"],
+            "trace": result["trace"],
+            "escalated": result["escalated"],
+            "escalation_ticket": result.get("escalation_ticket", ""),
+        }
+    )
 
 
 # ── Intent badge HTML ──────────────────────────────────────────────────────────
@@ -366,6 +326,12 @@ with st.sidebar:
         else 0
     )
     st.progress(resolved_pct / 100, text=f"Containment Rate: {resolved_pct}%")
+
+    ticket_stats = agent.tickets.stats()
+    st.caption(
+        f"🎫 Tickets (all sessions): {ticket_stats['written']} stored · "
+        f"{ticket_stats['delivered']} delivered · {ticket_stats['pending']} pending"
+    )
     st.divider()
 
     # ── Quick-start user journey buttons ──────────────────────────────────────
@@ -473,6 +439,30 @@ with chat_area:
                 unsafe_allow_html=True,
             )
         else:
+            # ── Pending answer: wait for the backend worker ───────────────────
+            if msg.get("pending"):
+                placeholder = st.empty()
+                text = ""
+                try:
+                    for token in backend.stream(msg["id"]):
+                        text += token
+                        placeholder.markdown(
+                            f'<div class="agent-bubble">{text}▌</div>',
+                            unsafe_allow_html=True,
+                        )
+                    result = backend.get(msg["id"]).result
+                except Exception as e:
+                    result = {
+                        "intent": "out_of_scope",
+                        "response": f"Sorry, something went wrong on our side: {e}",
+                        "citations": [],
+                        "trace": [f"Error: {e!r}"],
+                        "escalated": False,
+                        "escalation_ticket": "",
+                    }
+                _finish_agent_message(msg, result)
+                st.rerun()
+
             intent = msg.get("intent", "")
             escalated = msg.get("escalated", False)
             bubble_cls = "escalation-bubble" if escalated else "agent-bubble"
@@ -529,31 +519,20 @@ with st.form("chat_form", clear_on_submit=True):
         submitted = st.form_submit_button("Send ➤", use_container_width=True)
 
 if submitted and user_input.strip():
+    message_id = uuid.uuid4().hex
+
     # Append user message
     st.session_state.messages.append({"role": "user", "content": user_input.strip()})
     st.session_state.session_queries += 1
 
-    # Call agent
-    with st.spinner("Sentinela is thinking..."):
-        result = call_agent(user_input.strip(), st.session_state.order_id)
-
-    # Track escalations vs resolved
-    if result["escalated"]:
-        st.session_state.session_escalated += 1
-    else:
-        st.session_state.session_resolved += 1
-
-    # Append agent message
+    # Placeholder agent message, filled in by the backend worker.
+    # Reruns find the job by message id and never call the agent twice.
     st.session_state.messages.append(
-        {
-            "role": "agent",
-            "content": result["response"],
-            "intent": result["intent"],
-            "citations": result["citations"],
-            "trace": result["trace"],
-            "escalated": result["escalated"],
-            "escalation_ticket": result.get("escalation_ticket", ""),
-        }
+        {"role": "agent", "id": message_id, "pending": True, "content": ""}
+    )
+    backend.submit(
+        message_id, _agent_job, user_input.strip(), st.session_state.order_id,
+        session_key=st.session_state.session_id,
     )
 
     st.rerun()